@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'book_api.settings')
+# Read by the settings, which are loaded by get_asgi_application()
+os.environ['BOOK_API_SERVER'] = 'asgi'
 
 application = get_asgi_application()
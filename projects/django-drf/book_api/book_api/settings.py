@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -43,6 +44,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, to measure the whole request
+    "library.instrumentation.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -82,6 +85,87 @@ DATABASES = {
     }
 }
 
+# Production profile, for concurrent requests: readers and the writer do not
+# block each other in WAL mode, writers wait for the lock instead of failing
+# with "database is locked", and transactions take the write lock as they
+# begin, since a read transaction upgraded to a write one cannot wait for it.
+# Under WSGI, connections are kept across requests, with their page cache and
+# mmap. Not under ASGI (book_api/asgi.py sets BOOK_API_SERVER=asgi): each
+# sync part of an async request runs in a new thread, with its own connection,
+# so persistent connections would pile up without ever being reused.
+# Opt in with BOOK_API_DATABASE_PROFILE=production, the SQLite and Django
+# defaults are kept otherwise.
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 20_000,
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+    "temp_store": "MEMORY",
+}
+
+if os.environ.get("BOOK_API_DATABASE_PROFILE", "default") == "production":
+    DATABASES["default"]["OPTIONS"] = {
+        # Run on every new connection, see DatabaseWrapper.get_new_connection()
+        "init_command": ";".join(
+            f"PRAGMA {pragma} = {value}" for pragma, value in SQLITE_PRAGMAS.items()
+        ),
+        "transaction_mode": "IMMEDIATE",
+    }
+    if os.environ.get("BOOK_API_SERVER") != "asgi":
+        DATABASES["default"].update({"CONN_MAX_AGE": 600, "CONN_HEALTH_CHECKS": True})
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    # Serialized book list and detail responses (library.caching). The cache
+    # and its list version key live in each process: with several workers, a
+    # write only invalidates the entries of the worker that handled it, and
+    # the others may serve stale books and lists for up to TIMEOUT seconds.
+    # Use a shared backend, e.g. Redis or Memcached, to run several workers.
+    "books": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "books",
+        "TIMEOUT": 300,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
+}
+
+
+# Authentication of GET, HEAD and OPTIONS requests to the views with the
+# ReadAuthenticationMixin (library.authentication): the user of a token is
+# built from its claims, and BasicAuthentication is skipped
+
+READ_AUTHENTICATION_CLASSES = [
+    "library.authentication.TokenUserJWTAuthentication",
+    "rest_framework.authentication.SessionAuthentication",
+]
+
+SIMPLE_JWT = {
+    "TOKEN_OBTAIN_SERIALIZER": "library.serializers.TokenClaimsObtainPairSerializer",
+}
+
+
+# Rate limiting (library.throttling)
+# SlidingWindowThrottle applies the rates of the throttle classes, counting
+# the requests of every process in the shared store
+
+RATE_LIMIT = {
+    "STORE": "library.throttling.SQLiteRateLimitStore",
+    "LOCATION": BASE_DIR / "ratelimit.sqlite3",
+    "THROTTLES": [
+        "rest_framework.throttling.ScopedRateThrottle",
+        "rest_framework.throttling.AnonRateThrottle",
+        "rest_framework.throttling.UserRateThrottle",
+        "library.throttling.CustomRateThrottle",
+    ],
+}
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -132,15 +216,12 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticatedOrReadOnly",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "library.authentication.CachedJWTAuthentication",
         "rest_framework.authentication.SessionAuthentication",
         "rest_framework.authentication.BasicAuthentication",
     ],
     "DEFAULT_THROTTLE_CLASSES": [
-        "rest_framework.throttling.ScopedRateThrottle",
-        "rest_framework.throttling.AnonRateThrottle",
-        "rest_framework.throttling.UserRateThrottle",
-        "library.throttling.CustomRateThrottle",
+        "library.throttling.SlidingWindowThrottle",
     ],
     "DEFAULT_THROTTLE_RATES": {
         "books": "70/minutes",
@@ -149,3 +230,7 @@ REST_FRAMEWORK = {
         "custom": "50/minutes",
     },
 }
+
+# load_test.py compares the throughput of the views without throttling
+if os.environ.get("BOOK_API_THROTTLING") == "off":
+    REST_FRAMEWORK["DEFAULT_THROTTLE_CLASSES"] = []
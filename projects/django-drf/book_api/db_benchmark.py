@@ -0,0 +1,159 @@
+"""
+Mixed read/write benchmark of the v1 book endpoints, to compare the database
+profiles of book_api/settings.py.
+
+Start the ASGI server with several worker processes and without throttling,
+once with the SQLite defaults and once with the production profile, e.g.:
+
+    export BOOK_API_THROTTLING=off
+    uvicorn book_api.asgi:application --workers 4
+    BOOK_API_DATABASE_PROFILE=production uvicorn book_api.asgi:application --workers 4
+
+Then run, with the credentials of an existing user:
+
+    python db_benchmark.py --username admin --password secret
+
+Each run sends `--requests` requests, `--concurrency` at a time over keep-alive
+connections. A `--write-share` of them create a book, rename a book, or
+rename 10 books through the bulk endpoint, and the others read a page of the
+book list or a book. It reports the
+throughput, the latency percentiles of reads and writes, and the failed
+requests by status, e.g. 500 for "database is locked". Only the standard
+library is used.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+from collections import Counter
+from time import perf_counter, time_ns
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+from load_test import DEFAULT_URL, read_response
+
+
+def get_token(url, username, password):
+    request = Request(
+        f"{url}/api/token/",
+        data=json.dumps({"username": username, "password": password}).encode(),
+        headers={"Content-Type": "application/json"},
+    )
+    with urlopen(request) as response:
+        return json.load(response)["access"]
+
+
+def get_book_ids(url, count=1000):
+    # The book list pages are small, the export streams every book
+    with urlopen(f"{url}/api/v1/books/export/") as response:
+        return [json.loads(line)["id"] for line, _ in zip(response, range(count))]
+
+
+def get_requests(count, write_share, book_ids, seed):
+    """Returns `count` (kind, method, path, body) requests, in random order."""
+    rng = random.Random(seed)
+    run_id = time_ns()
+    requests = []
+    for i in range(count):
+        if rng.random() < write_share:
+            if i % 3 == 0:
+                body = {"title": f"Benchmark {run_id}-{i}", "author": "Benchmark"}
+                requests.append(("write", "POST", "/api/v1/books/", body))
+            elif i % 3 == 1:
+                path = f"/api/v1/books/{rng.choice(book_ids)}/"
+                requests.append(("write", "PATCH", path, {"title": f"Renamed {i}"}))
+            else:
+                # Reads the books, then updates them, in one transaction
+                items = [
+                    {"id": pk, "title": f"Renamed {i}"}
+                    for pk in rng.sample(book_ids, 10)
+                ]
+                requests.append(("write", "PATCH", "/api/v1/books/bulk/", items))
+        elif i % 2:
+            # A distinct query each time, so that the response cache misses
+            path = f"/api/v1/books/?author=a&size=20&request={run_id}-{i}"
+            requests.append(("read", "GET", path, None))
+        else:
+            path = f"/api/v1/books/{rng.choice(book_ids)}/"
+            requests.append(("read", "GET", path, None))
+    return requests
+
+
+async def client(host, port, token, requests, latencies, statuses):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while requests:
+            kind, method, path, body = requests.pop()
+            content = json.dumps(body).encode() if body is not None else b""
+            writer.write(
+                f"{method} {path} HTTP/1.1\r\nHost: {host}\r\n"
+                f"Accept: application/json\r\nAuthorization: Bearer {token}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(content)}\r\n\r\n".encode()
+                + content
+            )
+            started = perf_counter()
+            status = await read_response(reader)
+            latencies[kind].append(perf_counter() - started)
+            statuses[kind][status] += 1
+    finally:
+        writer.close()
+
+
+async def run(url, token, requests, concurrency):
+    parts = urlsplit(url)
+    host, port = parts.hostname, parts.port or 80
+    latencies = {"read": [], "write": []}
+    statuses = {"read": Counter(), "write": Counter()}
+
+    started = perf_counter()
+    await asyncio.gather(
+        *(
+            client(host, port, token, requests, latencies, statuses)
+            for _ in range(concurrency)
+        )
+    )
+    return perf_counter() - started, latencies, statuses
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default=DEFAULT_URL, help="Base URL of the server")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--write-share", type=float, default=0.25)
+    parser.add_argument("--seed", type=int, default=0)
+    arguments = parser.parse_args()
+
+    token = get_token(arguments.url, arguments.username, arguments.password)
+    book_ids = get_book_ids(arguments.url)
+    requests = get_requests(
+        arguments.requests, arguments.write_share, book_ids, arguments.seed
+    )
+    elapsed, latencies, statuses = asyncio.run(
+        run(arguments.url, token, requests, arguments.concurrency)
+    )
+
+    print(f"total: {arguments.requests / elapsed:8.1f} req/s")
+    for kind in ("read", "write"):
+        if len(latencies[kind]) < 2:
+            continue
+        quantiles = statistics.quantiles(latencies[kind], n=100)
+        failed = {
+            status: count for status, count in statuses[kind].items() if status >= 400
+        }
+        print(
+            f"{kind:>5}: {len(latencies[kind]) / elapsed:8.1f} req/s"
+            f"   p50 {quantiles[49] * 1000:7.1f} ms"
+            f"   p95 {quantiles[94] * 1000:7.1f} ms"
+            f"   p99 {quantiles[98] * 1000:7.1f} ms"
+            f"   failed {sum(failed.values())} {failed or ''}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import (
+    JWTAuthentication,
+    JWTStatelessUserAuthentication,
+)
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import aware_utcnow, get_md5_hash_password
+
+# Number of verified tokens kept per process
+VERIFIED_TOKENS_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=VERIFIED_TOKENS_CACHE_SIZE)
+def get_verified_token(token_class, raw_token):
+    """
+    Returns the `token_class` instance of `raw_token`, decoding it and checking
+    its signature only the first time. Invalid tokens raise and are not cached.
+    """
+    return token_class(raw_token)
+
+
+# ================================================================
+#                      TOKEN AUTHENTICATION
+# ================================================================
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that verifies the signature of each token once per
+    process: the token is only checked for expiry on the next requests.
+    """
+
+    def get_validated_token(self, raw_token):
+        """Same as `JWTAuthentication.get_validated_token()`, with the cache."""
+        messages = []
+        for token_class in api_settings.AUTH_TOKEN_CLASSES:
+            try:
+                token = get_verified_token(token_class, raw_token)
+                # A cached token may have expired since it was verified
+                token.check_exp(current_time=aware_utcnow())
+                return token
+            except TokenError as error:
+                messages.append(
+                    {
+                        "token_class": token_class.__name__,
+                        "token_type": token_class.token_type,
+                        "message": error.args[0],
+                    }
+                )
+
+        raise InvalidToken(
+            {
+                "detail": _("Given token not valid for any token type"),
+                "messages": messages,
+            }
+        )
+
+
+class TokenUserJWTAuthentication(
+    CachedJWTAuthentication, JWTStatelessUserAuthentication
+):
+    """
+    CachedJWTAuthentication returning a TokenUser built from the claims of the
+    token, without querying the database. Users deactivated or demoted after
+    the token was issued keep its permissions until it expires.
+    """
+
+
+class ReadAuthenticationMixin:
+    """
+    Authenticates the requests with a safe method (GET, HEAD, OPTIONS) with
+    `read_authentication_classes` instead of `authentication_classes`, by
+    default the READ_AUTHENTICATION_CLASSES setting. Reads can so skip the
+    user query, and the password hashing of BasicAuthentication.
+    """
+
+    read_authentication_classes = None
+
+    def get_authenticators(self):
+        if self.request.method not in SAFE_METHODS:
+            return super().get_authenticators()
+
+        classes = self.read_authentication_classes
+        if classes is None:
+            classes = map(import_string, settings.READ_AUTHENTICATION_CLASSES)
+        return [auth() for auth in classes]
+
+
+# ================================================================
+#                     ASYNC AUTHENTICATION
+# ================================================================
+# `aauthenticate()` counterparts of the DRF authentication classes, for the
+# async views of views_v2.py: they return a (user, auth) pair or None.
+
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        # Only the user lookup queries the database
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        """Same as `get_user()`, with an async query."""
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+        try:
+            user = await self.user_model.objects.aget(
+                **{api_settings.USER_ID_FIELD: user_id}
+            )
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(
+                api_settings.REVOKE_TOKEN_CLAIM
+            ) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(
+                    _("The user's password has been changed."), code="password_changed"
+                )
+
+        return user
+
+
+class AsyncSessionAuthentication(SessionAuthentication):
+    async def aauthenticate(self, request):
+        user = await request.auser()
+        if not user or not user.is_active:
+            return None
+
+        self.enforce_csrf(request)
+        return user, None
@@ -0,0 +1,182 @@
+from itertools import islice
+
+from django.db import transaction
+from django.utils import timezone
+
+from library.caching import invalidate_books
+from library.models import Book
+from library.serializers import BookBulkSerializer
+
+# Columns overwritten when a created book has the ISBN of an existing one
+UPSERT_FIELDS = ("title", "author", "publication_date", "summary", "updated_at")
+
+DUPLICATE_ISBN_MESSAGE = "Another item of this request has the same isbn."
+EXISTING_ISBN_MESSAGE = "book with this isbn already exists."
+MISSING_ID_MESSAGE = "A book id is required."
+NOT_FOUND_MESSAGE = "No book with this id."
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def get_item_id(item):
+    pk = item.get("id") if isinstance(item, dict) else item
+    if isinstance(pk, int) and not isinstance(pk, bool):
+        return pk
+    return None
+
+
+def error_result(index, errors):
+    return {"index": index, "status": "error", "errors": errors}
+
+
+def invalidate_written_books(pks):
+    # bulk_create() and bulk_update() send no signals, see signals.py
+    invalidate_books(pks)
+    transaction.on_commit(lambda: invalidate_books(pks))
+
+
+# ================================================================
+#                          BULK WRITES
+# ================================================================
+# Each batch is validated with one BookBulkSerializer, written with a single
+# bulk query in its own transaction, and reported item by item as
+# {"index", "status", "id"} or {"index", "status": "error", "errors"}.
+
+
+def create_books(items, batch_size):
+    """Creates books, updating instead the existing books with the same ISBN."""
+    results = []
+    seen_isbns = set()
+
+    for batch in batched(enumerate(items), batch_size):
+        serializer = BookBulkSerializer(data=[item for _, item in batch], many=True)
+        books, indexes = [], []
+
+        for (index, _), (data, errors) in zip(batch, serializer.validate_items()):
+            if errors is None:
+                # An empty ISBN is no ISBN, otherwise every such book would merge
+                data["isbn"] = data.get("isbn") or None
+                if data["isbn"] in seen_isbns:
+                    errors = {"isbn": [DUPLICATE_ISBN_MESSAGE]}
+            if errors is not None:
+                results.append(error_result(index, errors))
+                continue
+
+            if data["isbn"] is not None:
+                seen_isbns.add(data["isbn"])
+            books.append(Book(**data))
+            indexes.append(index)
+
+        if not books:
+            continue
+
+        with transaction.atomic():
+            isbns = [book.isbn for book in books if book.isbn is not None]
+            existing = set(
+                Book.objects.filter(isbn__in=isbns).values_list("isbn", flat=True)
+            )
+            # Sets the primary keys of both the created and the updated books
+            Book.objects.bulk_create(
+                books,
+                update_conflicts=True,
+                unique_fields=("isbn",),
+                update_fields=UPSERT_FIELDS,
+            )
+            invalidate_written_books([book.pk for book in books])
+
+        for index, book in zip(indexes, books):
+            status = "updated" if book.isbn in existing else "created"
+            results.append({"index": index, "status": status, "id": book.pk})
+
+    return sorted(results, key=lambda result: result["index"])
+
+
+def update_books(items, batch_size):
+    """Partially updates the books identified by the `id` of each item."""
+    results = []
+
+    for batch in batched(enumerate(items), batch_size):
+        serializer = BookBulkSerializer(
+            data=[item for _, item in batch], many=True, partial=True
+        )
+        changes = []
+
+        for (index, item), (data, errors) in zip(batch, serializer.validate_items()):
+            pk = get_item_id(item)
+            if pk is None:
+                errors = {"id": [MISSING_ID_MESSAGE], **(errors or {})}
+            if errors is not None:
+                results.append(error_result(index, errors))
+            else:
+                changes.append((index, pk, data))
+
+        if not changes:
+            continue
+
+        with transaction.atomic():
+            books = Book.objects.in_bulk([pk for _, pk, _ in changes])
+            isbns = [data["isbn"] for _, _, data in changes if data.get("isbn")]
+            isbn_owners = dict(
+                Book.objects.filter(isbn__in=isbns).values_list("isbn", "pk")
+            )
+
+            updated, fields = {}, {"updated_at"}
+            now = timezone.now()
+            for index, pk, data in changes:
+                if pk not in books:
+                    results.append(error_result(index, {"id": [NOT_FOUND_MESSAGE]}))
+                    continue
+                if "isbn" in data:
+                    data["isbn"] = data["isbn"] or None
+                isbn = data.get("isbn")
+                if isbn and isbn_owners.setdefault(isbn, pk) != pk:
+                    errors = {"isbn": [EXISTING_ISBN_MESSAGE]}
+                    results.append(error_result(index, errors))
+                    continue
+
+                book = books[pk]
+                for field, value in data.items():
+                    setattr(book, field, value)
+                book.updated_at = now
+                updated[pk] = book
+                fields.update(data)
+                results.append({"index": index, "status": "updated", "id": pk})
+
+            if updated:
+                Book.objects.bulk_update(updated.values(), fields=sorted(fields))
+                invalidate_written_books(list(updated))
+
+    return sorted(results, key=lambda result: result["index"])
+
+
+def delete_books(items, batch_size):
+    """Deletes the books identified by each item, an id or an object with an `id`."""
+    results = []
+
+    for batch in batched(enumerate(items), batch_size):
+        pks = [get_item_id(item) for _, item in batch]
+
+        with transaction.atomic():
+            existing = set(
+                Book.objects.filter(
+                    pk__in=[pk for pk in pks if pk is not None]
+                ).values_list("pk", flat=True)
+            )
+            # Sends post_delete, which invalidates the cached responses
+            Book.objects.filter(pk__in=existing).delete()
+
+        for (index, _), pk in zip(batch, pks):
+            if pk is None:
+                results.append(error_result(index, {"id": [MISSING_ID_MESSAGE]}))
+            elif pk not in existing:
+                results.append(error_result(index, {"id": [NOT_FOUND_MESSAGE]}))
+            else:
+                results.append({"index": index, "status": "deleted", "id": pk})
+                # Later items with the same id are not found anymore
+                existing.discard(pk)
+
+    return results
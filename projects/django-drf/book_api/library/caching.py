@@ -0,0 +1,131 @@
+from hashlib import sha256
+from time import time_ns
+from urllib.parse import urlencode
+
+from django.core.cache import caches
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+from rest_framework.response import Response
+
+CACHE_ALIAS = "books"
+CACHE_HEADER = "X-Cache"
+# Validators cached along with the data, so that a HIT can answer 304 too
+VALIDATOR_HEADERS = ("ETag", "Last-Modified")
+
+# Every cached list is stored under the current list version, so changing
+# it invalidates all of them at once
+LIST_VERSION_KEY = "books:list:version"
+
+
+def get_cache():
+    return caches[CACHE_ALIAS]
+
+
+def normalize_query(query_params):
+    """
+    Sorts the query parameters and their values, and drops the empty ones,
+    which filters ignore, so equivalent requests share the same cache entry.
+    """
+    return urlencode(
+        sorted(
+            (key, value)
+            for key, values in query_params.lists()
+            for value in values
+            if value != ""
+        )
+    )
+
+
+def get_list_version():
+    cache = get_cache()
+    version = cache.get(LIST_VERSION_KEY)
+    if version is None:
+        # A fresh version cannot collide with entries cached before an eviction
+        cache.add(LIST_VERSION_KEY, time_ns(), timeout=None)
+        version = cache.get(LIST_VERSION_KEY)
+    return version
+
+
+def get_list_cache_key(request):
+    # Pagination links are absolute, so the scheme and host are part of the key
+    url = f"{request.build_absolute_uri(request.path)}?{normalize_query(request.query_params)}"
+    return f"books:list:{get_list_version()}:{sha256(url.encode()).hexdigest()}"
+
+
+def get_detail_cache_key(pk):
+    return f"books:detail:{pk}"
+
+
+def invalidate_book(pk=None):
+    """
+    Drops the cached detail of a book and every cached list, since any list
+    may include the book or change once it is added or removed.
+    """
+    cache = get_cache()
+    if pk is not None:
+        cache.delete(get_detail_cache_key(pk))
+    cache.set(LIST_VERSION_KEY, time_ns(), timeout=None)
+
+
+def invalidate_books(pks):
+    """Same as `invalidate_book()` for many books, e.g. after a bulk write."""
+    cache = get_cache()
+    cache.delete_many([get_detail_cache_key(pk) for pk in pks])
+    cache.set(LIST_VERSION_KEY, time_ns(), timeout=None)
+
+
+def cached_response(request, key, get_response):
+    """
+    Returns the response data cached under `key`, or caches the data of the
+    successful response built by `get_response`. The X-Cache header tells
+    which one happened. A HIT whose validators match the conditional headers
+    of the request is answered with 304 Not Modified, without any query.
+    """
+    cache = get_cache()
+    entry = cache.get(key)
+    if entry is not None:
+        headers = entry["headers"]
+        response = get_conditional_response(
+            request,
+            headers.get("ETag"),
+            parse_http_date_safe(headers.get("Last-Modified")),
+        )
+        if response is None:
+            response = Response(entry["data"])
+        for header, value in headers.items():
+            response[header] = value
+        response[CACHE_HEADER] = "HIT"
+        return response
+
+    response = get_response()
+    if response.status_code == 200:
+        headers = {
+            header: response[header]
+            for header in VALIDATOR_HEADERS
+            if response.has_header(header)
+        }
+        cache.set(key, {"data": response.data, "headers": headers})
+    response[CACHE_HEADER] = "MISS"
+    return response
+
+
+class CachedListMixin:
+    """Serves `list()` from the books cache, keyed by its normalized query."""
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(
+            request,
+            get_list_cache_key(request),
+            lambda: super(CachedListMixin, self).list(request, *args, **kwargs),
+        )
+
+
+class CachedRetrieveMixin:
+    """Serves `retrieve()` from the books cache, keyed by the book pk."""
+
+    def retrieve(self, request, *args, **kwargs):
+        return cached_response(
+            request,
+            get_detail_cache_key(kwargs[self.lookup_url_kwarg or self.lookup_field]),
+            lambda: super(CachedRetrieveMixin, self).retrieve(request, *args, **kwargs),
+        )
@@ -0,0 +1,139 @@
+from hashlib import sha256
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.response import Response
+
+from library.caching import normalize_query
+
+
+class NotModified(Exception):
+    """Raised with the 304 response of a list whose ETag still matches."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The book was modified since it was last read."
+    default_code = "precondition_failed"
+
+
+# ================================================================
+#                           VALIDATORS
+# ================================================================
+
+
+def make_etag(*parts):
+    # Strong, since If-Match never accepts weak ETags
+    digest = sha256(":".join(map(str, parts)).encode()).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def get_book_validators(book):
+    """Returns the ETag and Last-Modified timestamp of a book."""
+    return (
+        make_etag(book.pk, book.updated_at.isoformat()),
+        int(book.updated_at.timestamp()),
+    )
+
+
+def get_list_etag(request, links, rows):
+    """
+    Returns the ETag of a page of a filtered book list, from its pagination
+    links and count, if any, and the pk and `updated_at` of its rows: it
+    changes whenever the page does, including when books are deleted, without
+    querying more than the page itself.
+    """
+    return make_etag(
+        request.path,
+        normalize_query(request.query_params),
+        sorted(links.items()),
+        [(row.id, row.updated_at.isoformat()) for row in rows],
+    )
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+# ================================================================
+#                             MIXINS
+# ================================================================
+
+
+class ConditionalListMixin:
+    """
+    Answers `list()` with 304 Not Modified, before any book is serialized,
+    when the If-None-Match header of the request still matches the page.
+
+    The page rows must have an `updated_at` attribute. Lists have no
+    Last-Modified header, since the latest `updated_at` of the books does not
+    change when one of them is deleted.
+    """
+
+    values_extra_fields = ("updated_at",)
+
+    def list(self, request, *args, **kwargs):
+        self.list_etag = None
+        try:
+            response = super().list(request, *args, **kwargs)
+        except NotModified as not_modified:
+            response = not_modified.response
+        if self.list_etag is not None:
+            set_validators(response, self.list_etag, None)
+        return response
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            page = list(page)
+            # The count and links, without the results
+            links = self.paginator.get_paginated_response([]).data
+            links.pop("results", None)
+            self.list_etag = get_list_etag(self.request, links, page)
+            response = get_conditional_response(self.request, etag=self.list_etag)
+            if response is not None:
+                raise NotModified(response)
+        return page
+
+
+class ConditionalDetailMixin:
+    """
+    Answers `retrieve()` with 304 Not Modified when the book is unchanged, and
+    rejects updates and deletions with 412 Precondition Failed when the
+    If-Match or If-Unmodified-Since header no longer matches the book.
+    """
+
+    def get_object(self):
+        book = super().get_object()
+        if self.request.method not in SAFE_METHODS:
+            # Checked before validating the data, against the stored book
+            validators = get_book_validators(book)
+            if get_conditional_response(self.request, *validators) is not None:
+                raise PreconditionFailed()
+        return book
+
+    def retrieve(self, request, *args, **kwargs):
+        book = self.get_object()
+        validators = get_book_validators(book)
+        response = get_conditional_response(request, *validators)
+        if response is None:
+            # As RetrieveModelMixin does, without fetching the book again
+            response = Response(self.get_serializer(book).data)
+        return set_validators(response, *validators)
+
+    def update(self, request, *args, **kwargs):
+        response = super().update(request, *args, **kwargs)
+        return set_validators(response, *get_book_validators(self.updated_book))
+
+    def perform_update(self, serializer):
+        super().perform_update(serializer)
+        self.updated_book = serializer.instance
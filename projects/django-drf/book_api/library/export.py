@@ -0,0 +1,39 @@
+import csv
+from itertools import chain
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+# Rows are sent to the client in chunks of this many rows
+ROWS_PER_CHUNK = 500
+
+
+class Echo:
+    """File-like object whose `write()` returns the data instead of storing it."""
+
+    def write(self, value):
+        return value
+
+
+def iter_chunks(lines, rows_per_chunk=ROWS_PER_CHUNK):
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) == rows_per_chunk:
+            yield "".join(chunk).encode()
+            chunk = []
+    if chunk:
+        yield "".join(chunk).encode()
+
+
+def iter_ndjson(rows, fields):
+    """Yields the `values_list()` rows as NDJSON, one object per line."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    return iter_chunks(f"{encoder.encode(dict(zip(fields, row)))}\n" for row in rows)
+
+
+def iter_csv(rows, fields):
+    """Yields the `values_list()` rows as CSV, under a header row."""
+    writer = csv.writer(Echo())
+    # csv writes None as an empty string, and dates with str(), i.e. ISO 8601
+    lines = chain([writer.writerow(fields)], map(writer.writerow, rows))
+    return iter_chunks(lines)
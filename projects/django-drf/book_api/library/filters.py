@@ -1,6 +1,16 @@
+from datetime import date
+
 import django_filters
+from django import forms
+from rest_framework import filters
+
+from library.lookups import LowerExact
+from library.models import Book, BookSearchIndex
 
-from library.models import Book
+
+class IntegerFilter(django_filters.NumberFilter):
+    # NumberFilter accepts decimals, e.g. 1979.5
+    field_class = forms.IntegerField
 
 
 class BookFilter(django_filters.FilterSet):
@@ -10,9 +20,9 @@ class BookFilter(django_filters.FilterSet):
     author = django_filters.CharFilter(
         field_name="author", lookup_expr="icontains"
     )  # Look for ?author=
-    publication_year = django_filters.NumberFilter(
-        field_name="publication_date__year",
-        lookup_expr="exact",
+    publication_year = IntegerFilter(
+        field_name="publication_date",
+        method="filter_publication_year",
     )  # Look for ?publication_year=
     isbn = django_filters.CharFilter(field_name="isbn", lookup_expr="exact")
     has_summary = django_filters.BooleanFilter(
@@ -28,3 +38,48 @@ class BookFilter(django_filters.FilterSet):
         fields = {
             "publication_date": ("gte", "lte", "range")
         }  # Look for ?publication_date__gte=...&publication_date__lte=... | ?publication_date__range=...,...
+
+    def filter_publication_year(self, queryset, name, value):
+        # A date range can use the publication_date index, unlike __year
+        if not date.min.year <= value <= date.max.year:
+            return queryset.none()
+        return queryset.filter(
+            **{f"{name}__range": (date(value, 1, 1), date(value, 12, 31))}
+        )
+
+
+class BookSearchFilter(filters.SearchFilter):
+    # "=author" compares LOWER(author), which the functional index covers
+    lookup_prefixes = {
+        **filters.SearchFilter.lookup_prefixes,
+        "=": LowerExact.lookup_name,
+    }
+
+
+class BookFullTextSearchFilter(BookSearchFilter):
+    """
+    Full-text search with `?q=`, ranked by BM25 through the SQLite FTS5 index.
+    Every term must match a word of the title, author or summary. On other
+    database engines, or without FTS5, the terms are searched with
+    SearchFilter's `icontains` lookups over the same fields instead.
+    """
+
+    search_param = "q"
+    search_fields = ("title", "author", "summary")
+
+    def get_search_fields(self, view, request):
+        return self.search_fields
+
+    def filter_queryset(self, request, queryset, view):
+        if not BookSearchIndex.is_available(queryset.db):
+            return super().filter_queryset(request, queryset, view)
+
+        terms = self.get_search_terms(request)
+        if not terms:
+            return queryset
+
+        # Each term becomes a quoted FTS5 string, so no query syntax is injected
+        match = " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+        return queryset.filter(search_index__match=match).order_by(
+            "search_index__rank", "pk"
+        )
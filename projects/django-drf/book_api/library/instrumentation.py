@@ -0,0 +1,223 @@
+import math
+import threading
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from rest_framework.serializers import ListSerializer
+
+# Metrics of the request being handled, also seen by the queries run in
+# sync_to_async() threads, since they copy the context
+current_metrics = ContextVar("current_metrics", default=None)
+
+# Durations of the Server-Timing header, in this order
+TIMINGS = ("total", "db", "serializer", "auth", "throttle")
+
+# Number of the latest requests of each view kept in the histograms
+HISTOGRAM_SIZE = 1000
+PERCENTILES = (50, 95, 99)
+
+
+class RequestMetrics:
+    """Query count and durations, in seconds, of a request."""
+
+    def __init__(self):
+        self.queries = 0
+        self.timings = dict.fromkeys(TIMINGS, 0.0)
+
+    def add(self, name, duration):
+        self.timings[name] += duration
+
+    def get_server_timing(self):
+        entries = []
+        for name, duration in self.timings.items():
+            description = ""
+            if name == "db":
+                unit = "query" if self.queries == 1 else "queries"
+                description = f';desc="{self.queries} {unit}"'
+            entries.append(f"{name}{description};dur={duration * 1000:.2f}")
+        return ", ".join(entries)
+
+
+@contextmanager
+def timer(name):
+    """Adds the duration of the block to the `name` timing of the request."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        yield
+        return
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add(name, perf_counter() - started)
+
+
+def record_query(execute, sql, params, many, context):
+    """Database execute wrapper counting and timing the queries of requests."""
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries += 1
+        metrics.add("db", perf_counter() - started)
+
+
+# ================================================================
+#                           HISTOGRAMS
+# ================================================================
+
+
+class Histogram:
+    """The latest HISTOGRAM_SIZE samples of a value, for percentiles."""
+
+    def __init__(self):
+        self.samples = deque(maxlen=HISTOGRAM_SIZE)
+
+    def add(self, value):
+        self.samples.append(value)
+
+    def get_percentiles(self):
+        samples = sorted(self.samples)
+        if not samples:
+            return {}
+        # Nearest-rank percentiles
+        return {
+            f"p{percentile}": samples[math.ceil(percentile / 100 * len(samples)) - 1]
+            for percentile in PERCENTILES
+        }
+
+
+class ViewMetrics:
+    """Histograms of the query count and durations, in ms, of a view."""
+
+    def __init__(self):
+        self.count = 0
+        self.histograms = {name: Histogram() for name in ("queries", *TIMINGS)}
+
+    def add(self, metrics):
+        self.count += 1
+        self.histograms["queries"].add(metrics.queries)
+        for name, duration in metrics.timings.items():
+            self.histograms[name].add(round(duration * 1000, 3))
+
+    def get_summary(self):
+        return {
+            "count": self.count,
+            **{
+                name: histogram.get_percentiles()
+                for name, histogram in self.histograms.items()
+            },
+        }
+
+
+views_metrics = {}
+views_metrics_lock = threading.Lock()
+
+
+def record_request(view_name, metrics):
+    with views_metrics_lock:
+        views_metrics.setdefault(view_name, ViewMetrics()).add(metrics)
+
+
+def get_views_metrics():
+    """Returns the percentiles of the metrics of each view, by view name."""
+    with views_metrics_lock:
+        return {
+            view_name: view_metrics.get_summary()
+            for view_name, view_metrics in sorted(views_metrics.items())
+        }
+
+
+def clear_views_metrics():
+    with views_metrics_lock:
+        views_metrics.clear()
+
+
+# ================================================================
+#                      MIDDLEWARE AND MIXINS
+# ================================================================
+
+
+class InstrumentationMiddleware:
+    """
+    Measures the total and database durations and the query count of each
+    request, adds them to the histograms of its view, and returns them in a
+    Server-Timing header along with the serializer, authentication and
+    throttling durations recorded by the mixins. The queries and serializers
+    of streaming responses run after the response is returned, and are not
+    measured.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.process_response(request, response, metrics, started)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics()
+        token = current_metrics.set(metrics)
+        started = perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.process_response(request, response, metrics, started)
+
+    def process_response(self, request, response, metrics, started):
+        metrics.add("total", perf_counter() - started)
+        response["Server-Timing"] = metrics.get_server_timing()
+        if request.resolver_match is not None:
+            record_request(request.resolver_match.view_name, metrics)
+        return response
+
+
+class InstrumentedViewMixin:
+    """Records the authentication and throttling durations of an APIView."""
+
+    def perform_authentication(self, request):
+        with timer("auth"):
+            super().perform_authentication(request)
+
+    def check_throttles(self, request):
+        with timer("throttle"):
+            super().check_throttles(request)
+
+
+class TimedSerializerMixin:
+    """Records the validation and representation durations of a serializer."""
+
+    def is_valid(self, *args, **kwargs):
+        with timer("serializer"):
+            return super().is_valid(*args, **kwargs)
+
+    @property
+    def data(self):
+        with timer("serializer"):
+            return super().data
+
+
+class TimedListSerializer(TimedSerializerMixin, ListSerializer):
+    pass
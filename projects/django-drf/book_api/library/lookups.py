@@ -0,0 +1,30 @@
+from django.db.models import CharField, Lookup, TextField
+from django.db.models.functions import Lower
+
+
+@CharField.register_lookup
+class LowerExact(Lookup):
+    """
+    Case-insensitive equality written as `LOWER(column) = LOWER(value)`, so that
+    it matches a functional index on `Lower(column)`, unlike `iexact`, which
+    SQLite turns into an unindexable `LIKE`.
+    """
+
+    lookup_name = "lower_exact"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = compiler.compile(Lower(self.lhs))
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} = LOWER({rhs})", (*lhs_params, *rhs_params)
+
+
+@TextField.register_lookup
+class Match(Lookup):
+    """Full-text `column MATCH query` condition of SQLite FTS5 tables."""
+
+    lookup_name = "match"
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f"{lhs} MATCH {rhs}", (*lhs_params, *rhs_params)
@@ -1,39 +1,206 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from datetime import date
+from importlib import import_module
+from multiprocessing import get_context
+from time import perf_counter
 
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
 
-from library.models import Book
+from library.caching import invalidate_book
+from library.models import Book, BookSearchIndex
+from library.seeding import generate_batch
+
+search_index = import_module("library.migrations.0003_book_search_index")
+
+SAMPLE_BOOKS = (
+    {
+        "title": "The Hitchhiker's Guide to the Galaxy",
+        "author": "Douglas Adams",
+        "publication_date": date(1979, 10, 12),
+        "isbn": "9780345391803",
+        "summary": "A comedic science fiction adventure.",
+    },
+    {
+        "title": "Pride and Prejudice",
+        "author": "Jane Austen",
+        "publication_date": date(1813, 1, 28),
+        "summary": "A classic novel of manners.",
+    },
+    {
+        "title": "To Kill a Mockingbird",
+        "author": "Harper Lee",
+        "publication_date": date(1960, 7, 11),
+        "isbn": "9780446310789",
+        "summary": "A powerful story about justice and prejudice in the American South.",
+    },
+)
+
+# Trades durability for speed during the load: a crash may corrupt the database
+LOAD_PRAGMAS = {"journal_mode": "MEMORY", "synchronous": "OFF"}
+
+SEARCH_TRIGGERS = ("insert", "delete", "update")
 
 
 class Command(BaseCommand):
-    help = "Populates the database with initial book data"
+    help = (
+        "Populates the database with initial book data, or with --count "
+        "synthetic books for capacity tests"
+    )
 
-    def handle(self, *args, **options):
-        # Clear database
-        Book.objects.all().delete()
-
-        # Add some sample records
-        Book.objects.create(
-            title="The Hitchhiker's Guide to the Galaxy",
-            author="Douglas Adams",
-            publication_date=date(1979, 10, 12),
-            isbn="9780345391803",
-            summary="A comedic science fiction adventure.",
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--count",
+            type=int,
+            help="Number of synthetic books to generate instead of the sample books",
         )
-        Book.objects.create(
-            title="Pride and Prejudice",
-            author="Jane Austen",
-            publication_date=date(1813, 1, 28),
-            summary="A classic novel of manners.",
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Number of books inserted per query and transaction",
         )
-        Book.objects.create(
-            title="To Kill a Mockingbird",
-            author="Harper Lee",
-            publication_date=date(1960, 7, 11),
-            isbn="9780446310789",
-            summary="A powerful story about justice and prejudice in the American South.",
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of processes generating the synthetic books",
         )
+        parser.add_argument(
+            "--seed", type=int, default=0, help="Seed of the synthetic books"
+        )
+        parser.add_argument(
+            "--append", action="store_true", help="Keep the existing books"
+        )
+
+    def handle(self, *args, **options):
+        for option in ("count", "batch_size", "workers"):
+            if options[option] is not None and options[option] < 1:
+                raise CommandError(f"--{option.replace('_', '-')} must be positive")
+
+        self.verbosity = options["verbosity"]
+        initial_count = Book.objects.count() if options["append"] else 0
+        started = perf_counter()
 
+        with self.bulk_load():
+            if not options["append"]:
+                # Clear database, without fetching every book like QuerySet.delete()
+                with connection.cursor() as cursor:
+                    cursor.execute(f"DELETE FROM {Book._meta.db_table}")
+
+            if options["count"] is None:
+                Book.objects.bulk_create(Book(**book) for book in SAMPLE_BOOKS)
+            else:
+                self.load_books(
+                    options["count"],
+                    options["batch_size"],
+                    options["workers"],
+                    options["seed"],
+                )
+
+        elapsed = perf_counter() - started
+        inserted = Book.objects.count() - initial_count
         self.stdout.write(
-            self.style.SUCCESS("Successfully populated the database with initial books")
+            self.style.SUCCESS(
+                f"Successfully populated the database with {inserted} books "
+                f"in {elapsed:.2f} s ({inserted / elapsed:,.0f} rows/s)"
+            )
         )
+
+    def load_books(self, count, batch_size, workers, seed):
+        # Sequence numbers continue after the existing books, for distinct ISBNs
+        first = (Book.objects.aggregate(last=Max("pk"))["last"] or 0) + 1
+        tasks = [
+            (seed, start, min(batch_size, first + count - start))
+            for start in range(first, first + count, batch_size)
+        ]
+
+        inserted = 0
+        started = perf_counter()
+        for books in self.generate_batches(tasks, workers):
+            with transaction.atomic():
+                Book.objects.bulk_create(
+                    [
+                        Book(
+                            title=title,
+                            author=author,
+                            publication_date=publication_date,
+                            isbn=isbn,
+                            summary=summary,
+                        )
+                        for title, author, publication_date, isbn, summary in books
+                    ],
+                    # ISBNs added by hand may collide with the synthetic ones
+                    ignore_conflicts=True,
+                )
+
+            inserted += len(books)
+            if self.verbosity >= 2:
+                rate = inserted / (perf_counter() - started)
+                self.stdout.write(f"{inserted}/{count} books ({rate:,.0f} rows/s)")
+
+    def generate_batches(self, tasks, workers):
+        """
+        Yields the generated batches in order. SQLite has a single writer, so
+        the workers only generate the books, and this process inserts them.
+        """
+        if workers == 1:
+            yield from map(generate_batch, tasks)
+            return
+
+        # Spawned workers do not inherit the database connection
+        with ProcessPoolExecutor(workers, mp_context=get_context("spawn")) as executor:
+            pending = deque()
+            for task in tasks:
+                pending.append(executor.submit(generate_batch, task))
+                # A few batches ahead at most, so memory does not grow with --count
+                if len(pending) > 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+
+    @contextmanager
+    def bulk_load(self):
+        """
+        Relaxes the SQLite durability pragmas, and drops the full-text search
+        triggers, rebuilding the index once at the end instead of per row.
+        """
+        if connection.vendor != "sqlite":
+            yield
+            invalidate_book()
+            return
+
+        has_search_index = BookSearchIndex.is_available()
+        # Pragmas cannot be changed inside a transaction, e.g. in tests
+        load_pragmas = {} if connection.in_atomic_block else LOAD_PRAGMAS
+        with connection.cursor() as cursor:
+            pragmas = {}
+            for pragma, value in load_pragmas.items():
+                cursor.execute(f"PRAGMA {pragma}")
+                pragmas[pragma] = cursor.fetchone()[0]
+                cursor.execute(f"PRAGMA {pragma} = {value}")
+            if has_search_index:
+                for trigger in SEARCH_TRIGGERS:
+                    cursor.execute(
+                        f"DROP TRIGGER IF EXISTS {search_index.FTS_TABLE}_{trigger}"
+                    )
+
+        try:
+            yield
+        finally:
+            with connection.cursor() as cursor:
+                if has_search_index:
+                    table = search_index.FTS_TABLE
+                    cursor.execute(
+                        f"INSERT INTO {table}({table}) VALUES ('rebuild')"
+                    )
+                    for sql in search_index.TRIGGERS_SQL:
+                        cursor.execute(sql)
+                for pragma, value in pragmas.items():
+                    cursor.execute(f"PRAGMA {pragma} = {value}")
+            # Writes with raw SQL and bulk_create() send no signals
+            invalidate_book()
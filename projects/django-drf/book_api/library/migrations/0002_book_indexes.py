@@ -0,0 +1,34 @@
+# Generated by Django 5.2 on 2026-10-18 19:07
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='book',
+            options={'ordering': ('pk',)},
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['title', 'id'], name='book_title_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['author', 'id'], name='book_author_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(django.db.models.functions.text.Lower('author'), name='book_author_lower_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='book',
+            index=models.Index(fields=['publication_date', 'id'], name='book_publication_date_id_idx'),
+        ),
+    ]
@@ -0,0 +1,101 @@
+from django.db import migrations, models
+
+FTS_TABLE = "library_book_fts"
+
+CREATE_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+        title, author, summary,
+        content='library_book', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    # Matches in the title rank above matches in the author and the summary
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 5.0, 1.0)')",
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')",
+)
+
+TRIGGERS_SQL = (
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON library_book BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, author, summary)
+        VALUES (new.id, new.title, new.author, new.summary);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON library_book BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, summary)
+        VALUES ('delete', old.id, old.title, old.author, old.summary);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+    AFTER UPDATE OF title, author, summary ON library_book BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, summary)
+        VALUES ('delete', old.id, old.title, old.author, old.summary);
+        INSERT INTO {FTS_TABLE}(rowid, title, author, summary)
+        VALUES (new.id, new.title, new.author, new.summary);
+    END
+    """,
+)
+
+DROP_SQL = (
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_delete",
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_update",
+    f"DROP TABLE IF EXISTS {FTS_TABLE}",
+)
+
+
+def supports_fts5(connection):
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT sqlite_compileoption_used('ENABLE_FTS5')")
+        return bool(cursor.fetchone()[0])
+
+
+def create_search_index(apps, schema_editor):
+    # Other engines keep using SearchFilter, see BookFullTextSearchFilter
+    if supports_fts5(schema_editor.connection):
+        for sql in (*CREATE_SQL, *TRIGGERS_SQL):
+            schema_editor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "sqlite":
+        for sql in DROP_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0002_book_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BookSearchIndex",
+            fields=[
+                (
+                    "book",
+                    models.OneToOneField(
+                        db_column="rowid",
+                        on_delete=models.deletion.DO_NOTHING,
+                        primary_key=True,
+                        related_name="search_index",
+                        serialize=False,
+                        to="library.book",
+                    ),
+                ),
+                ("match", models.TextField(db_column="library_book_fts")),
+                ("rank", models.FloatField()),
+            ],
+            options={
+                "db_table": "library_book_fts",
+                "managed": False,
+            },
+        ),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
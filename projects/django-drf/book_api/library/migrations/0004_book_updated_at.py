@@ -0,0 +1,38 @@
+from importlib import import_module
+
+import django.utils.timezone
+from django.db import migrations, models
+
+search_index = import_module("library.migrations.0003_book_search_index")
+
+
+def create_search_triggers(apps, schema_editor):
+    # Adding a column with a default rebuilds the table on SQLite, which drops
+    # the triggers keeping the full-text search index in sync
+    connection = schema_editor.connection
+    if connection.vendor != "sqlite":
+        return
+    if search_index.FTS_TABLE in connection.introspection.table_names():
+        for sql in search_index.TRIGGERS_SQL:
+            schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("library", "0003_book_search_index"),
+    ]
+
+    operations = [
+        # Removing the column rebuilds the table too, so unapplying recreates them
+        migrations.RunPython(migrations.RunPython.noop, create_search_triggers),
+        migrations.AddField(
+            model_name="book",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, db_index=True, default=django.utils.timezone.now
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(create_search_triggers, migrations.RunPython.noop),
+    ]
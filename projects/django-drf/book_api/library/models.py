@@ -1,4 +1,5 @@
-from django.db import models
+from django.db import connections, models
+from django.db.models.functions import Lower
 
 
 class Book(models.Model):
@@ -7,9 +8,61 @@ class Book(models.Model):
     publication_date = models.DateField(null=True, blank=True)
     isbn = models.CharField(max_length=13, unique=True, null=True, blank=True)
     summary = models.TextField(blank=True)
+    # Validator of the conditional GET and If-Match headers, see conditional.py
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     class Meta:
         ordering = ("pk",)
+        indexes = (
+            # Ordering and keyset pagination, with the pk as tiebreaker
+            models.Index(fields=("title", "id"), name="book_title_id_idx"),
+            models.Index(fields=("author", "id"), name="book_author_id_idx"),
+            # Case-insensitive exact author search (?search==author)
+            models.Index(Lower("author"), name="book_author_lower_idx"),
+            # publication_year and publication_date range filters
+            models.Index(
+                fields=("publication_date", "id"), name="book_publication_date_id_idx"
+            ),
+        )
 
     def __str__(self):
         return f"{self.title} by {self.author}"
+
+
+class BookSearchIndex(models.Model):
+    """
+    SQLite FTS5 index over the title, author and summary of each Book, created
+    by migration 0003 and kept in sync by triggers on `library_book`. Filter
+    with `Book.objects.filter(search_index__match=...)` and order by
+    `search_index__rank` (BM25, title weighted above author and summary).
+    """
+
+    book = models.OneToOneField(
+        Book,
+        primary_key=True,
+        db_column="rowid",
+        on_delete=models.DO_NOTHING,
+        related_name="search_index",
+    )
+    # FTS5 hidden columns: the one named after the table takes MATCH queries
+    match = models.TextField(db_column="library_book_fts")
+    rank = models.FloatField()
+
+    # Databases holding the index, by connection alias and name
+    available_databases = {}
+
+    class Meta:
+        managed = False
+        db_table = "library_book_fts"
+
+    @classmethod
+    def is_available(cls, using="default"):
+        connection = connections[using]
+        if connection.vendor != "sqlite":
+            return False
+
+        key = (using, str(connection.settings_dict["NAME"]))
+        if key not in cls.available_databases:
+            tables = connection.introspection.table_names()
+            cls.available_databases[key] = cls._meta.db_table in tables
+        return cls.available_databases[key]
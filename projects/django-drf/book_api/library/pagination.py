@@ -0,0 +1,367 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.filters import OrderingFilter
+from rest_framework.pagination import (
+    BasePagination,
+    CursorPagination,
+    LimitOffsetPagination,
+    PageNumberPagination,
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from library.filters import BookFullTextSearchFilter
+
+# ================================================================
+#                         COUNT OPTION
+# ================================================================
+
+FALSE_VALUES = ("0", "false", "no", "off")
+
+
+def is_count_requested(request, count_query_param):
+    """Returns False when the request opts out of the total count (?count=false)."""
+    value = request.query_params.get(count_query_param, "")
+    return value.lower() not in FALSE_VALUES
+
+
+# ================================================================
+#                          PAGINATION
+# ================================================================
+
+
+class BookListPNPagination(PageNumberPagination):
+    page_size = 3
+    page_query_param = "page"
+    page_size_query_param = "size"
+    max_page_size = 5
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.has_count = is_count_requested(request, self.count_query_param)
+        if self.has_count:
+            return super().paginate_queryset(queryset, request, view)
+
+        # Without COUNT(*), one extra row tells whether a next page exists
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        page_number = request.query_params.get(self.page_query_param) or 1
+        try:
+            self.page_number = int(page_number)
+            if self.page_number < 1:
+                raise ValueError
+        except ValueError:
+            raise NotFound(
+                self.invalid_page_message.format(
+                    page_number=page_number, message="That page number is not valid"
+                )
+            )
+
+        offset = (self.page_number - 1) * page_size
+        books = list(queryset[offset : offset + page_size + 1])
+        if not books and self.page_number > 1:
+            # As the counted pages, which Paginator.validate_number() checks
+            raise NotFound(self.invalid_page_message)
+        self.has_next = len(books) > page_size
+        return books[:page_size]
+
+    def get_paginated_response(self, data):
+        if self.has_count:
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_next_link(self):
+        if self.has_count:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        if self.has_count:
+            return super().get_previous_link()
+        if self.page_number <= 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+
+class BookListLOPagination(LimitOffsetPagination):
+    default_limit = 3
+    limit_query_param = "limit"
+    offset_query_param = "offset"
+    max_limit = 5
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if is_count_requested(request, self.count_query_param):
+            return super().paginate_queryset(queryset, request, view)
+
+        # Without COUNT(*), one extra row tells whether a next page exists
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+
+        self.count = None
+        self.offset = self.get_offset(request)
+        books = list(queryset[self.offset : self.offset + self.limit + 1])
+        self.has_next = len(books) > self.limit
+        return books[: self.limit]
+
+    def get_paginated_response(self, data):
+        if self.count is not None:
+            return super().get_paginated_response(data)
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "previous": self.get_previous_link(),
+                "results": data,
+            }
+        )
+
+    def get_next_link(self):
+        if self.count is None and not self.has_next:
+            return None
+        if self.count is None:
+            url = self.request.build_absolute_uri()
+            url = replace_query_param(url, self.limit_query_param, self.limit)
+            return replace_query_param(
+                url, self.offset_query_param, self.offset + self.limit
+            )
+        return super().get_next_link()
+
+
+class BookListKeysetPagination(CursorPagination):
+    """
+    Keyset pagination: each page continues after the last row of the previous
+    one with a `WHERE (ordering columns, pk) > (last values)` condition, so
+    deep pages cost the same as the first one and no COUNT(*) is run.
+
+    The ordering comes from the view's OrderingFilter (`?ordering=`), and the
+    primary key is always appended as a tiebreaker so that rows sharing the
+    same title or author are neither skipped nor repeated. The `(title, id)`
+    and `(author, id)` indexes serve these orderings in both directions.
+    """
+
+    page_size = 3
+    page_size_query_param = "size"
+    max_page_size = 5
+    ordering = ("pk",)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+        self.pk_name = queryset.model._meta.pk.attname
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = self.cursor is not None and self.cursor["reverse"]
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(invert_ordering(field) for field in ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(keyset_condition(ordering, self.cursor["values"]))
+
+        books = list(queryset[: self.page_size + 1])
+        has_more = len(books) > self.page_size
+        self.page = books[: self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.cursor is not None
+
+        if self.template is not None and (self.has_next or self.has_previous):
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering = tuple(super().get_ordering(request, queryset, view))
+        if not {"pk", "-pk", "id", "-id"} & set(ordering):
+            # Same direction as the last column, so one index covers the order
+            ordering += ("-pk",) if ordering[-1].startswith("-") else ("pk",)
+        return ordering
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # An empty reversed page: continue from the previous cursor
+            return self.encode_cursor({**self.cursor, "reverse": False})
+        return self.encode_cursor(
+            {"values": self.get_values(self.page[-1]), "reverse": False}
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return self.encode_cursor({**self.cursor, "reverse": True})
+        return self.encode_cursor(
+            {"values": self.get_values(self.page[0]), "reverse": True}
+        )
+
+    def get_values(self, book):
+        # Books may also be values_list(named=True) rows, which have no pk
+        names = (field.lstrip("-") for field in self.ordering)
+        return [getattr(book, self.pk_name if name == "pk" else name) for name in names]
+
+    def encode_cursor(self, cursor):
+        # The ordering is embedded so that a cursor is not reused with another one
+        payload = json.dumps(
+            {"o": self.ordering, "v": cursor["values"], "r": int(cursor["reverse"])},
+            separators=(",", ":"),
+        )
+        encoded = urlsafe_b64encode(payload.encode()).decode("ascii").rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            padding = "=" * (-len(encoded) % 4)
+            payload = json.loads(urlsafe_b64decode(encoded + padding))
+            values, reverse = payload["v"], bool(payload["r"])
+            valid = tuple(payload["o"]) == self.ordering and len(values) == len(
+                self.ordering
+            )
+            if valid:
+                values = [
+                    self.to_python(field, value)
+                    for field, value in zip(self.ordering, values)
+                ]
+        except (BinasciiError, ValueError, TypeError, KeyError, DjangoValidationError):
+            valid = False
+
+        if not valid:
+            raise NotFound(self.invalid_cursor_message)
+        return {"values": values, "reverse": reverse}
+
+    def to_python(self, field, value):
+        """Coerces a cursor value to the type of its model field."""
+        if value is None or isinstance(value, (bool, dict, list)):
+            raise TypeError(f"Invalid cursor value: {value!r}")
+        name = field.lstrip("-")
+        model_field = (
+            self.model._meta.pk if name == "pk" else self.model._meta.get_field(name)
+        )
+        return model_field.to_python(value)
+
+
+def invert_ordering(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def keyset_condition(ordering, values):
+    """
+    Builds the condition selecting the rows that come after `values` in
+    `ordering`, i.e. the row-value comparison `(a, b, pk) > (x, y, z)` with
+    the comparison direction of each column.
+    """
+    first_field = ordering[0]
+    operator = "lt" if first_field.startswith("-") else "gt"
+    # Redundant bound on the leading column, so an index range scan can be used
+    condition = Q(**{f"{first_field.lstrip('-')}__{operator}e": values[0]})
+
+    after = Q()
+    equal = Q()
+    for field, value in zip(ordering, values):
+        name = field.lstrip("-")
+        operator = "lt" if field.startswith("-") else "gt"
+        after |= equal & Q(**{f"{name}__{operator}": value})
+        equal &= Q(**{name: value})
+
+    return condition & after
+
+
+class BookListPagination(BasePagination):
+    """
+    Chooses the pagination style per request with `?pagination=page|offset|cursor`.
+    Page number pagination is the default, and a `cursor` parameter implies
+    the cursor style. Page and offset styles skip the COUNT(*) with `?count=false`.
+
+    The cursor style is rejected for `?q=` results in relevance order, i.e.
+    without `?ordering=`, since keyset pages can only follow column values.
+    """
+
+    pagination_query_param = "pagination"
+    default_style = "page"
+    pagination_styles = {
+        "page": BookListPNPagination,
+        "offset": BookListLOPagination,
+        "cursor": BookListKeysetPagination,
+    }
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.paginator = self.get_paginator(request)
+        return self.paginator.paginate_queryset(queryset, request, view)
+
+    def get_paginator(self, request):
+        style = request.query_params.get(self.pagination_query_param)
+        if style is None:
+            cursor_query_param = BookListKeysetPagination.cursor_query_param
+            has_cursor = cursor_query_param in request.query_params
+            style = "cursor" if has_cursor else self.default_style
+
+        if style not in self.pagination_styles:
+            raise ValidationError(
+                {
+                    self.pagination_query_param: [
+                        f"Choose one of: {', '.join(self.pagination_styles)}."
+                    ]
+                }
+            )
+
+        params = request.query_params
+        ranked = params.get(BookFullTextSearchFilter.search_param) and not params.get(
+            OrderingFilter.ordering_param
+        )
+        if style == "cursor" and ranked:
+            raise ValidationError(
+                {
+                    self.pagination_query_param: [
+                        "Relevance ordered results cannot be paginated with a "
+                        "cursor: add an ordering or choose page or offset."
+                    ]
+                }
+            )
+        return self.pagination_styles[style]()
+
+    def get_paginated_response(self, data):
+        return self.paginator.get_paginated_response(data)
+
+    @property
+    def display_page_controls(self):
+        return getattr(self.paginator, "display_page_controls", False)
+
+    def to_html(self):
+        return self.paginator.to_html()
@@ -0,0 +1,29 @@
+import json
+
+from django.conf import settings
+from rest_framework.parsers import BaseParser
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline-delimited JSON into a generator of items, so that bulk
+    requests are decoded one line at a time as their batches are written.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        return self.parse_lines(stream or (), encoding)
+
+    def parse_lines(self, stream, encoding):
+        for line in stream:
+            line = line.decode(encoding).strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                # Reported as an invalid item instead of aborting the stream
+                yield line
@@ -0,0 +1,37 @@
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer
+
+
+class NDJSONRenderer(BaseRenderer):
+    """Renders a list as one JSON document per line, anything else as one line."""
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        items = data if isinstance(data, list) else [data]
+        return "".join(
+            f"{json.dumps(item, cls=DjangoJSONEncoder, ensure_ascii=False)}\n"
+            for item in items
+        ).encode(self.charset)
+
+
+class CSVRenderer(BaseRenderer):
+    """Renders a list of dicts as CSV rows, under a header row of their keys."""
+
+    media_type = "text/csv"
+    format = "csv"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        output = io.StringIO()
+        writer = csv.DictWriter(output, fieldnames=rows[0] if rows else ())
+        writer.writeheader()
+        writer.writerows(rows)
+        return output.getvalue().encode(self.charset)
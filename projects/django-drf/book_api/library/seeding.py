@@ -0,0 +1,142 @@
+"""
+Synthetic book data for capacity tests. Only the standard library is used, so
+that the batches can be generated in worker processes without setting up
+Django.
+"""
+
+import random
+from datetime import date
+
+# fmt: off
+FIRST_NAMES = (
+    "Ada", "Alan", "Alice", "Amara", "Ana", "Arthur", "Bram", "Carmen", "Chen",
+    "Clara", "Daniel", "Diego", "Edith", "Elena", "Emily", "Ernest", "Fatima",
+    "Felix", "George", "Grace", "Haruki", "Helen", "Ines", "Isaac", "Ivan",
+    "Jane", "Jorge", "Julia", "Kenji", "Laura", "Leo", "Lucia", "Mario",
+    "Mary", "Maya", "Miguel", "Nadia", "Nora", "Octavia", "Omar", "Pablo",
+    "Priya", "Rosa", "Samuel", "Sara", "Sofia", "Thomas", "Toni", "Ursula",
+    "Victor", "Virginia", "Wei", "Yuki", "Zadie",
+)
+
+LAST_NAMES = (
+    "Abe", "Achebe", "Adams", "Allende", "Asimov", "Atwood", "Austen", "Baldwin",
+    "Borges", "Bronte", "Butler", "Calvino", "Carver", "Castro", "Christie",
+    "Cortazar", "Dickens", "Eco", "Eliot", "Ferrante", "Flores", "Garcia",
+    "Gibson", "Hemingway", "Hesse", "Ishiguro", "Kafka", "Kim", "Lee", "Le Guin",
+    "Lessing", "Lispector", "Mann", "Marquez", "Morrison", "Murakami", "Nabokov",
+    "Okafor", "Orwell", "Pamuk", "Perez", "Poe", "Proust", "Rulfo", "Saramago",
+    "Sebald", "Shelley", "Smith", "Stoker", "Tan", "Tolstoy", "Twain", "Vargas",
+    "Walker", "Wang", "Woolf", "Yoshimoto", "Zola",
+)
+
+ADJECTIVES = (
+    "Ancient", "Bitter", "Broken", "Burning", "Crimson", "Dark", "Distant",
+    "Endless", "Fallen", "Forgotten", "Golden", "Hidden", "Hollow", "Last",
+    "Lost", "Midnight", "Quiet", "Restless", "Secret", "Silent", "Silver",
+    "Strange", "Sunken", "Wandering", "Wild", "Winter",
+)
+
+NOUNS = (
+    "Archive", "Bridge", "City", "Clock", "Crown", "Daughter", "Dream", "Empire",
+    "Garden", "Harbor", "House", "Island", "Kingdom", "Letter", "Library", "Map",
+    "Mirror", "Mountain", "Night", "Ocean", "River", "Road", "Shadow", "Storm",
+    "Stranger", "Tide", "Tower", "Voyage", "Witness", "Year",
+)
+# fmt: on
+
+TITLE_TEMPLATES = (
+    "The {adjective} {noun}",
+    "The {noun} of the {adjective} {other}",
+    "{adjective} {noun}s",
+    "A {noun} in the {other}",
+    "The {noun}",
+)
+
+SUMMARY_TEMPLATES = (
+    "A {adjective} tale about a {noun} and the {other} that changed it.",
+    "An epic journey from the {noun} to the {adjective} {other}.",
+    "A story of love and loss in a {adjective} {noun}.",
+    "Essays on the {noun}, the {other} and everything in between.",
+)
+
+# Share of the books without a publication date, an ISBN, or a summary
+MISSING_DATE_RATE = 0.05
+MISSING_ISBN_RATE = 0.1
+MISSING_SUMMARY_RATE = 0.3
+
+# Average age of the books, in years: recent books are the most common
+MEAN_AGE = 25
+OLDEST_YEAR = 1450
+
+# Multiplying by a number coprime with 10 ** 9 permutes the 9-digit ISBN
+# bodies, so sequence numbers map to distinct ISBNs that look random
+ISBN_MULTIPLIER = 387_420_489
+ISBN_BODIES = 10**9
+
+
+def get_isbn(number):
+    """Returns the valid ISBN-13 of a sequence number, unique below 10 ** 9."""
+    digits = f"978{number * ISBN_MULTIPLIER % ISBN_BODIES:09d}"
+    total = sum(int(digit) * (3 if i % 2 else 1) for i, digit in enumerate(digits))
+    return f"{digits}{-total % 10}"
+
+
+def get_author(rng):
+    # Skewed towards the first names of each list, so a few authors are prolific
+    first = FIRST_NAMES[int(len(FIRST_NAMES) * rng.random() ** 2)]
+    last = LAST_NAMES[int(len(LAST_NAMES) * rng.random() ** 3)]
+    return f"{first} {last}"
+
+
+def get_title(rng):
+    words = {
+        "adjective": rng.choice(ADJECTIVES),
+        "noun": rng.choice(NOUNS),
+        "other": rng.choice(NOUNS),
+    }
+    title = rng.choice(TITLE_TEMPLATES).format(**words)
+    if rng.random() < 0.05:
+        title = f"{title}, Book {rng.randint(2, 7)}"
+    return title
+
+
+def get_publication_date(rng, today):
+    if rng.random() < MISSING_DATE_RATE:
+        return None
+    year = max(today.year - int(rng.expovariate(1 / MEAN_AGE)), OLDEST_YEAR)
+    return min(date(year, rng.randint(1, 12), rng.randint(1, 28)), today)
+
+
+def get_summary(rng):
+    if rng.random() < MISSING_SUMMARY_RATE:
+        return ""
+    return rng.choice(SUMMARY_TEMPLATES).format(
+        adjective=rng.choice(ADJECTIVES).lower(),
+        noun=rng.choice(NOUNS).lower(),
+        other=rng.choice(NOUNS).lower(),
+    )
+
+
+def generate_books(seed, start, size):
+    """
+    Returns `size` books as (title, author, publication_date, isbn, summary)
+    tuples, numbered from `start`. The same arguments return the same books,
+    whichever process generates them.
+    """
+    rng = random.Random(f"{seed}:{start}")
+    today = date.today()
+    return [
+        (
+            get_title(rng),
+            get_author(rng),
+            get_publication_date(rng, today),
+            None if rng.random() < MISSING_ISBN_RATE else get_isbn(number),
+            get_summary(rng),
+        )
+        for number in range(start, start + size)
+    ]
+
+
+def generate_batch(task):
+    """Same as `generate_books()`, for executors: `task` is its arguments."""
+    return generate_books(*task)
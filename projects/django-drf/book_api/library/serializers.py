@@ -1,9 +1,116 @@
+from datetime import date
+
 from rest_framework import serializers
+from rest_framework.settings import ISO_8601, api_settings
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 
+from library.instrumentation import TimedListSerializer, TimedSerializerMixin, timer
 from library.models import Book
 
 
-class BookSerializer(serializers.ModelSerializer):
+class BookSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Book
         fields = ("id", "title", "author", "publication_date", "isbn", "summary")
+        list_serializer_class = TimedListSerializer
+
+
+def get_converter(field):
+    """
+    Returns a function equivalent to `field.to_representation()` for the
+    values read from the database, or None when it returns them unchanged.
+    """
+    if isinstance(field, (serializers.CharField, serializers.IntegerField)):
+        # The database already returns str and int values
+        return None
+    if isinstance(field, serializers.DateField) and not isinstance(
+        field, serializers.DateTimeField
+    ):
+        output_format = getattr(field, "format", api_settings.DATE_FORMAT)
+        if output_format is None:
+            return None
+        if output_format.lower() == ISO_8601:
+            return date.isoformat
+        return lambda value: value.strftime(output_format)
+    return field.to_representation
+
+
+class BookValuesSerializer:
+    """
+    Read-only fast path of BookSerializer, for lists: it builds the same
+    output from the `values_list(*BookValuesSerializer.fields)` rows, with
+    converters precompiled from the BookSerializer fields, instead of from
+    model instances through every field.
+    """
+
+    fields = BookSerializer.Meta.fields
+    # (index, name, converter) of the fields whose values need converting
+    converters = None
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    @classmethod
+    def get_converters(cls):
+        if cls.converters is None:
+            fields = BookSerializer().fields
+            cls.converters = [
+                (index, name, converter)
+                for index, name in enumerate(cls.fields)
+                if (converter := get_converter(fields[name])) is not None
+            ]
+        return cls.converters
+
+    @property
+    def data(self):
+        converters = self.get_converters()
+        names = self.fields
+        data = []
+        with timer("serializer"):
+            for row in self.rows:
+                # zip() drops the extra columns following the fields
+                book = dict(zip(names, row))
+                for index, name, converter in converters:
+                    # Like Serializer.to_representation(), None is not converted
+                    if row[index] is not None:
+                        book[name] = converter(row[index])
+                data.append(book)
+        return data
+
+
+class BookBulkListSerializer(serializers.ListSerializer):
+    """Validates each item on its own, so invalid items do not reject the others."""
+
+    def validate_items(self):
+        """Returns a (validated data, None) or (None, errors) pair per item."""
+        results = []
+        with timer("serializer"):
+            for item in self.initial_data:
+                try:
+                    results.append((self.child.run_validation(item), None))
+                except serializers.ValidationError as error:
+                    results.append((None, error.detail))
+        return results
+
+
+class BookBulkSerializer(BookSerializer):
+    class Meta(BookSerializer.Meta):
+        list_serializer_class = BookBulkListSerializer
+        # Conflicting ISBNs are upserts, checked once per batch, not per item
+        extra_kwargs = {"isbn": {"validators": []}}
+
+
+class TokenClaimsObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Adds the claims read by TokenUser to the tokens, so that
+    TokenUserJWTAuthentication knows the user without querying it. Refreshed
+    access tokens copy them from the refresh token.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token["username"] = user.get_username()
+        token["is_staff"] = user.is_staff
+        token["is_superuser"] = user.is_superuser
+        return token
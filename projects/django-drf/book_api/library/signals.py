@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from library.caching import invalidate_book
+from library.instrumentation import record_query
+from library.models import Book
+
+
+@receiver(post_save, sender=Book, dispatch_uid="invalidate_saved_book")
+@receiver(post_delete, sender=Book, dispatch_uid="invalidate_deleted_book")
+def invalidate_cached_book(sender, instance, **kwargs):
+    pk = instance.pk
+    invalidate_book(pk)
+    # Again once committed, in case a concurrent request cached the old rows
+    transaction.on_commit(lambda: invalidate_book(pk))
+
+
+@receiver(connection_created, dispatch_uid="record_queries")
+def install_query_recorder(sender, connection, **kwargs):
+    # First, so that the execute_wrapper() blocks in progress pop their own
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
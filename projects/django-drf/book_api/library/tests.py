@@ -1,7 +1,80 @@
+import base64
+import csv
+import gzip
+import io
+import json
+import os
+import runpy
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from datetime import date, timedelta
+from unittest import addModuleCleanup, mock
+from urllib.parse import parse_qs, urlparse
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib.auth.models import User
-from django.test import TestCase, tag
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection, connections
+from django.test import TestCase, override_settings, skipUnlessDBFeature, tag
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
-from rest_framework import status
+from django.utils import timezone
+from rest_framework import generics, status
+from rest_framework.renderers import JSONRenderer
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
+
+from library.authentication import get_verified_token
+from library.filters import BookFilter
+from library.instrumentation import Histogram, clear_views_metrics
+from library.models import Book, BookSearchIndex
+from library.pagination import keyset_condition
+from library.serializers import BookSerializer, BookValuesSerializer
+from library.throttling import SlidingWindowThrottle, get_rate_limit_store
+from library.views import BookExportAPIView, BookListCreateAPIView
+
+
+def setUpModule():
+    # The rate limit counters of the tests go to a temporary file, not to the
+    # store of the development server
+    directory = tempfile.TemporaryDirectory()
+    addModuleCleanup(directory.cleanup)
+    location = f"{directory.name}/ratelimit.sqlite3"
+    rate_limit = override_settings(
+        RATE_LIMIT={**settings.RATE_LIMIT, "LOCATION": location}
+    )
+    rate_limit.enable()
+    addModuleCleanup(rate_limit.disable)
+
+
+def clear_caches():
+    # Rate limit counters, verified tokens and cached responses would leak
+    # between tests
+    for cache in caches.all():
+        cache.clear()
+    get_rate_limit_store().clear()
+    get_verified_token.cache_clear()
+    clear_views_metrics()
+
+
+class QueryCountAssertionsMixin:
+    @contextmanager
+    def assertMaxQueries(self, max_queries, using="default"):
+        """Fails if the block runs more than `max_queries` queries."""
+        with CaptureQueriesContext(connections[using]) as queries:
+            yield queries
+        if len(queries) > max_queries:
+            statements = "\n".join(
+                f"{number}. {query['sql']}"
+                for number, query in enumerate(queries.captured_queries, start=1)
+            )
+            self.fail(
+                f"{len(queries)} queries executed, {max_queries} at most expected:"
+                f"\n{statements}"
+            )
 
 
 class AuthenticationTest(TestCase):
@@ -11,6 +84,9 @@ class AuthenticationTest(TestCase):
         cls.test_user = User.objects.get(username="test")
         cls.endpoint_list_create = reverse("library:books-list-create")
 
+    def setUp(self):
+        clear_caches()
+
     @tag("auth")
     def test_authenticated_user_get_request(self):
         self.client.login(username="test", password="password")
@@ -60,3 +136,1352 @@ class AuthenticationTest(TestCase):
         # self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN) # Without simple-jwt
         # With simple-jwt
         self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class PaginationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        authors = ("Ursula K. Le Guin", "Douglas Adams", "Jane Austen")
+        Book.objects.bulk_create(
+            Book(title=f"Book {number % 4}", author=authors[number % 3])
+            for number in range(11)
+        )
+        cls.endpoint_list_create = reverse("library:books-list-create")
+
+    def setUp(self):
+        clear_caches()
+
+    def collect_pages(self, url, link="next"):
+        pages = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            pages.append([book["id"] for book in response.data["results"]])
+            url = response.data[link]
+        return pages
+
+    @tag("pagination")
+    def test_cursor_pagination_walks_every_book_once(self):
+        for ordering in ("author", "-author", "title", "-title"):
+            with self.subTest(ordering=ordering):
+                url = f"{self.endpoint_list_create}?pagination=cursor&ordering={ordering}"
+                pages = self.collect_pages(url)
+                ids = [pk for page in pages for pk in page]
+                tiebreaker = "-pk" if ordering.startswith("-") else "pk"
+                expected = list(
+                    Book.objects.order_by(ordering, tiebreaker).values_list(
+                        "pk", flat=True
+                    )
+                )
+
+                self.assertEqual(ids, expected)
+                self.assertEqual([len(page) for page in pages], [3, 3, 3, 2])
+
+    @tag("pagination")
+    def test_cursor_pagination_previous_links(self):
+        url = f"{self.endpoint_list_create}?pagination=cursor&ordering=author"
+        forward = self.collect_pages(url)
+
+        response = self.client.get(url)
+        for _ in range(len(forward) - 1):
+            response = self.client.get(response.data["next"])
+        backward = self.collect_pages(response.data["previous"], link="previous")
+
+        self.assertEqual(backward, forward[-2::-1])
+
+    @tag("pagination")
+    def test_cursor_pagination_skips_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{self.endpoint_list_create}?pagination=cursor")
+
+        self.assertNotIn("count", response.data)
+        # Neither the paginator nor the list ETag counts the books
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+
+    @tag("pagination")
+    def test_invalid_cursor(self):
+        url = f"{self.endpoint_list_create}?pagination=cursor&ordering=author"
+        cursor = parse_qs(urlparse(self.client.get(url).data["next"]).query)["cursor"][0]
+        # Well-formed cursors whose values do not have the type of the pk
+        wrong_types = (
+            json.dumps({"o": ["pk"], "v": values, "r": 0}).encode()
+            for values in ([{}], ["abc"])
+        )
+
+        for query in (
+            f"cursor={cursor}&ordering=title",
+            "cursor=not-a-cursor",
+            *(
+                f"cursor={base64.urlsafe_b64encode(payload).decode()}"
+                for payload in wrong_types
+            ),
+        ):
+            with self.subTest(query=query):
+                response = self.client.get(f"{self.endpoint_list_create}?{query}")
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    @tag("pagination")
+    def test_page_number_pagination_without_count(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{self.endpoint_list_create}?count=false&page=4")
+
+        self.assertNotIn("count", response.data)
+        self.assertEqual(len(response.data["results"]), 2)
+        self.assertIsNone(response.data["next"])
+        self.assertIsNotNone(response.data["previous"])
+        # Neither the paginator nor the list ETag counts the books
+        self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+
+        pages = self.collect_pages(f"{self.endpoint_list_create}?count=false")
+        self.assertEqual(sum(map(len, pages)), 11)
+
+    @tag("pagination")
+    def test_page_out_of_range_without_count(self):
+        counted = self.client.get(f"{self.endpoint_list_create}?page=999")
+        response = self.client.get(f"{self.endpoint_list_create}?count=false&page=999")
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(counted.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.json(), counted.json())
+
+    @tag("pagination")
+    def test_offset_pagination_without_count(self):
+        pages = self.collect_pages(
+            f"{self.endpoint_list_create}?pagination=offset&count=false&limit=4"
+        )
+
+        self.assertEqual([len(page) for page in pages], [4, 4, 3])
+
+    @tag("pagination")
+    def test_default_page_number_pagination_counts(self):
+        response = self.client.get(self.endpoint_list_create)
+
+        self.assertEqual(response.data["count"], 11)
+
+    @tag("pagination")
+    def test_invalid_pagination_style(self):
+        response = self.client.get(f"{self.endpoint_list_create}?pagination=seek")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@skipUnlessDBFeature("supports_explaining_query_execution")
+class IndexUsageTest(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def assertUsesIndex(self, queryset, index_name):
+        if connection.vendor != "sqlite":
+            self.skipTest("EXPLAIN QUERY PLAN output is specific to SQLite")
+        plan = queryset.explain()
+        self.assertIn(f"USING INDEX {index_name}", plan)
+
+    @tag("indexes")
+    def test_publication_year_filter_uses_date_index(self):
+        queryset = BookFilter({"publication_year": "1979"}, queryset=Book.objects).qs
+
+        self.assertUsesIndex(queryset, "book_publication_date_id_idx")
+        self.assertNotIn("django_date_extract", str(queryset.query))
+
+    @tag("indexes")
+    def test_publication_year_filter_matches_year(self):
+        Book.objects.create(title="In", author="A", publication_date=date(1979, 12, 31))
+        Book.objects.create(title="Out", author="A", publication_date=date(1980, 1, 1))
+        queryset = BookFilter({"publication_year": "1979"}, queryset=Book.objects).qs
+
+        self.assertEqual([book.title for book in queryset], ["In"])
+
+    @tag("indexes")
+    def test_publication_year_filter_rejects_fractions(self):
+        filterset = BookFilter({"publication_year": "1979.5"}, queryset=Book.objects)
+        response = self.client.get(
+            reverse("library:books-list-create"), {"publication_year": "1979.5"}
+        )
+
+        self.assertFalse(filterset.is_valid())
+        self.assertIn("publication_year", filterset.errors)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @tag("indexes")
+    def test_author_exact_search_uses_lower_index(self):
+        queryset = Book.objects.filter(author__lower_exact="Douglas ADAMS")
+
+        self.assertUsesIndex(queryset, "book_author_lower_idx")
+
+    @tag("indexes")
+    def test_keyset_pages_use_ordering_indexes(self):
+        for ordering, index_name in (
+            (("author", "pk"), "book_author_id_idx"),
+            (("-title", "-pk"), "book_title_id_idx"),
+        ):
+            with self.subTest(ordering=ordering):
+                queryset = Book.objects.filter(
+                    keyset_condition(ordering, ["X", 3])
+                ).order_by(*ordering)[:4]
+
+                self.assertUsesIndex(queryset, index_name)
+                self.assertNotIn("TEMP B-TREE", queryset.explain())
+
+
+class FullTextSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.dragon_title = Book.objects.create(
+            title="Dragon Rider", author="Cornelia Funke", summary="A flight north."
+        )
+        cls.dragon_summary = Book.objects.create(
+            title="The Hobbit", author="J. R. R. Tolkien", summary="A dragon and its gold."
+        )
+        cls.accented = Book.objects.create(
+            title="Cien años de soledad", author="Gabriel García Márquez"
+        )
+        cls.endpoint_list_create = reverse("library:books-list-create")
+
+    def setUp(self):
+        clear_caches()
+
+    def search(self, query, **params):
+        response = self.client.get(self.endpoint_list_create, {"q": query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [book["id"] for book in response.data["results"]]
+
+    @tag("search")
+    def test_search_ranks_title_matches_first(self):
+        if not BookSearchIndex.is_available():
+            self.skipTest("SQLite FTS5 is not available")
+
+        self.assertEqual(
+            self.search("dragon"), [self.dragon_title.pk, self.dragon_summary.pk]
+        )
+        self.assertEqual(
+            self.search("dragon", ordering="-title"),
+            [self.dragon_summary.pk, self.dragon_title.pk],
+        )
+
+    @tag("search")
+    def test_search_ignores_case_and_diacritics(self):
+        if not BookSearchIndex.is_available():
+            self.skipTest("SQLite FTS5 is not available")
+
+        self.assertEqual(self.search("GARCIA anos"), [self.accented.pk])
+
+    @tag("search")
+    def test_search_index_follows_writes(self):
+        if not BookSearchIndex.is_available():
+            self.skipTest("SQLite FTS5 is not available")
+
+        self.dragon_summary.summary = "A burglar and treasure."
+        self.dragon_summary.save()
+        Book.objects.filter(pk=self.dragon_title.pk).delete()
+        added = Book.objects.create(title="Temeraire", author="Naomi Novik", summary="Dragon")
+
+        self.assertEqual(self.search("dragon"), [added.pk])
+        self.assertEqual(self.search("burglar"), [self.dragon_summary.pk])
+
+    @tag("search")
+    def test_search_terms_are_not_query_syntax(self):
+        self.assertEqual(self.search('NOT "dragon* OR'), [])
+
+    @tag("search")
+    def test_ranked_search_rejects_cursor_pagination(self):
+        response = self.client.get(
+            self.endpoint_list_create, {"q": "dragon", "pagination": "cursor"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("pagination", response.json())
+        self.assertEqual(
+            self.search("dragon", pagination="cursor", ordering="-title"),
+            [self.dragon_summary.pk, self.dragon_title.pk],
+        )
+
+    @tag("search")
+    def test_search_falls_back_without_index(self):
+        with mock.patch.object(BookSearchIndex, "is_available", return_value=False):
+            ids = self.search("dragon")
+
+        self.assertEqual(ids, [self.dragon_title.pk, self.dragon_summary.pk])
+
+
+class ResponseCacheTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="test", password="password")
+        cls.book = Book.objects.create(title="Emma", author="Jane Austen")
+        cls.endpoint_list_create = reverse("library:books-list-create")
+        cls.endpoint_detail = reverse(
+            "library:books-retrieve-update-delete", kwargs={"pk": cls.book.pk}
+        )
+
+    def setUp(self):
+        clear_caches()
+
+    @tag("cache")
+    def test_list_is_served_from_cache(self):
+        first = self.client.get(f"{self.endpoint_list_create}?author=austen&title=")
+        with self.assertNumQueries(0):
+            second = self.client.get(f"{self.endpoint_list_create}?title=&author=austen")
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.json(), second.json())
+
+    @tag("cache")
+    def test_list_keys_depend_on_query(self):
+        self.client.get(self.endpoint_list_create)
+        response = self.client.get(f"{self.endpoint_list_create}?ordering=-title")
+
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    @tag("cache")
+    def test_detail_is_served_from_cache(self):
+        self.client.get(self.endpoint_detail)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.endpoint_detail)
+
+        self.assertEqual(response["X-Cache"], "HIT")
+        self.assertEqual(response.json()["title"], "Emma")
+
+    @tag("cache")
+    def test_save_invalidates_detail_and_lists(self):
+        self.client.get(self.endpoint_list_create)
+        self.client.get(self.endpoint_detail)
+        other = Book.objects.create(title="Persuasion", author="Jane Austen")
+        self.client.get(reverse("library:books-retrieve-update-delete", args=[other.pk]))
+
+        self.book.title = "Emma (Annotated)"
+        self.book.save()
+
+        detail = self.client.get(self.endpoint_detail)
+        self.assertEqual(detail["X-Cache"], "MISS")
+        self.assertEqual(detail.json()["title"], "Emma (Annotated)")
+        books = self.client.get(self.endpoint_list_create)
+        self.assertEqual(books["X-Cache"], "MISS")
+        self.assertEqual(books.json()["results"][0]["title"], "Emma (Annotated)")
+        # Other books keep their cached detail
+        response = self.client.get(
+            reverse("library:books-retrieve-update-delete", args=[other.pk])
+        )
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    @tag("cache")
+    def test_delete_invalidates_detail(self):
+        self.client.get(self.endpoint_detail)
+        self.client.force_login(self.user)
+
+        self.client.delete(self.endpoint_detail)
+        response = self.client.get(self.endpoint_detail)
+
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ConditionalRequestTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="test", password="password")
+        cls.book = Book.objects.create(title="Emma", author="Jane Austen")
+        cls.endpoint_list_create = reverse("library:books-list-create")
+        cls.endpoint_detail = reverse(
+            "library:books-retrieve-update-delete", kwargs={"pk": cls.book.pk}
+        )
+
+    def setUp(self):
+        clear_caches()
+
+    @tag("conditional")
+    def test_list_not_modified_is_not_serialized(self):
+        etag = self.client.get(self.endpoint_list_create)["ETag"]
+        clear_caches()
+
+        with mock.patch(
+            "library.serializers.BookValuesSerializer.get_converters"
+        ) as get_converters:
+            response = self.client.get(
+                self.endpoint_list_create, HTTP_IF_NONE_MATCH=etag
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        get_converters.assert_not_called()
+
+    @tag("conditional")
+    def test_list_has_no_last_modified(self):
+        response = self.client.get(self.endpoint_list_create)
+
+        self.assertTrue(response.has_header("ETag"))
+        self.assertFalse(response.has_header("Last-Modified"))
+
+    @tag("conditional")
+    def test_list_not_modified_without_count(self):
+        for query in ("?pagination=cursor", "?count=false"):
+            with self.subTest(query=query):
+                url = f"{self.endpoint_list_create}{query}"
+                etag = self.client.get(url)["ETag"]
+                clear_caches()
+
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+                self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+                self.assertEqual(response["ETag"], etag)
+                self.assertEqual(len(queries), 1)
+                self.assertFalse(any("COUNT(" in query["sql"] for query in queries))
+
+    @tag("conditional")
+    def test_list_etag_changes_on_writes_and_deletions(self):
+        other = Book.objects.create(title="Persuasion", author="Jane Austen")
+        etag = self.client.get(self.endpoint_list_create)["ETag"]
+
+        other.delete()
+        response = self.client.get(self.endpoint_list_create, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    @tag("conditional")
+    def test_list_etag_depends_on_query(self):
+        etag = self.client.get(self.endpoint_list_create)["ETag"]
+        response = self.client.get(
+            f"{self.endpoint_list_create}?author=austen", HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @tag("conditional")
+    def test_detail_not_modified_from_cache(self):
+        etag = self.client.get(self.endpoint_detail)["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get(self.endpoint_detail, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+    @tag("conditional")
+    def test_detail_not_modified_without_cache(self):
+        etag = self.client.get(self.endpoint_detail)["ETag"]
+        clear_caches()
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.endpoint_detail, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @tag("conditional")
+    def test_detail_modified(self):
+        etag = self.client.get(self.endpoint_detail)["ETag"]
+        self.book.title = "Emma (Annotated)"
+        self.book.save()
+
+        response = self.client.get(self.endpoint_detail, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["title"], "Emma (Annotated)")
+
+    @tag("conditional")
+    def test_update_with_current_etag(self):
+        etag = self.client.get(self.endpoint_detail)["ETag"]
+        self.client.force_login(self.user)
+
+        response = self.client.patch(
+            self.endpoint_detail,
+            data={"title": "Emma (Annotated)"},
+            content_type="application/json",
+            HTTP_IF_MATCH=etag,
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(
+            response["ETag"], self.client.get(self.endpoint_detail)["ETag"]
+        )
+
+    @tag("conditional")
+    def test_writes_with_stale_etag_fail(self):
+        etag = self.client.get(self.endpoint_detail)["ETag"]
+        Book.objects.filter(pk=self.book.pk).update(title="Emma (Revised)")
+        self.book.refresh_from_db()
+        self.book.save()
+        self.client.force_login(self.user)
+
+        data = {"title": "Emma (Annotated)", "author": "Jane Austen"}
+        for method in (self.client.put, self.client.patch):
+            response = method(
+                self.endpoint_detail,
+                data=data,
+                content_type="application/json",
+                HTTP_IF_MATCH=etag,
+            )
+            self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        response = self.client.delete(self.endpoint_detail, HTTP_IF_MATCH=etag)
+
+        self.assertEqual(response.status_code, status.HTTP_412_PRECONDITION_FAILED)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title, "Emma (Revised)")
+
+
+class BulkWriteTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="test", password="password")
+        cls.book = Book.objects.create(
+            title="Emma", author="Jane Austen", isbn="9780141439587"
+        )
+        cls.endpoint_bulk = reverse("library:books-bulk")
+
+    def setUp(self):
+        clear_caches()
+        self.client.force_login(self.user)
+
+    def bulk(self, method, items, query=""):
+        return getattr(self.client, method)(
+            f"{self.endpoint_bulk}{query}",
+            data=items,
+            content_type="application/json",
+        )
+
+    @tag("bulk")
+    def test_create_upserts_by_isbn(self):
+        items = [
+            {"title": "Persuasion", "author": "Jane Austen", "isbn": "9780141439686"},
+            {
+                "title": "Emma (Annotated)",
+                "author": "Jane Austen",
+                "isbn": "9780141439587",
+            },
+            {"title": "", "author": "Jane Austen"},
+            {"title": "Sense and Sensibility", "author": "Jane Austen"},
+        ]
+        response = self.bulk("post", items, "?batch_size=2")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.json()["results"]
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["created", "updated", "error", "created"],
+        )
+        self.assertEqual(results[1]["id"], self.book.pk)
+        self.assertIn("title", results[2]["errors"])
+        self.assertEqual(
+            response.json()["counts"], {"created": 2, "updated": 1, "error": 1}
+        )
+        self.assertEqual(Book.objects.count(), 3)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title, "Emma (Annotated)")
+
+    @tag("bulk")
+    def test_create_rejects_duplicate_isbns(self):
+        items = [
+            {"title": "Persuasion", "author": "Jane Austen", "isbn": "9780141439686"},
+            {"title": "Persuasion", "author": "Jane Austen", "isbn": "9780141439686"},
+        ]
+        results = self.bulk("post", items).json()["results"]
+
+        self.assertEqual([result["status"] for result in results], ["created", "error"])
+
+    @tag("bulk")
+    def test_create_from_ndjson_in_batches(self):
+        lines = [
+            '{"title": "Persuasion", "author": "Jane Austen"}',
+            "",
+            "{not json",
+            '{"title": "Mansfield Park", "author": "Jane Austen"}',
+            '{"title": "Lady Susan", "author": "Jane Austen"}',
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                f"{self.endpoint_bulk}?batch_size=2",
+                data="\n".join(lines),
+                content_type="application/x-ndjson",
+            )
+
+        results = response.json()["results"]
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["created", "error", "created", "created"],
+        )
+        inserts = [query for query in queries if query["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 2)
+
+    @tag("bulk")
+    def test_update(self):
+        other = Book.objects.create(
+            title="Persuasion", author="Jane Austen", isbn="9780141439686"
+        )
+        items = [
+            {"id": self.book.pk, "title": "Emma (Annotated)"},
+            {"id": other.pk, "isbn": self.book.isbn},
+            {"id": 0, "title": "Missing"},
+            {"title": "No id"},
+        ]
+        results = self.bulk("patch", items).json()["results"]
+
+        self.assertEqual(
+            [result["status"] for result in results],
+            ["updated", "error", "error", "error"],
+        )
+        self.assertIn("isbn", results[1]["errors"])
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title, "Emma (Annotated)")
+        self.assertEqual(self.book.author, "Jane Austen")
+
+    @tag("bulk")
+    def test_delete(self):
+        results = self.bulk("delete", [self.book.pk, {"id": self.book.pk}, "x"]).json()[
+            "results"
+        ]
+
+        self.assertEqual(
+            [result["status"] for result in results], ["deleted", "error", "error"]
+        )
+        self.assertFalse(Book.objects.exists())
+
+    @tag("bulk")
+    def test_bulk_writes_invalidate_caches_and_search(self):
+        endpoint_list_create = reverse("library:books-list-create")
+        self.client.get(endpoint_list_create)
+
+        self.bulk("patch", [{"id": self.book.pk, "title": "Emma Woodhouse"}])
+        response = self.client.get(endpoint_list_create)
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["results"][0]["title"], "Emma Woodhouse")
+        if BookSearchIndex.is_available():
+            response = self.client.get(f"{endpoint_list_create}?q=woodhouse")
+            self.assertEqual(response.json()["count"], 1)
+
+    @tag("bulk")
+    def test_invalid_requests(self):
+        for body in ({"title": "Emma"}, "5", "null", '"abc"'):
+            with self.subTest(body=body):
+                response = self.bulk("post", body)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(
+                    response.json(), {"non_field_errors": ["Expected a list of items."]}
+                )
+        self.assertEqual(
+            self.bulk("post", [], "?batch_size=0").status_code,
+            status.HTTP_400_BAD_REQUEST,
+        )
+        self.client.logout()
+        self.assertEqual(
+            self.bulk("post", []).status_code, status.HTTP_401_UNAUTHORIZED
+        )
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Book.objects.create(
+            title="Emma",
+            author="Jane Austen",
+            publication_date=date(1815, 12, 23),
+            isbn="9780141439587",
+            summary='A "clever, handsome and rich" heroine,\nmatchmaking.',
+        )
+        Book.objects.create(title="Dracula", author="Bram Stoker")
+        cls.endpoint_export = reverse("library:books-export")
+
+    def setUp(self):
+        clear_caches()
+
+    def export(self, query="", **headers):
+        response = self.client.get(f"{self.endpoint_export}{query}", **headers)
+        self.assertTrue(response.streaming)
+        return response, b"".join(response.streaming_content)
+
+    @tag("export")
+    def test_ndjson_export_matches_serializer(self):
+        response, content = self.export()
+
+        self.assertEqual(
+            response["Content-Type"], "application/x-ndjson; charset=utf-8"
+        )
+        rows = [json.loads(line) for line in content.decode().splitlines()]
+        self.assertEqual(rows, BookSerializer(Book.objects.all(), many=True).data)
+
+    @tag("export")
+    def test_csv_export(self):
+        response, content = self.export("?format=csv&author=austen")
+
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(rows[0], list(BookSerializer.Meta.fields))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][3:5], ["1815-12-23", "9780141439587"])
+        self.assertEqual(rows[1][5], Book.objects.get(title="Emma").summary)
+
+    @tag("export")
+    def test_gzip_export(self):
+        response, content = self.export(HTTP_ACCEPT_ENCODING="gzip, deflate")
+        _, plain = self.export()
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(content), plain)
+
+    @tag("export")
+    def test_export_skips_serializer(self):
+        serializer = "library.serializers.BookSerializer.to_representation"
+        with mock.patch.object(BookExportAPIView, "chunk_size", 1), mock.patch(
+            serializer
+        ) as to_representation:
+            _, content = self.export()
+
+        self.assertEqual(len(content.splitlines()), 2)
+        to_representation.assert_not_called()
+
+    @tag("export")
+    def test_invalid_filter(self):
+        response = self.client.get(f"{self.endpoint_export}?publication_year=x")
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PopulateBooksTest(TestCase):
+    def setUp(self):
+        clear_caches()
+
+    def populate(self, **options):
+        stdout = io.StringIO()
+        call_command("populate_books", stdout=stdout, **options)
+        return stdout.getvalue()
+
+    @tag("populate")
+    def test_sample_books(self):
+        Book.objects.create(title="Emma", author="Jane Austen")
+
+        output = self.populate()
+
+        self.assertIn("3 books", output)
+        self.assertEqual(
+            sorted(Book.objects.values_list("author", flat=True)),
+            ["Douglas Adams", "Harper Lee", "Jane Austen"],
+        )
+
+    @tag("populate")
+    def test_synthetic_books(self):
+        output = self.populate(count=25, batch_size=10, workers=1)
+
+        self.assertIn("25 books", output)
+        self.assertIn("rows/s", output)
+        isbns = list(Book.objects.exclude(isbn=None).values_list("isbn", flat=True))
+        self.assertEqual(len(isbns), len(set(isbns)))
+        self.assertTrue(all(len(isbn) == 13 for isbn in isbns))
+
+    @tag("populate")
+    def test_synthetic_books_do_not_depend_on_workers(self):
+        fields = ("title", "author", "publication_date", "isbn", "summary")
+        self.populate(count=30, batch_size=10, workers=1, seed=7)
+        books = list(Book.objects.values_list(*fields))
+
+        self.populate(count=30, batch_size=10, workers=2, seed=7)
+
+        self.assertEqual(list(Book.objects.values_list(*fields)), books)
+
+    @tag("populate")
+    def test_append_keeps_books_and_search_index(self):
+        Book.objects.create(title="Emma", author="Jane Austen")
+
+        self.populate(count=10, workers=1, append=True)
+
+        self.assertEqual(Book.objects.count(), 11)
+        if BookSearchIndex.is_available():
+            self.assertTrue(Book.objects.filter(search_index__match="emma").exists())
+            book = Book.objects.create(title="Persuasion", author="Jane Austen")
+            self.assertTrue(
+                Book.objects.filter(search_index__match="persuasion", pk=book.pk).exists()
+            )
+
+    @tag("populate")
+    def test_invalid_options(self):
+        with self.assertRaises(CommandError):
+            self.populate(count=0)
+
+
+class ValuesSerializerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Book.objects.create(
+            title="Cien años de soledad",
+            author="Gabriel García Márquez",
+            publication_date=date(1967, 5, 30),
+            isbn="9780307474728",
+            summary='The "Buendía" family\nin Macondo.',
+        )
+        Book.objects.create(title="Beowulf", author="Unknown")
+        Book.objects.create(title="Emma", author="Jane Austen", isbn="")
+        cls.endpoint_list_create = reverse("library:books-list-create")
+
+    def setUp(self):
+        clear_caches()
+
+    @tag("serializers")
+    def test_same_json_as_serializer(self):
+        rows = Book.objects.values_list(*BookValuesSerializer.fields, named=True)
+        expected = BookSerializer(Book.objects.all(), many=True).data
+
+        self.assertEqual(
+            JSONRenderer().render(BookValuesSerializer(rows).data),
+            JSONRenderer().render(expected),
+        )
+
+    @tag("serializers")
+    def test_same_list_responses_as_serializer(self):
+        queries = (
+            "",
+            "?size=5&ordering=-author",
+            "?pagination=offset&limit=2&offset=1&count=false",
+            "?pagination=cursor&ordering=title&size=2",
+            "?q=macondo",
+        )
+        for query in queries:
+            with self.subTest(query=query):
+                url = f"{self.endpoint_list_create}{query}"
+                fast = self.client.get(url)
+                with mock.patch.object(
+                    BookListCreateAPIView, "list", generics.ListCreateAPIView.list
+                ):
+                    slow = self.client.get(url)
+
+                self.assertEqual(fast.status_code, status.HTTP_200_OK)
+                self.assertEqual(fast.content, slow.content)
+
+    @tag("serializers")
+    def test_list_skips_serializer_fields(self):
+        with mock.patch(
+            "library.serializers.BookSerializer.to_representation"
+        ) as to_representation:
+            response = self.client.get(self.endpoint_list_create)
+
+        self.assertEqual(len(response.json()["results"]), 3)
+        to_representation.assert_not_called()
+
+
+class AsyncViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="test", password="password")
+        cls.book = Book.objects.create(
+            title="Emma",
+            author="Jane Austen",
+            publication_date=date(1815, 12, 23),
+            isbn="9780141439587",
+        )
+        for title in ("Persuasion", "Mansfield Park", "Lady Susan"):
+            Book.objects.create(title=title, author="Jane Austen")
+        Book.objects.create(title="Dracula", author="Bram Stoker")
+        cls.token = str(AccessToken.for_user(cls.user))
+        cls.endpoint_list_create = reverse("library_v2:books-list-create")
+        cls.endpoint_detail = reverse(
+            "library_v2:books-retrieve-update-delete", kwargs={"pk": cls.book.pk}
+        )
+
+    def setUp(self):
+        clear_caches()
+
+    @tag("async")
+    async def test_list_matches_v1(self):
+        query = "?author=austen&ordering=-title&size=1&page=2"
+        response = await self.async_client.get(f"{self.endpoint_list_create}{query}")
+        v1_response = await sync_to_async(self.client.get)(
+            f"{reverse('library:books-list-create')}{query}"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        data = response.json()
+        self.assertEqual(data["count"], 4)
+        self.assertEqual(data["results"], v1_response.json()["results"])
+        self.assertIn("page=3", data["next"])
+        self.assertNotIn("page=", data["previous"])
+
+    @tag("async")
+    async def test_search_matches_v1(self):
+        queries = ("?search=dracula", '?search="jane austen"&ordering=title', "?q=emma")
+        for query in queries:
+            with self.subTest(query=query):
+                response = await self.async_client.get(
+                    f"{self.endpoint_list_create}{query}"
+                )
+                v1_response = await sync_to_async(self.client.get)(
+                    f"{reverse('library:books-list-create')}{query}"
+                )
+
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertTrue(response.json()["results"])
+                self.assertEqual(
+                    response.json()["results"], v1_response.json()["results"]
+                )
+
+    @tag("async")
+    @tag("throttling")
+    async def test_shares_rate_limits_with_v1(self):
+        timer = mock.patch.object(SlidingWindowThrottle, "timer", lambda _: 60_000_030)
+        endpoint_v1 = reverse("library:books-list-create")
+        with timer:
+            for _ in range(29):
+                await sync_to_async(self.client.get)(endpoint_v1)
+            last = await self.async_client.get(self.endpoint_list_create)
+            throttled = await self.async_client.get(self.endpoint_list_create)
+
+        self.assertEqual(last.status_code, status.HTTP_200_OK)
+        self.assertEqual(last["RateLimit-Remaining"], "0")
+        self.assertEqual(throttled.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(throttled["Retry-After"], "30")
+
+    @tag("async")
+    async def test_list_errors(self):
+        for query, status_code in (
+            ("?page=9", status.HTTP_404_NOT_FOUND),
+            ("?page=x", status.HTTP_404_NOT_FOUND),
+            ("?publication_year=x", status.HTTP_400_BAD_REQUEST),
+        ):
+            with self.subTest(query=query):
+                response = await self.async_client.get(
+                    f"{self.endpoint_list_create}{query}"
+                )
+                v1_response = await sync_to_async(self.client.get)(
+                    f"{reverse('library:books-list-create')}{query}"
+                )
+
+                self.assertEqual(response.status_code, status_code)
+                self.assertEqual(v1_response.status_code, status_code)
+                self.assertEqual(response.json(), v1_response.json())
+
+    @tag("async")
+    async def test_retrieve(self):
+        response = await self.async_client.get(self.endpoint_detail)
+        missing = await self.async_client.get(
+            reverse("library_v2:books-retrieve-update-delete", args=[0])
+        )
+
+        self.assertEqual(response.json()["publication_date"], "1815-12-23")
+        self.assertEqual(missing.status_code, status.HTTP_404_NOT_FOUND)
+
+    @tag("async")
+    async def test_writes_require_authentication(self):
+        response = await self.async_client.post(
+            self.endpoint_list_create,
+            data={"title": "Sanditon", "author": "Jane Austen"},
+            content_type="application/json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("Bearer", response["WWW-Authenticate"])
+
+    @tag("async")
+    async def test_writes_with_jwt(self):
+        headers = {"headers": {"Authorization": f"Bearer {self.token}"}}
+
+        created = await self.async_client.post(
+            self.endpoint_list_create,
+            data={"title": "Sanditon", "author": "Jane Austen"},
+            content_type="application/json",
+            **headers,
+        )
+        duplicate = await self.async_client.post(
+            self.endpoint_list_create,
+            data={"title": "Emma", "author": "Jane Austen", "isbn": self.book.isbn},
+            content_type="application/json",
+            **headers,
+        )
+        updated = await self.async_client.patch(
+            self.endpoint_detail,
+            data={"title": "Emma (Annotated)"},
+            content_type="application/json",
+            **headers,
+        )
+        deleted = await self.async_client.delete(self.endpoint_detail, **headers)
+
+        self.assertEqual(created.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(duplicate.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("isbn", duplicate.json())
+        self.assertEqual(updated.json()["title"], "Emma (Annotated)")
+        self.assertEqual(deleted.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(await Book.objects.filter(pk=self.book.pk).aexists())
+
+    @tag("async")
+    async def test_session_authentication(self):
+        await self.async_client.aforce_login(self.user)
+
+        response = await self.async_client.delete(self.endpoint_detail)
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+
+    @tag("async")
+    async def test_invalid_token(self):
+        response = await self.async_client.get(
+            self.endpoint_list_create, headers={"Authorization": "Bearer not-a-token"}
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class RateLimitTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader", password="password")
+        cls.endpoint_list_create = reverse("library:books-list-create")
+
+    def setUp(self):
+        clear_caches()
+        # Starts in the middle of a minute, whatever the time of the run
+        self.now = 1_000_000 * 60 + 30
+        timer = mock.patch.object(SlidingWindowThrottle, "timer", lambda _: self.now)
+        timer.start()
+        self.addCleanup(timer.stop)
+
+    def get(self, count=1):
+        return [self.client.get(self.endpoint_list_create) for _ in range(count)]
+
+    @tag("throttling")
+    def test_headers_report_most_constrained_rate(self):
+        response = self.get()[0]
+
+        # Anonymous requests count against "books", "anon", "user" and "custom"
+        self.assertEqual(response["RateLimit-Limit"], "30")
+        self.assertEqual(response["RateLimit-Remaining"], "29")
+        self.assertEqual(response["RateLimit-Reset"], "30")
+        self.assertEqual(
+            response["RateLimit-Policy"], "70;w=60, 30;w=60, 100;w=60, 50;w=60"
+        )
+
+    @tag("throttling")
+    def test_authenticated_rates(self):
+        self.client.force_login(self.user)
+
+        response = self.get()[0]
+
+        self.assertEqual(response["RateLimit-Policy"], "70;w=60, 100;w=60")
+        self.assertEqual(response["RateLimit-Remaining"], "69")
+
+    @tag("throttling")
+    def test_denies_requests_over_the_rate(self):
+        responses = self.get(31)
+
+        self.assertTrue(all(response.status_code == 200 for response in responses[:30]))
+        self.assertEqual(responses[30].status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(responses[30]["RateLimit-Remaining"], "0")
+        # Requests are assumed evenly spread over their window, so they start
+        # leaving the sliding window as soon as the next window starts
+        self.assertEqual(responses[30]["Retry-After"], "30")
+
+    @tag("throttling")
+    def test_window_slides(self):
+        self.get(30)
+
+        # Half of the previous window still counts: 15 requests left
+        self.now += 60
+        responses = self.get(16)
+
+        self.assertEqual(responses[14].status_code, status.HTTP_200_OK)
+        self.assertEqual(responses[14]["RateLimit-Remaining"], "0")
+        self.assertEqual(responses[15].status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        # Two windows later, nothing counts anymore
+        self.now += 120
+        self.assertEqual(self.get()[0]["RateLimit-Remaining"], "29")
+
+    @tag("throttling")
+    def test_denied_requests_are_not_counted(self):
+        self.get(40)
+
+        # As DRF, denied requests count against the rates they were under
+        counts = get_rate_limit_store().connection.execute(
+            "SELECT rate_limit, current FROM rate_limits ORDER BY rate_limit"
+        )
+        self.assertEqual(counts.fetchall(), [(30, 30), (50, 40), (70, 40), (100, 40)])
+
+    @tag("throttling")
+    def test_one_store_call_per_request(self):
+        store = get_rate_limit_store()
+        with mock.patch.object(store, "hit", wraps=store.hit) as hit:
+            self.get()
+
+        self.assertEqual(hit.call_count, 1)
+        self.assertEqual(len(hit.call_args.args[0]), 4)
+
+    @tag("throttling")
+    def test_store_errors_allow_requests(self):
+        self.get(30)
+        connection = mock.Mock()
+        connection.execute.side_effect = sqlite3.OperationalError("database is locked")
+
+        with (
+            mock.patch.object(get_rate_limit_store().local, "connection", connection),
+            self.assertLogs("library.throttling", "ERROR"),
+        ):
+            response = self.get()[0]
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @tag("throttling")
+    def test_uses_temporary_store(self):
+        location = str(get_rate_limit_store().location)
+        self.assertTrue(location.startswith(tempfile.gettempdir()))
+
+
+class TokenAuthenticationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="editor", password="password", is_staff=True
+        )
+        cls.book = Book.objects.create(title="Emma", author="Jane Austen")
+        cls.endpoint_list_create = reverse("library:books-list-create")
+        cls.endpoint_detail = reverse(
+            "library:books-retrieve-update-delete", kwargs={"pk": cls.book.pk}
+        )
+
+    def setUp(self):
+        clear_caches()
+        response = self.client.post(
+            reverse("token_obtain_pair"),
+            {"username": "editor", "password": "password"},
+            content_type="application/json",
+        )
+        self.headers = {"Authorization": f"Bearer {response.json()['access']}"}
+
+    @tag("auth")
+    def test_reads_build_user_from_claims(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.endpoint_list_create, headers=self.headers)
+
+        user = response.wsgi_request.user
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsInstance(user, TokenUser)
+        self.assertEqual((user.pk, user.username), (self.user.pk, "editor"))
+        self.assertTrue(user.is_staff)
+        self.assertFalse(any("auth_user" in query["sql"] for query in queries))
+
+    @tag("auth")
+    def test_writes_load_user(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        read = self.client.get(self.endpoint_detail, headers=self.headers)
+        write = self.client.patch(
+            self.endpoint_detail,
+            {"title": "Emma (Annotated)"},
+            content_type="application/json",
+            headers=self.headers,
+        )
+
+        # Reads trust the token until it expires, writes check the user
+        self.assertEqual(read.status_code, status.HTTP_200_OK)
+        self.assertEqual(write.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(write.json()["code"], "user_inactive")
+
+    @tag("auth")
+    def test_reads_skip_basic_authentication(self):
+        credentials = base64.b64encode(b"editor:wrong").decode()
+        headers = {"Authorization": f"Basic {credentials}"}
+
+        read = self.client.get(self.endpoint_list_create, headers=headers)
+        write = self.client.post(
+            self.endpoint_list_create,
+            {"title": "Sanditon", "author": "Jane Austen"},
+            content_type="application/json",
+            headers=headers,
+        )
+
+        self.assertEqual(read.status_code, status.HTTP_200_OK)
+        self.assertFalse(read.wsgi_request.user.is_authenticated)
+        self.assertEqual(write.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @tag("auth")
+    def test_signature_verified_once(self):
+        for _ in range(3):
+            self.client.get(self.endpoint_detail, headers=self.headers)
+
+        cache_info = get_verified_token.cache_info()
+        self.assertEqual((cache_info.misses, cache_info.hits), (1, 2))
+
+    @tag("auth")
+    def test_expired_cached_token(self):
+        self.client.get(self.endpoint_detail, headers=self.headers)
+
+        later = timezone.now() + timedelta(days=1)
+        with mock.patch("library.authentication.aware_utcnow", return_value=later):
+            response = self.client.get(self.endpoint_detail, headers=self.headers)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(response.json()["code"], "token_not_valid")
+
+    @tag("auth")
+    def test_invalid_signature(self):
+        header, payload, signature = self.headers["Authorization"].split(".")
+        forged = {"Authorization": f"{header}.{payload}.{signature[::-1]}"}
+
+        response = self.client.get(self.endpoint_detail, headers=forged)
+
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(get_verified_token.cache_info().currsize, 0)
+
+
+class InstrumentationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username="admin", is_staff=True)
+        cls.user = User.objects.create_user(username="reader")
+        cls.book = Book.objects.create(title="Emma", author="Jane Austen")
+        cls.endpoint_detail = reverse(
+            "library:books-retrieve-update-delete", kwargs={"pk": cls.book.pk}
+        )
+        cls.endpoint_metrics = reverse("library:metrics")
+
+    def setUp(self):
+        clear_caches()
+
+    def get_timings(self, response):
+        return {
+            entry.split(";")[0]: entry.split(";", 1)[1]
+            for entry in response["Server-Timing"].split(", ")
+        }
+
+    @tag("instrumentation")
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.endpoint_detail)
+
+        timings = self.get_timings(response)
+        self.assertEqual(
+            list(timings), ["total", "db", "serializer", "auth", "throttle"]
+        )
+        self.assertIn(f'desc="{len(queries)} query"', timings["db"])
+        self.assertNotEqual(timings["serializer"], "dur=0.00")
+
+    @tag("instrumentation")
+    def test_metrics_per_view(self):
+        for _ in range(3):
+            self.client.get(self.endpoint_detail)
+        self.client.force_login(self.admin)
+
+        response = self.client.get(self.endpoint_metrics)
+
+        metrics = response.json()["library:books-retrieve-update-delete"]
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(metrics["count"], 3)
+        # The next requests are answered from the response cache
+        self.assertEqual(metrics["queries"], {"p50": 0, "p95": 1, "p99": 1})
+        self.assertEqual(set(metrics["total"]), {"p50", "p95", "p99"})
+
+    @tag("instrumentation")
+    def test_metrics_admin_only(self):
+        anonymous = self.client.get(self.endpoint_metrics)
+        self.client.force_login(self.user)
+        user = self.client.get(self.endpoint_metrics)
+
+        self.assertEqual(anonymous.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(user.status_code, status.HTTP_403_FORBIDDEN)
+
+    @tag("instrumentation")
+    def test_histogram_percentiles(self):
+        histogram = Histogram()
+        for value in range(1, 1101):
+            histogram.add(value)
+
+        # Only the latest 1000 samples are kept
+        self.assertEqual(
+            histogram.get_percentiles(), {"p50": 600, "p95": 1050, "p99": 1090}
+        )
+
+
+class ListQueryCountTest(QueryCountAssertionsMixin, TestCase):
+    """Query budgets of BookListCreateAPIView, which its changes must keep."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username="reader")
+        Book.objects.bulk_create(
+            Book(title=f"Book {number}", author="Jane Austen", summary="A novel")
+            for number in range(30)
+        )
+        cls.endpoint_list_create = reverse("library:books-list-create")
+        cls.token = str(AccessToken.for_user(cls.user))
+
+    def setUp(self):
+        clear_caches()
+
+    def get(self, query="", **kwargs):
+        response = self.client.get(f"{self.endpoint_list_create}{query}", **kwargs)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response
+
+    @tag("queries")
+    def test_page_number(self):
+        # Count and page
+        with self.assertMaxQueries(2):
+            self.get("?author=austen&ordering=title&page=2")
+
+    @tag("queries")
+    def test_without_count(self):
+        with self.assertMaxQueries(1):
+            self.get("?pagination=offset&count=false")
+
+    @tag("queries")
+    def test_cursor(self):
+        next_query = urlparse(self.get("?pagination=cursor").json()["next"]).query
+        with self.assertMaxQueries(1):
+            self.get(f"?{next_query}")
+
+    @tag("queries")
+    def test_full_text_search(self):
+        with self.assertMaxQueries(2):
+            self.get("?q=novel")
+
+    @tag("queries")
+    def test_cached(self):
+        self.get()
+        with self.assertMaxQueries(0):
+            self.get()
+
+    @tag("queries")
+    def test_token_user(self):
+        # No user query
+        with self.assertMaxQueries(2):
+            self.get(headers={"Authorization": f"Bearer {self.token}"})
+
+    @tag("queries")
+    def test_create(self):
+        self.client.force_login(self.user)
+        # Session and user, unique isbn check, insert
+        with self.assertMaxQueries(4):
+            response = self.client.post(
+                self.endpoint_list_create,
+                {"title": "Sanditon", "author": "Jane Austen", "isbn": "9780141439587"},
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class DatabaseProfileTest(TestCase):
+    def get_pragma(self, pragma):
+        with connection.cursor() as cursor:
+            cursor.execute(f"PRAGMA {pragma}")
+            return cursor.fetchone()[0]
+
+    @tag("database")
+    def test_connection_pragmas(self):
+        if "init_command" not in connection.settings_dict["OPTIONS"]:
+            self.skipTest("BOOK_API_DATABASE_PROFILE is not production")
+
+        # The in-memory test database has no WAL, nor mmap
+        for pragma in ("busy_timeout", "cache_size"):
+            with self.subTest(pragma=pragma):
+                self.assertEqual(
+                    self.get_pragma(pragma), settings.SQLITE_PRAGMAS[pragma]
+                )
+        self.assertEqual(connection.transaction_mode, "IMMEDIATE")
+
+    @tag("database")
+    def test_persistent_connections_only_under_wsgi(self):
+        for server, conn_max_age in (("wsgi", 600), ("asgi", None)):
+            environ = {
+                "BOOK_API_DATABASE_PROFILE": "production",
+                "BOOK_API_SERVER": server,
+            }
+            with self.subTest(server=server), mock.patch.dict(os.environ, environ):
+                database = runpy.run_module("book_api.settings")["DATABASES"]["default"]
+
+                self.assertEqual(database.get("CONN_MAX_AGE"), conn_max_age)
+                self.assertIn("init_command", database["OPTIONS"])
@@ -1,5 +1,254 @@
-from rest_framework.throttling import AnonRateThrottle
+import logging
+import math
+import random
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+from rest_framework.throttling import (
+    AnonRateThrottle,
+    BaseThrottle,
+    ScopedRateThrottle,
+)
+
+logger = logging.getLogger(__name__)
 
 
 class CustomRateThrottle(AnonRateThrottle):
     scope = "custom"
+
+
+# ================================================================
+#                        RATE LIMIT STORE
+# ================================================================
+
+
+def get_window(now, duration):
+    """Returns the number of the fixed window of `now`, and its weight."""
+    window, elapsed = divmod(now, duration)
+    return int(window), 1 - elapsed / duration
+
+
+# The updated row, as seen from the ON CONFLICT clause: `excluded` is the
+# inserted row, with the current window and the weight of the previous one
+CURRENT_SQL = "CASE excluded.window - window WHEN 0 THEN current ELSE 0 END"
+PREVIOUS_SQL = (
+    "CASE excluded.window - window WHEN 0 THEN previous WHEN 1 THEN current ELSE 0 END"
+)
+ALLOWED_SQL = (
+    f"({PREVIOUS_SQL}) * excluded.weight + ({CURRENT_SQL}) < excluded.rate_limit"
+)
+
+HIT_SQL = f"""
+    INSERT INTO rate_limits (key, window, current, previous, weight, rate_limit,
+        allowed, expires)
+    VALUES {{values}}
+    ON CONFLICT (key) DO UPDATE SET
+        current = ({CURRENT_SQL}) + ({ALLOWED_SQL}),
+        previous = {PREVIOUS_SQL},
+        allowed = {ALLOWED_SQL},
+        window = excluded.window,
+        weight = excluded.weight,
+        rate_limit = excluded.rate_limit,
+        expires = excluded.expires
+    RETURNING key, allowed, current, previous
+"""
+
+
+class SQLiteRateLimitStore:
+    """
+    Shared sliding window counters. Each key keeps the number of requests of
+    the current and the previous fixed windows, and the requests of the last
+    `duration` seconds are estimated as `previous * weight + current`, where
+    `weight` is the share of the previous window still inside the sliding
+    window. Every check is O(1), whatever the rate.
+
+    The counters are stored in an SQLite file shared by every worker process
+    of the host, separate from the application database so that rate limiting
+    never waits for its writes. Each request runs a single UPSERT statement.
+
+    When the file cannot be read or written, e.g. while it stays locked for
+    longer than the timeout, the error is logged and the requests are allowed.
+    """
+
+    # Share of the requests that also delete the expired counters
+    purge_probability = 0.001
+
+    def __init__(self, location):
+        self.location = str(location)
+        self.local = threading.local()
+
+    @property
+    def connection(self):
+        # SQLite connections cannot be shared between threads
+        connection = getattr(self.local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.location, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode = WAL")
+            connection.execute("PRAGMA synchronous = NORMAL")
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS rate_limits (
+                    key TEXT PRIMARY KEY,
+                    window INTEGER NOT NULL,
+                    current INTEGER NOT NULL,
+                    previous INTEGER NOT NULL,
+                    weight REAL NOT NULL,
+                    rate_limit INTEGER NOT NULL,
+                    allowed INTEGER NOT NULL,
+                    expires REAL NOT NULL
+                ) WITHOUT ROWID
+                """
+            )
+            self.local.connection = connection
+        return connection
+
+    def hit(self, limits, now):
+        """
+        Counts a request against every (key, limit, duration) of `limits` in
+        a single round trip, except against the limits it exceeds. Returns an
+        (allowed, current, previous) tuple per limit, after counting.
+        """
+        if not limits:
+            return []
+
+        params = []
+        for key, limit, duration in limits:
+            window, weight = get_window(now, duration)
+            allowed = int(limit > 0)
+            expires = (window + 2) * duration
+            params += (key, window, allowed, 0, weight, limit, allowed, expires)
+
+        values = ", ".join(["(?, ?, ?, ?, ?, ?, ?, ?)"] * len(limits))
+        try:
+            rows = self.connection.execute(HIT_SQL.format(values=values), params)
+            results = {
+                key: (bool(allowed), current, previous)
+                for key, allowed, current, previous in rows
+            }
+
+            if random.random() < self.purge_probability:
+                self.connection.execute(
+                    "DELETE FROM rate_limits WHERE expires < ?", (now,)
+                )
+        except sqlite3.OperationalError:
+            # Fails open: an unavailable store must not take the API down
+            logger.exception("Rate limit store %s unavailable", self.location)
+            return [(True, 0, 0) for _ in limits]
+        return [results[key] for key, _, _ in limits]
+
+    def clear(self):
+        self.connection.execute("DELETE FROM rate_limits")
+
+
+def get_rate_limit_store():
+    """Returns the store of the RATE_LIMIT setting, created once per process."""
+    config = settings.RATE_LIMIT
+    key = (config["STORE"], str(config["LOCATION"]))
+    if key not in stores:
+        stores[key] = import_string(config["STORE"])(config["LOCATION"])
+    return stores[key]
+
+
+stores = {}
+
+
+# ================================================================
+#                            THROTTLES
+# ================================================================
+
+
+class SlidingWindowThrottle(BaseThrottle):
+    """
+    Applies the rates of the RATE_LIMIT "THROTTLES" classes (scoped, anon,
+    user...) with one call to the shared store, and adds RateLimit-Limit,
+    RateLimit-Remaining and RateLimit-Reset headers for the most constrained
+    rate, plus RateLimit-Policy for all of them.
+
+    The throttle classes only provide the cache keys and rates; like DRF, a
+    request counts against every rate it does not exceed.
+    """
+
+    timer = time.time
+
+    def allow_request(self, request, view):
+        limits = []
+        for throttle_class in settings.RATE_LIMIT["THROTTLES"]:
+            limit = self.get_limit(import_string(throttle_class), request, view)
+            if limit is not None:
+                limits.append(limit)
+
+        now = self.timer()
+        results = get_rate_limit_store().hit(limits, now)
+        statuses = [
+            self.get_status(limit, duration, now, *result)
+            for (_, limit, duration), result in zip(limits, results)
+        ]
+        if not statuses:
+            return True
+
+        self.wait_time = max(status["wait"] for status in statuses)
+        if hasattr(view, "headers"):
+            view.headers.update(self.get_headers(statuses))
+        return all(status["allowed"] for status in statuses)
+
+    def get_limit(self, throttle_class, request, view):
+        """Returns the (key, limit, duration) of a DRF throttle, or None."""
+        throttle = throttle_class()
+        if isinstance(throttle, ScopedRateThrottle):
+            # As ScopedRateThrottle.allow_request()
+            throttle.scope = getattr(view, throttle.scope_attr, None)
+            if not throttle.scope:
+                return None
+            throttle.rate = throttle.get_rate()
+            throttle.num_requests, throttle.duration = throttle.parse_rate(
+                throttle.rate
+            )
+
+        if throttle.rate is None:
+            return None
+        key = throttle.get_cache_key(request, view)
+        if key is None:
+            return None
+        return key, throttle.num_requests, throttle.duration
+
+    def get_status(self, limit, duration, now, allowed, current, previous):
+        window, weight = get_window(now, duration)
+        reset = (window + 1) * duration - now
+        estimate = previous * weight + current
+
+        if allowed:
+            wait = 0
+        elif current >= limit:
+            # Wait for the next window, until the current one weighs enough less
+            wait = reset + duration * (1 - limit / current)
+        else:
+            # Wait until the previous window weighs enough less
+            wait = duration * (weight - (limit - current) / previous)
+
+        return {
+            "allowed": allowed,
+            "limit": limit,
+            "duration": duration,
+            "remaining": max(math.floor(limit - estimate), 0),
+            "reset": math.ceil(reset),
+            "wait": wait,
+        }
+
+    def get_headers(self, statuses):
+        tightest = min(
+            statuses, key=lambda status: (status["remaining"], status["limit"])
+        )
+        return {
+            "RateLimit-Limit": str(tightest["limit"]),
+            "RateLimit-Remaining": str(tightest["remaining"]),
+            "RateLimit-Reset": str(tightest["reset"]),
+            "RateLimit-Policy": ", ".join(
+                f"{status['limit']};w={status['duration']}" for status in statuses
+            ),
+        }
+
+    def wait(self):
+        return self.wait_time
@@ -6,9 +6,12 @@ app_name = "library"
 
 urlpatterns = [
     path("books/", views.BookListCreateAPIView.as_view(), name="books-list-create"),
+    path("books/export/", views.BookExportAPIView.as_view(), name="books-export"),
+    path("books/bulk/", views.BookBulkAPIView.as_view(), name="books-bulk"),
     path(
         "books/<int:pk>/",
         views.BookRetrieveUpdateDestroyAPIView.as_view(),
         name="books-retrieve-update-delete",
     ),
+    path("metrics/", views.MetricsAPIView.as_view(), name="metrics"),
 ]
@@ -1,3 +1,18 @@
+from django.urls import path
+
+from library import views_v2
+
 app_name = "library_v2"
 
-urlpatterns = []
+urlpatterns = [
+    path(
+        "books/",
+        views_v2.AsyncBookListCreateView.as_view(),
+        name="books-list-create",
+    ),
+    path(
+        "books/<int:pk>/",
+        views_v2.AsyncBookRetrieveUpdateDestroyView.as_view(),
+        name="books-retrieve-update-delete",
+    ),
+]
@@ -1,32 +1,69 @@
+import re
+from collections import Counter
+from types import GeneratorType
+
+from django.http import StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, generics
-from rest_framework.pagination import LimitOffsetPagination, PageNumberPagination
-from rest_framework.permissions import IsAuthenticatedOrReadOnly
-
-from library.filters import BookFilter
+from rest_framework.exceptions import ValidationError
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import (
+    IsAdminUser,
+    IsAuthenticated,
+    IsAuthenticatedOrReadOnly,
+)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from library.authentication import ReadAuthenticationMixin
+from library.bulk import create_books, delete_books, update_books
+from library.caching import CachedListMixin, CachedRetrieveMixin
+from library.conditional import ConditionalDetailMixin, ConditionalListMixin
+from library.export import iter_csv, iter_ndjson
+from library.filters import BookFilter, BookFullTextSearchFilter, BookSearchFilter
+from library.instrumentation import InstrumentedViewMixin, get_views_metrics
 from library.models import Book
-from library.serializers import BookSerializer
+from library.pagination import BookListPagination
+from library.parsers import NDJSONParser
+from library.renderers import CSVRenderer, NDJSONRenderer
+from library.serializers import (
+    BookBulkSerializer,
+    BookSerializer,
+    BookValuesSerializer,
+)
 
 # from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 # from library.throttling import CustomRateThrottle
 
 # ================================================================
-#                          PAGINATION
+#                              MIXINS
 # ================================================================
 
 
-class BookListPNPagination(PageNumberPagination):
-    page_size = 3
-    page_query_param = "page"
-    page_size_query_param = "size"
-    max_page_size = 5
+class ValuesListMixin:
+    """
+    Serves `list()` from `values_list()` rows with `values_serializer_class`,
+    which must render like `serializer_class`, without building model
+    instances or going through the serializer fields. The rows also hold the
+    `values_extra_fields`, after the serializer fields.
+    """
+
+    values_serializer_class = None
+    values_extra_fields = ()
 
+    def list(self, request, *args, **kwargs):
+        serializer_class = self.values_serializer_class
+        queryset = self.filter_queryset(self.get_queryset()).values_list(
+            *serializer_class.fields, *self.values_extra_fields, named=True
+        )
 
-class BookListLOPagination(LimitOffsetPagination):
-    default_limit = 3
-    limit_query_param = "limit"
-    offset_query_param = "offset"
-    max_limit = 5
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer_class(page).data)
+        return Response(serializer_class(queryset).data)
 
 
 # ================================================================
@@ -35,21 +72,33 @@ class BookListLOPagination(LimitOffsetPagination):
 # ADAPTA
 
 
-class BookListCreateAPIView(generics.ListCreateAPIView):
+# The cache mixins come first, so that a cache HIT skips every query
+class BookListCreateAPIView(
+    InstrumentedViewMixin,
+    ReadAuthenticationMixin,
+    CachedListMixin,
+    ConditionalListMixin,
+    ValuesListMixin,
+    generics.ListCreateAPIView,
+):
     # order_by("pk") # Avoid warning for pagination with unordered list
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+    values_serializer_class = BookValuesSerializer
 
     filter_backends = (
         DjangoFilterBackend,
-        filters.SearchFilter,
+        BookSearchFilter,
+        # ?q= results come in relevance order unless ?ordering= is given
+        BookFullTextSearchFilter,
         filters.OrderingFilter,
     )
     filterset_class = BookFilter
     search_fields = ("title", "=author")
     ordering_fields = ("title", "author")
 
-    pagination_class = BookListPNPagination
+    # ?pagination=page|offset|cursor, page number by default
+    pagination_class = BookListPagination
 
     permission_classes = (IsAuthenticatedOrReadOnly,)
 
@@ -58,6 +107,121 @@ class BookListCreateAPIView(generics.ListCreateAPIView):
     throttle_scope = "books"
 
 
-class BookRetrieveUpdateDestroyAPIView(generics.RetrieveUpdateDestroyAPIView):
+class BookRetrieveUpdateDestroyAPIView(
+    InstrumentedViewMixin,
+    ReadAuthenticationMixin,
+    CachedRetrieveMixin,
+    ConditionalDetailMixin,
+    generics.RetrieveUpdateDestroyAPIView,
+):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
+
+
+class BookBulkAPIView(InstrumentedViewMixin, generics.GenericAPIView):
+    """
+    Creates (POST), partially updates (PATCH) or deletes (DELETE) many books
+    from a JSON array or an NDJSON stream, `?batch_size=` items per query and
+    transaction. Books created with the ISBN of an existing book update it.
+    The response reports the outcome of every item, in order.
+    """
+
+    queryset = Book.objects.all()
+    serializer_class = BookBulkSerializer
+    parser_classes = (JSONParser, NDJSONParser)
+    permission_classes = (IsAuthenticated,)
+    throttle_scope = "books"
+
+    batch_size = 1000
+    batch_size_query_param = "batch_size"
+    max_batch_size = 5000
+
+    def post(self, request, *args, **kwargs):
+        return self.bulk_response(create_books)
+
+    def patch(self, request, *args, **kwargs):
+        return self.bulk_response(update_books)
+
+    def delete(self, request, *args, **kwargs):
+        return self.bulk_response(delete_books)
+
+    def bulk_response(self, write):
+        items = self.request.data
+        # A JSON array, or the generator of NDJSONParser
+        if not isinstance(items, (list, GeneratorType)):
+            raise ValidationError(
+                {api_settings.NON_FIELD_ERRORS_KEY: ["Expected a list of items."]}
+            )
+
+        results = write(items, self.get_batch_size())
+        counts = Counter(result["status"] for result in results)
+        return Response({"counts": counts, "results": results})
+
+    def get_batch_size(self):
+        value = self.request.query_params.get(self.batch_size_query_param)
+        if value is None:
+            return self.batch_size
+        try:
+            batch_size = int(value)
+            if batch_size < 1:
+                raise ValueError
+        except ValueError:
+            raise ValidationError(
+                {self.batch_size_query_param: ["A positive integer is required."]}
+            )
+        return min(batch_size, self.max_batch_size)
+
+
+class BookExportAPIView(
+    InstrumentedViewMixin, ReadAuthenticationMixin, generics.GenericAPIView
+):
+    """
+    Streams every book matching the BookFilter parameters as NDJSON (default)
+    or CSV (`?format=csv` or `Accept: text/csv`), gzipped when the client
+    accepts it. Rows are read with `values_list()` in chunks, without
+    serializers, so memory stays constant whatever the number of books.
+    """
+
+    queryset = Book.objects.order_by("pk")
+    renderer_classes = (NDJSONRenderer, CSVRenderer)
+    filter_backends = (DjangoFilterBackend,)
+    filterset_class = BookFilter
+    throttle_scope = "books"
+
+    fields = BookSerializer.Meta.fields
+    chunk_size = 2000
+    streams = {"ndjson": iter_ndjson, "csv": iter_csv}
+    # Same check as GZipMiddleware
+    accepts_gzip = re.compile(r"\bgzip\b")
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = queryset.values_list(*self.fields).iterator(chunk_size=self.chunk_size)
+
+        renderer = request.accepted_renderer
+        content = self.streams[renderer.format](rows, self.fields)
+        response = StreamingHttpResponse(
+            content, content_type=f"{renderer.media_type}; charset={renderer.charset}"
+        )
+        response["Content-Disposition"] = (
+            f'attachment; filename="books.{renderer.format}"'
+        )
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+        if self.accepts_gzip.search(request.META.get("HTTP_ACCEPT_ENCODING", "")):
+            response.streaming_content = compress_sequence(content)
+            response["Content-Encoding"] = "gzip"
+        return response
+
+
+class MetricsAPIView(APIView):
+    """
+    Returns the p50, p95 and p99 of the query count and durations (in ms) of
+    the latest requests of each view, as measured by InstrumentationMiddleware
+    in this process.
+    """
+
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, *args, **kwargs):
+        return Response(get_views_metrics())
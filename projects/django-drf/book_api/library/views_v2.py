@@ -0,0 +1,257 @@
+import json
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import Http404, HttpResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import exceptions, status
+from rest_framework.filters import OrderingFilter
+from rest_framework.permissions import IsAuthenticatedOrReadOnly
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from library.authentication import AsyncJWTAuthentication, AsyncSessionAuthentication
+from library.filters import BookFilter, BookFullTextSearchFilter, BookSearchFilter
+from library.models import Book
+from library.pagination import BookListPNPagination
+from library.serializers import BookSerializer, BookValuesSerializer
+
+# ================================================================
+#                            BASE VIEW
+# ================================================================
+
+
+class AsyncAPIView(View):
+    """
+    Async counterpart of the parts of APIView the v2 views need, which DRF
+    views cannot run natively: JSON bodies and responses, authentication with
+    `aauthenticate()`, permission checks that may be coroutines, throttling
+    with the DRF throttles, and DRF exceptions turned into error responses.
+    """
+
+    authentication_classes = (AsyncJWTAuthentication, AsyncSessionAuthentication)
+    permission_classes = (IsAuthenticatedOrReadOnly,)
+    throttle_classes = api_settings.DEFAULT_THROTTLE_CLASSES
+    renderer = JSONRenderer()
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        # As APIView: CSRF is only enforced for session authentication
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Extra response headers, e.g. the RateLimit headers of the throttles
+        self.headers = {}
+        try:
+            await self.authenticate(request)
+            await self.check_permissions(request)
+            await sync_to_async(self.check_throttles)(request)
+            response = await super().dispatch(request, *args, **kwargs)
+        except Http404:
+            response = self.handle_exception(request, exceptions.NotFound())
+        except exceptions.APIException as exc:
+            response = self.handle_exception(request, exc)
+
+        for name, value in self.headers.items():
+            response[name] = value
+        return response
+
+    async def authenticate(self, request):
+        self.authenticators = [auth() for auth in self.authentication_classes]
+        for authenticator in self.authenticators:
+            user_auth = await authenticator.aauthenticate(request)
+            if user_auth is not None:
+                request.user, request.auth = user_auth
+                return
+        # The lazy user of AuthenticationMiddleware would query synchronously
+        request.user, request.auth = AnonymousUser(), None
+
+    async def check_permissions(self, request):
+        for permission in (permission() for permission in self.permission_classes):
+            allowed = permission.has_permission(request, self)
+            if isawaitable(allowed):
+                allowed = await allowed
+            if not allowed:
+                if request.user.is_authenticated:
+                    raise exceptions.PermissionDenied(
+                        getattr(permission, "message", None)
+                    )
+                raise exceptions.NotAuthenticated()
+
+    def check_throttles(self, request):
+        """
+        Same as APIView.check_throttles(), in a thread since the throttles
+        query their store synchronously. The v1 and v2 views share the rates.
+        """
+        waits = [
+            throttle.wait()
+            for throttle in (throttle() for throttle in self.throttle_classes)
+            if not throttle.allow_request(request, self)
+        ]
+        if waits:
+            waits = [wait for wait in waits if wait is not None]
+            raise exceptions.Throttled(max(waits, default=None))
+
+    def handle_exception(self, request, exc):
+        """Same responses as DRF's exception handler."""
+        data = exc.detail
+        if not isinstance(data, (list, dict)):
+            data = {"detail": data}
+        response = self.render(data, exc.status_code)
+
+        unauthenticated = (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)
+        if isinstance(exc, unauthenticated):
+            authenticator = self.authenticators[0]
+            response["WWW-Authenticate"] = authenticator.authenticate_header(request)
+            response.status_code = status.HTTP_401_UNAUTHORIZED
+        if getattr(exc, "wait", None):
+            response["Retry-After"] = str(int(exc.wait))
+        return response
+
+    def render(self, data, status_code=status.HTTP_200_OK):
+        return HttpResponse(
+            self.renderer.render(data) if data is not None else b"",
+            status=status_code,
+            content_type="application/json",
+        )
+
+    def get_data(self, request):
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError as exc:
+            raise exceptions.ParseError(f"JSON parse error - {exc}")
+
+    async def save(self, serializer):
+        # Validators query the database synchronously, e.g. for the unique isbn
+        await sync_to_async(serializer.is_valid)(raise_exception=True)
+        await sync_to_async(serializer.save)()
+        return serializer.data
+
+
+# ================================================================
+#                              VIEWS
+# ================================================================
+
+
+class AsyncBookListCreateView(AsyncAPIView):
+    """
+    Async version of BookListCreateAPIView, with the BookFilter parameters,
+    `?search=`, `?q=`, `?ordering=` and page number pagination (`?page=`,
+    `?size=`). Rows are read with `aiterator()` and counted with `acount()`.
+    """
+
+    filter_backends = (BookSearchFilter, BookFullTextSearchFilter)
+    search_fields = ("title", "=author")
+    ordering_fields = ("title", "author")
+    pagination = BookListPNPagination
+    throttle_scope = "books"
+
+    async def get(self, request, *args, **kwargs):
+        filterset = BookFilter(request.GET, queryset=Book.objects.all())
+        if not filterset.is_valid():
+            raise exceptions.ValidationError(filterset.errors)
+        # The full-text filter may check once whether the index table exists
+        queryset = await sync_to_async(self.search_queryset)(request, filterset.qs)
+        queryset = self.order_queryset(request, queryset)
+
+        page_size = self.get_page_size(request)
+        page_number = self.get_page_number(request)
+        count = await queryset.acount()
+        if page_number > 1 and (page_number - 1) * page_size >= count:
+            raise exceptions.NotFound("Invalid page.")
+
+        offset = (page_number - 1) * page_size
+        rows = queryset.values_list(*BookValuesSerializer.fields, named=True)
+        page = [row async for row in rows[offset : offset + page_size].aiterator()]
+
+        url = request.build_absolute_uri()
+        page_query_param = self.pagination.page_query_param
+        next_link = previous_link = None
+        if offset + page_size < count:
+            next_link = replace_query_param(url, page_query_param, page_number + 1)
+        if page_number == 2:
+            previous_link = remove_query_param(url, page_query_param)
+        elif page_number > 2:
+            previous_link = replace_query_param(url, page_query_param, page_number - 1)
+
+        return self.render(
+            {
+                "count": count,
+                "next": next_link,
+                "previous": previous_link,
+                "results": BookValuesSerializer(page).data,
+            }
+        )
+
+    async def post(self, request, *args, **kwargs):
+        serializer = BookSerializer(data=self.get_data(request))
+        return self.render(await self.save(serializer), status.HTTP_201_CREATED)
+
+    def search_queryset(self, request, queryset):
+        # The DRF filter backends read the query parameters of a DRF request
+        drf_request = Request(request)
+        for backend in self.filter_backends:
+            queryset = backend().filter_queryset(drf_request, queryset, self)
+        return queryset
+
+    def order_queryset(self, request, queryset):
+        fields = request.GET.get(OrderingFilter.ordering_param, "").split(",")
+        ordering = [
+            field.strip()
+            for field in fields
+            if field.strip().lstrip("-") in self.ordering_fields
+        ]
+        return queryset.order_by(*ordering) if ordering else queryset
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.GET[self.pagination.page_size_query_param])
+            if page_size > 0:
+                return min(page_size, self.pagination.max_page_size)
+        except (KeyError, ValueError):
+            pass
+        return self.pagination.page_size
+
+    def get_page_number(self, request):
+        page_number = request.GET.get(self.pagination.page_query_param) or 1
+        try:
+            page_number = int(page_number)
+            if page_number < 1:
+                raise ValueError
+        except ValueError:
+            raise exceptions.NotFound("Invalid page.")
+        return page_number
+
+
+class AsyncBookRetrieveUpdateDestroyView(AsyncAPIView):
+    """Async version of BookRetrieveUpdateDestroyAPIView, with `aget()`."""
+
+    async def get_object(self, pk):
+        try:
+            return await Book.objects.aget(pk=pk)
+        except Book.DoesNotExist:
+            raise Http404
+
+    async def get(self, request, pk, *args, **kwargs):
+        return self.render(BookSerializer(await self.get_object(pk)).data)
+
+    async def put(self, request, pk, *args, **kwargs):
+        return await self.update(request, pk)
+
+    async def patch(self, request, pk, *args, **kwargs):
+        return await self.update(request, pk, partial=True)
+
+    async def update(self, request, pk, partial=False):
+        book = await self.get_object(pk)
+        serializer = BookSerializer(book, data=self.get_data(request), partial=partial)
+        return self.render(await self.save(serializer))
+
+    async def delete(self, request, pk, *args, **kwargs):
+        book = await self.get_object(pk)
+        await book.adelete()
+        return self.render(None, status.HTTP_204_NO_CONTENT)
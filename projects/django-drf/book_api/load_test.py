@@ -0,0 +1,118 @@
+"""
+Load test comparing the synchronous v1 and the async v2 book endpoints.
+
+Start the ASGI server first, without throttling, e.g.:
+
+    BOOK_API_THROTTLING=off uvicorn book_api.asgi:application --port 8000
+
+Then run:
+
+    python load_test.py --concurrency 50 --requests 2000
+
+Each run sends the same GET requests to both versions, `--concurrency` at a
+time over keep-alive connections, and reports the throughput and latency
+percentiles. Every request has a distinct query, even across runs, so that
+v1 does not answer from its response cache. Only the standard library is used.
+"""
+
+import argparse
+import asyncio
+import statistics
+from time import perf_counter, time_ns
+from urllib.parse import urlsplit
+
+DEFAULT_URL = "http://127.0.0.1:8000"
+DEFAULT_PATHS = ("/api/{version}/books/?size=5", "/api/{version}/books/?author=a")
+
+
+async def read_response(reader):
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Connection closed by the server")
+    status = int(status_line.split()[1])
+
+    length = 0
+    while (line := await reader.readline()) not in (b"\r\n", b""):
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    await reader.readexactly(length)
+    return status
+
+
+async def client(host, port, requests, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while requests:
+            path = requests.pop()
+            request = f"GET {path} HTTP/1.1\r\nHost: {host}\r\n"
+            writer.write(f"{request}Accept: application/json\r\n\r\n".encode())
+            started = perf_counter()
+            status = await read_response(reader)
+            latencies.append(perf_counter() - started)
+            if status != 200:
+                errors.append(status)
+    finally:
+        writer.close()
+
+
+async def run(url, version, paths, concurrency, count):
+    parts = urlsplit(url)
+    run_id = time_ns()
+    requests = [
+        f"{paths[i % len(paths)].format(version=version)}&request={run_id}-{i}"
+        for i in range(count)
+    ]
+    latencies, errors = [], []
+
+    started = perf_counter()
+    await asyncio.gather(
+        *(
+            client(parts.hostname, parts.port or 80, requests, latencies, errors)
+            for _ in range(concurrency)
+        )
+    )
+    elapsed = perf_counter() - started
+
+    return len(latencies) / elapsed, statistics.quantiles(latencies, n=100), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--url", default=DEFAULT_URL, help="Base URL of the server")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument(
+        "--path",
+        action="append",
+        dest="paths",
+        help="Path to request, with {version} for v1 or v2 (repeatable)",
+    )
+    arguments = parser.parse_args()
+
+    paths = arguments.paths or DEFAULT_PATHS
+    for version in ("v1", "v2"):
+        # Warm up the connections and the code paths first
+        asyncio.run(run(arguments.url, version, paths, 5, 50))
+
+    for version in ("v1", "v2"):
+        throughput, quantiles, errors = asyncio.run(
+            run(
+                arguments.url,
+                version,
+                paths,
+                arguments.concurrency,
+                arguments.requests,
+            )
+        )
+        print(
+            f"{version}: {throughput:8.1f} req/s"
+            f"   p50 {quantiles[49] * 1000:7.1f} ms"
+            f"   p95 {quantiles[94] * 1000:7.1f} ms"
+            f"   p99 {quantiles[98] * 1000:7.1f} ms"
+            f"   errors {len(errors)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
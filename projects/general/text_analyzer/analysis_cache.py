@@ -0,0 +1,110 @@
+import json
+import os
+
+from hashlib import sha256
+from pathlib import Path
+
+# ================================================================
+#                            CONSTANTS
+# ================================================================
+
+DEFAULT_CACHE_DIRECTORY = Path(
+    os.environ.get('XDG_CACHE_HOME', Path.home() / '.cache')) / 'text_analyzer'
+
+# Total size of the cached entries before the least recently used are evicted
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# ================================================================
+#                          ANALYSIS CACHE
+# ================================================================
+
+
+class AnalysisCache:
+    """On-disk cache of per-file analysis entries with LRU eviction.
+
+    Each entry is stored as a JSON file named after the hash of the analyzed
+    file path. The modification time of the entry file records when it was
+    last used, so the least recently used entries are evicted first.
+    """
+
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIRECTORY,
+                 max_size: int = DEFAULT_MAX_SIZE):
+        """Initializes an AnalysisCache object.
+
+        Args:
+            directory: The directory where the entries are stored.
+            max_size: The maximum total size of the entries, in bytes.
+        """
+        self.directory = directory
+        self.max_size = max_size
+
+    def get_entry_path(self, file_path: Path) -> Path:
+        """Constructs the path of the entry of an analyzed file.
+
+        Args:
+            file_path: The path of the analyzed file.
+
+        Returns:
+            The path of the entry.
+        """
+        key = sha256(str(file_path.resolve()).encode()).hexdigest()
+        return self.directory / f'{key}.json'
+
+    def get(self, file_path: Path) -> dict | None:
+        """Returns the cached entry of a file and marks it as recently used.
+
+        Args:
+            file_path: The path of the analyzed file.
+
+        Returns:
+            The cached entry, or None if there is no valid entry.
+        """
+        entry_path = self.get_entry_path(file_path)
+
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+            os.utime(entry_path)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+        if entry.get('path') != str(file_path.resolve()):
+            return None
+        return entry
+
+    def put(self, file_path: Path, entry: dict) -> None:
+        """Stores the entry of a file, replacing the previous one.
+
+        Failing to write the cache never interrupts an analysis, so write
+        errors are ignored.
+
+        Args:
+            file_path: The path of the analyzed file.
+            entry: The entry to store.
+        """
+        entry_path = self.get_entry_path(file_path)
+        temporary_path = entry_path.with_suffix(f'.{os.getpid()}.tmp')
+
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            with open(temporary_path, 'w', encoding='utf-8') as file:
+                json.dump({**entry, 'path': str(file_path.resolve())}, file)
+            os.replace(temporary_path, entry_path)
+        except OSError:
+            temporary_path.unlink(missing_ok=True)
+
+    def prune(self) -> None:
+        """Evicts the least recently used entries beyond the maximum size."""
+        try:
+            entries = [(entry_path.stat(), entry_path)
+                       for entry_path in self.directory.glob('*.json')]
+        except OSError:
+            return
+
+        total_size = sum(entry_stat.st_size for entry_stat, _ in entries)
+
+        for entry_stat, entry_path in sorted(entries, key=lambda entry: entry[0].st_mtime_ns):
+            if total_size <= self.max_size:
+                break
+            entry_path.unlink(missing_ok=True)
+            total_size -= entry_stat.st_size
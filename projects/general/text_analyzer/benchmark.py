@@ -0,0 +1,476 @@
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tracemalloc
+
+from bisect import bisect
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from itertools import accumulate
+from multiprocessing import get_context
+from pathlib import Path
+from statistics import median
+from string import ascii_lowercase
+from time import perf_counter
+
+from text_statistics import (
+    analyze_file,
+    analyze_file_parallel,
+    analyze_mapped_file,
+    calculate_words_frequency,
+    clean_text,
+    read_file,
+)
+
+# ================================================================
+#                            CONSTANTS
+# ================================================================
+
+SIZE_UNITS = {'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+# Corpora are assembled from a pool of distinct blocks so that gigabytes of
+# text are written at disk speed instead of being sampled word by word
+BLOCK_SIZE = 1024 * 1024
+MAX_BLOCKS = 64
+
+WORDS_PER_LINE = 12
+
+# Paths reading the whole text into memory, skipped for larger corpora
+IN_MEMORY_CASES = ('read_file', 'clean_text', 'serial')
+STREAMING_CASES = ('streaming', 'mmap', 'parallel')
+CASES = IN_MEMORY_CASES + STREAMING_CASES
+
+DEFAULT_SIZES = ('1MB', '16MB')
+DEFAULT_CORPUS_DIRECTORY = Path(os.environ.get('TMPDIR', '/tmp')) / 'text_analyzer_corpora'
+DEFAULT_MAX_IN_MEMORY = '512MB'
+
+# ================================================================
+#                             CORPORA
+# ================================================================
+
+
+def parse_size(size: str) -> int:
+    """Converts a size such as '64MB' into a number of bytes.
+
+    Args:
+        size: A number of bytes, optionally followed by KB, MB or GB.
+
+    Returns:
+        The number of bytes.
+
+    Raises:
+        ValueError: If the size is not valid.
+    """
+    size = size.strip().upper()
+    unit = SIZE_UNITS.get(size[-2:], 1)
+    number = size[:-2] if size[-2:] in SIZE_UNITS else size
+
+    try:
+        value = int(float(number) * unit)
+    except ValueError:
+        raise ValueError(f'invalid size "{size}"')
+
+    if value <= 0:
+        raise ValueError(f'invalid size "{size}"')
+    return value
+
+
+def generate_vocabulary(size: int, generator: random.Random) -> list[str]:
+    """Generates distinct lowercase words, shorter words being more likely.
+
+    Args:
+        size: The number of words.
+        generator: The random generator.
+
+    Returns:
+        The words, in no particular order.
+    """
+    words = set()
+    while len(words) < size:
+        length = min(2 + int(generator.expovariate(0.3)), 16)
+        words.add(''.join(generator.choices(ascii_lowercase, k=length)))
+    return sorted(words)
+
+
+def generate_block(words: list[str], cumulative_weights: list[float],
+                   generator: random.Random) -> str:
+    """Generates about BLOCK_SIZE characters of Zipf-distributed sentences.
+
+    Args:
+        words: The vocabulary, most frequent word first.
+        cumulative_weights: The cumulative Zipf weights of the words.
+        generator: The random generator.
+
+    Returns:
+        Lines of capitalized sentences ending with a period.
+    """
+    lines = []
+    size = 0
+    total = cumulative_weights[-1]
+
+    while size < BLOCK_SIZE:
+        sentence = [words[bisect(cumulative_weights, generator.random() * total)]
+                    for _ in range(WORDS_PER_LINE)]
+        line = ' '.join(sentence).capitalize() + '.\n'
+        lines.append(line)
+        size += len(line)
+
+    return ''.join(lines)
+
+
+def generate_corpus(file_path: Path, size: int, vocabulary_size: int = 50_000,
+                    exponent: float = 1.0, seed: int = 0) -> Path:
+    """Writes a synthetic ASCII corpus whose word ranks follow Zipf's law.
+
+    The same arguments always produce the same file.
+
+    Args:
+        file_path: The path of the corpus.
+        size: The exact size of the corpus, in bytes.
+        vocabulary_size: The number of distinct words.
+        exponent: The Zipf exponent; the word of rank r has weight r ** -exponent.
+        seed: The seed of the random generator.
+
+    Returns:
+        The path of the corpus.
+    """
+    generator = random.Random(seed)
+    words = generate_vocabulary(vocabulary_size, generator)
+    generator.shuffle(words)
+    cumulative_weights = list(accumulate(rank ** -exponent
+                                         for rank in range(1, vocabulary_size + 1)))
+
+    blocks = [generate_block(words, cumulative_weights, generator).encode()
+              for _ in range(min(MAX_BLOCKS, -(-size // BLOCK_SIZE)))]
+
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = file_path.with_suffix('.tmp')
+
+    with open(temporary_path, 'wb') as file:
+        remaining = size
+        while remaining > 0:
+            block = generator.choice(blocks)[:remaining]
+            file.write(block)
+            remaining -= len(block)
+
+    os.replace(temporary_path, file_path)
+    return file_path
+
+
+def get_corpus(directory: Path, size: int, vocabulary_size: int, exponent: float,
+               seed: int) -> Path:
+    """Returns the path of a corpus, generating it unless it already exists.
+
+    Args:
+        directory: The directory where corpora are kept.
+        size: The size of the corpus, in bytes.
+        vocabulary_size: The number of distinct words.
+        exponent: The Zipf exponent.
+        seed: The seed of the random generator.
+
+    Returns:
+        The path of the corpus.
+    """
+    file_path = directory / f'zipf-{size}-{vocabulary_size}-{exponent}-{seed}.txt'
+
+    if not file_path.is_file() or file_path.stat().st_size != size:
+        print(f'Generating {file_path}', file=sys.stderr)
+        generate_corpus(file_path, size, vocabulary_size, exponent, seed)
+    return file_path
+
+# ================================================================
+#                           MEASUREMENTS
+# ================================================================
+
+
+def get_peak_rss() -> int:
+    """Returns the peak resident set size of this process and its children.
+
+    Returns:
+        The peak RSS, in bytes.
+    """
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # macOS reports bytes, other platforms kilobytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def prepare_case(case: str, file_path: Path, jobs: int):
+    """Builds the function timed by a benchmark case.
+
+    Setup work that is not part of the measured path, such as reading the
+    text passed to clean_text(), happens here.
+
+    Args:
+        case: One of CASES.
+        file_path: The path of the corpus.
+        jobs: The number of processes of the parallel case.
+
+    Returns:
+        The function to time, taking no argument.
+    """
+    filename = str(file_path)
+
+    if case == 'read_file':
+        return lambda: read_file(filename)
+    if case == 'clean_text':
+        text = read_file(filename)
+        return lambda: clean_text(text)
+    if case == 'serial':
+        return lambda: calculate_words_frequency(read_file(filename))
+    if case == 'streaming':
+        return lambda: analyze_file(filename)
+    if case == 'mmap':
+        return lambda: analyze_mapped_file(filename)
+    if case == 'parallel':
+        return lambda: analyze_file_parallel(filename, jobs)
+    raise ValueError(f'unknown benchmark case "{case}"')
+
+
+def measure(case: str, file_path: Path, jobs: int, repeat: int,
+            trace_allocations: bool) -> dict:
+    """Times a benchmark case, meant to run in a fresh process.
+
+    Args:
+        case: One of CASES.
+        file_path: The path of the corpus.
+        jobs: The number of processes of the parallel case.
+        repeat: The number of timed runs.
+        trace_allocations: Whether to run the case once more under
+            tracemalloc to record the peak of allocated memory. Memory
+            allocated by worker processes is not traced.
+
+    Returns:
+        dict: The timings, peak RSS and peak allocated memory of the case.
+    """
+    run = prepare_case(case, file_path, jobs)
+    timings = []
+
+    for _ in range(repeat):
+        start = perf_counter()
+        run()
+        timings.append(perf_counter() - start)
+
+    peak_rss = get_peak_rss()
+    peak_allocated = None
+
+    if trace_allocations:
+        tracemalloc.start()
+        run()
+        peak_allocated = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    size = file_path.stat().st_size
+    return {
+        'case': case,
+        'size': size,
+        'jobs': jobs if case == 'parallel' else 1,
+        'timings': timings,
+        'best': min(timings),
+        'median': median(timings),
+        'throughput_mb_s': size / min(timings) / SIZE_UNITS['MB'],
+        'peak_rss': peak_rss,
+        'peak_allocated': peak_allocated,
+    }
+
+
+def run_benchmarks(cases: list[str], corpora: list[Path], jobs: int, repeat: int,
+                   trace_allocations: bool, max_in_memory: int) -> list[dict]:
+    """Measures every case on every corpus, each in a fresh process.
+
+    A fresh process per measurement keeps the peak RSS of one case from
+    hiding the next one, and keeps warm caches from leaking across cases.
+
+    Args:
+        cases: The cases to measure.
+        corpora: The paths of the corpora.
+        jobs: The number of processes of the parallel case.
+        repeat: The number of timed runs of each case.
+        trace_allocations: Whether to record the peak of allocated memory.
+        max_in_memory: The largest corpus measured by the in-memory cases.
+
+    Returns:
+        The result of each measurement.
+    """
+    results = []
+
+    for file_path in corpora:
+        size = file_path.stat().st_size
+
+        for case in cases:
+            if case in IN_MEMORY_CASES and size > max_in_memory:
+                print(f'Skipping {case} on {size} bytes: above --max-in-memory',
+                      file=sys.stderr)
+                continue
+
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+                result = executor.submit(measure, case, file_path, jobs, repeat,
+                                         trace_allocations).result()
+
+            print(f'{case:<12}{size:>14} B{result["throughput_mb_s"]:>10.1f} MB/s'
+                  f'{result["peak_rss"] / SIZE_UNITS["MB"]:>10.1f} MB RSS', file=sys.stderr)
+            results.append(result)
+
+    return results
+
+
+def compare_results(results: list[dict], baseline: dict) -> None:
+    """Displays the throughput change of each measurement against a baseline.
+
+    Args:
+        results: The current measurements.
+        baseline: A report previously written by this script.
+    """
+    previous = {(result['case'], result['size'], result['jobs']): result
+                for result in baseline['results']}
+
+    print(f'\nCompared with {baseline.get("commit") or "baseline"}:', file=sys.stderr)
+    for result in results:
+        before = previous.get((result['case'], result['size'], result['jobs']))
+        if before is not None:
+            change = result['throughput_mb_s'] / before['throughput_mb_s'] - 1
+            print(f'{result["case"]:<12}{result["size"]:>14} B{change:>+10.1%}', file=sys.stderr)
+
+# ================================================================
+#                              UTILS
+# ================================================================
+
+
+def get_commit() -> str | None:
+    """Returns the current git commit, so that reports can be told apart.
+
+    Returns:
+        The commit hash, or None outside of a git checkout.
+    """
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True,
+                              check=True, cwd=Path(__file__).parent).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_arguments() -> argparse.Namespace:
+    """Parses command-line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description='Text Analyzer Benchmarks')
+
+    parser.add_argument('--sizes',
+                        nargs='+',
+                        default=DEFAULT_SIZES,
+                        metavar='SIZE',
+                        help='corpus sizes, such as 1MB or 5GB')
+
+    parser.add_argument('--cases',
+                        nargs='+',
+                        choices=CASES,
+                        default=CASES,
+                        metavar='CASE',
+                        help=f'paths to measure, among {", ".join(CASES)}')
+
+    parser.add_argument('--jobs',
+                        type=int,
+                        default=os.cpu_count() or 1,
+                        help='number of processes of the parallel path')
+
+    parser.add_argument('--repeat',
+                        type=int,
+                        default=3,
+                        help='number of timed runs of each path')
+
+    parser.add_argument('--vocabulary',
+                        type=int,
+                        default=50_000,
+                        help='number of distinct words of the corpora')
+
+    parser.add_argument('--exponent',
+                        type=float,
+                        default=1.0,
+                        help='Zipf exponent of the word frequencies')
+
+    parser.add_argument('--seed',
+                        type=int,
+                        default=0,
+                        help='seed of the corpus generator')
+
+    parser.add_argument('--corpus-dir',
+                        type=Path,
+                        default=DEFAULT_CORPUS_DIRECTORY,
+                        help='directory where generated corpora are kept')
+
+    parser.add_argument('--max-in-memory',
+                        default=DEFAULT_MAX_IN_MEMORY,
+                        metavar='SIZE',
+                        help='largest corpus measured by the paths reading the whole text')
+
+    parser.add_argument('--no-allocations',
+                        action='store_true',
+                        help='skip the extra tracemalloc run recording allocated memory')
+
+    parser.add_argument('--output',
+                        type=Path,
+                        help='file to write the JSON report to, instead of stdout')
+
+    parser.add_argument('--compare',
+                        type=Path,
+                        metavar='REPORT',
+                        help='previous JSON report to compare the throughputs with')
+
+    return parser.parse_args()
+
+
+def main() -> int:
+    """Main function to generate the corpora, run the benchmarks and report them.
+
+    Returns:
+        int: Exit code (0 for success, 1 for error).
+    """
+    try:
+        args = parse_arguments()
+
+        if args.jobs <= 0 or args.repeat <= 0 or args.vocabulary <= 0:
+            print('Error: --jobs, --repeat and --vocabulary must be positive integers.',
+                  file=sys.stderr)
+            return 1
+
+        sizes = [parse_size(size) for size in args.sizes]
+        baseline = json.loads(args.compare.read_text()) if args.compare else None
+
+        corpora = [get_corpus(args.corpus_dir, size, args.vocabulary, args.exponent, args.seed)
+                   for size in sizes]
+        results = run_benchmarks(args.cases, corpora, args.jobs, args.repeat,
+                                 not args.no_allocations, parse_size(args.max_in_memory))
+
+        report = {
+            'commit': get_commit(),
+            'date': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'corpus': {'vocabulary': args.vocabulary, 'exponent': args.exponent,
+                       'seed': args.seed},
+            'results': results,
+        }
+
+        if args.output:
+            args.output.write_text(json.dumps(report, indent=2) + '\n')
+        else:
+            print(json.dumps(report, indent=2))
+
+        if baseline is not None:
+            compare_results(results, baseline)
+        return 0
+    except (OSError, ValueError) as e:
+        print(f'Error: {e}', file=sys.stderr)
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
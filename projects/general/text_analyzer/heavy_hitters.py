@@ -0,0 +1,158 @@
+import heapq
+
+from collections import Counter
+from collections.abc import Iterable, Mapping
+from itertools import chain
+from operator import itemgetter
+
+
+class SpaceSaving:
+    """Approximate word counter that tracks at most `capacity` words.
+
+    Implements the Space-Saving algorithm: once the counter is full, a new
+    word replaces the least frequent one and inherits its count, which
+    becomes the error bound of the new word. For every tracked word,
+    `count - error <= true count <= count`, and every word whose true count
+    exceeds `total / capacity` is guaranteed to be tracked.
+    """
+
+    def __init__(self, capacity: int):
+        """Initializes a SpaceSaving object.
+
+        Args:
+            capacity: The maximum number of tracked words.
+
+        Raises:
+            ValueError: If the capacity is not a positive integer.
+        """
+        if capacity <= 0:
+            raise ValueError('capacity must be a positive integer')
+
+        self.capacity = capacity
+        self.total = 0
+        self.counts = {}
+        self.errors = {}
+        # One (count when pushed, word) entry per tracked word. Counts only
+        # grow, so outdated entries are refreshed lazily when they surface.
+        self.heap = []
+
+    def __len__(self) -> int:
+        """Returns the number of tracked words."""
+        return len(self.counts)
+
+    def update(self, words: 'Iterable[str] | Mapping[str, int] | SpaceSaving') -> None:
+        """Counts words, like Counter.update().
+
+        Args:
+            words: The words to count, a mapping of words to counts, or
+                another SpaceSaving counter to merge.
+        """
+        if isinstance(words, SpaceSaving):
+            self.merge(words)
+            return
+
+        if not isinstance(words, Mapping):
+            # Aggregate the batch first so repeated words cost a single update
+            words = Counter(words)
+
+        for word, count in words.items():
+            self.add(word, count)
+
+    def add(self, word: str, count: int = 1) -> None:
+        """Counts a word a given number of times.
+
+        Args:
+            word: The word to count.
+            count: The number of occurrences.
+        """
+        self.total += count
+
+        if word in self.counts:
+            self.counts[word] += count
+        elif len(self.counts) < self.capacity:
+            self.counts[word] = count
+            self.errors[word] = 0
+            heapq.heappush(self.heap, (count, word))
+        else:
+            minimum_word, minimum = self.pop_minimum()
+            del self.counts[minimum_word], self.errors[minimum_word]
+
+            self.counts[word] = minimum + count
+            self.errors[word] = minimum
+            heapq.heappush(self.heap, (minimum + count, word))
+
+    def pop_minimum(self) -> tuple[str, int]:
+        """Removes the least frequent word from the heap.
+
+        Returns:
+            The least frequent word and its count.
+        """
+        while True:
+            count, word = self.heap[0]
+            current = self.counts[word]
+
+            if current == count:
+                heapq.heappop(self.heap)
+                return word, count
+
+            heapq.heapreplace(self.heap, (current, word))
+
+    def minimum(self) -> int:
+        """Returns the count a word missing from a full counter may have.
+
+        Returns:
+            The smallest tracked count, or 0 while the counter is not full.
+        """
+        if len(self.counts) < self.capacity:
+            return 0
+        return min(self.counts.values())
+
+    def merge(self, other: 'SpaceSaving') -> None:
+        """Merges the counts of another SpaceSaving counter.
+
+        Words missing from one counter are assumed to have its minimum count,
+        which is added to both their count and error bound.
+
+        Args:
+            other: The counter to merge.
+        """
+        floor, other_floor = self.minimum(), other.minimum()
+        counts, errors = {}, {}
+
+        for word in dict.fromkeys(chain(self.counts, other.counts)):
+            counts[word] = self.counts.get(word, floor) + \
+                other.counts.get(word, other_floor)
+            errors[word] = self.errors.get(word, floor) + \
+                other.errors.get(word, other_floor)
+
+        kept = heapq.nlargest(self.capacity, counts.items(), key=itemgetter(1))
+
+        self.total += other.total
+        self.counts = dict(kept)
+        self.errors = {word: errors[word] for word in self.counts}
+        self.heap = [(count, word) for word, count in kept]
+        heapq.heapify(self.heap)
+
+    def error(self, word: str) -> int:
+        """Returns how much the count of a tracked word may be overestimated.
+
+        Args:
+            word: The tracked word.
+
+        Returns:
+            The error bound of the word.
+        """
+        return self.errors[word]
+
+    def most_common(self, number: int | None = None) -> list[tuple[str, int]]:
+        """Returns the most frequent tracked words, like Counter.most_common().
+
+        Args:
+            number: Optional number of most frequent words to return.
+
+        Returns:
+            The (word, count) pairs sorted by decreasing count.
+        """
+        if number is None:
+            return sorted(self.counts.items(), key=itemgetter(1), reverse=True)
+        return heapq.nlargest(number, self.counts.items(), key=itemgetter(1))
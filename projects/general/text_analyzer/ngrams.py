@@ -0,0 +1,196 @@
+from array import array
+from collections import Counter
+from collections.abc import Iterable
+from typing import Callable
+
+# ================================================================
+#                            CONSTANTS
+# ================================================================
+
+# Word IDs are packed side by side into a single integer key
+ID_BITS = 32
+ID_MASK = (1 << ID_BITS) - 1
+
+# ================================================================
+#                            VOCABULARY
+# ================================================================
+
+
+class Vocabulary:
+    """Interns words as compact integer IDs, assigned in order of appearance."""
+
+    def __init__(self):
+        """Initializes a Vocabulary object."""
+        self.ids = {}
+        self.words = []
+
+    def __len__(self) -> int:
+        """Returns the number of distinct words."""
+        return len(self.ids)
+
+    def intern(self, words: Iterable[str]) -> array:
+        """Converts words into their IDs, assigning IDs to new words.
+
+        Args:
+            words: The words to convert.
+
+        Returns:
+            The IDs of the words.
+        """
+        ids = self.ids
+        return array('I', [ids.setdefault(word, len(ids)) for word in words])
+
+    def decode(self, word_id: int) -> str:
+        """Returns the word of an ID.
+
+        Args:
+            word_id: The ID of the word.
+
+        Returns:
+            The word.
+        """
+        if word_id >= len(self.words):
+            self.words = list(self.ids)
+        return self.words[word_id]
+
+
+def unpack_key(key: int, size: int) -> list[int]:
+    """Splits a packed key into the word IDs it is made of.
+
+    Args:
+        key: The packed key.
+        size: The number of word IDs in the key.
+
+    Returns:
+        The word IDs, in order.
+    """
+    return [(key >> (ID_BITS * shift)) & ID_MASK for shift in range(size - 1, -1, -1)]
+
+# ================================================================
+#                             COUNTERS
+# ================================================================
+
+
+class NGramCounter:
+    """Counts the n-grams of a stream of words.
+
+    Each n-gram is stored as a single integer packing the IDs of its words,
+    and only the IDs of the last n - 1 words are kept between updates.
+    """
+
+    def __init__(self, size: int, vocabulary: Vocabulary | None = None,
+                 counter_factory: Callable[[], Counter] = Counter):
+        """Initializes a NGramCounter object.
+
+        Args:
+            size: The number of words of each n-gram.
+            vocabulary: Optional vocabulary shared with other counters.
+            counter_factory: Creates the object counting the packed n-grams.
+
+        Raises:
+            ValueError: If the size is not a positive integer.
+        """
+        if size <= 0:
+            raise ValueError('n-gram size must be a positive integer')
+
+        self.size = size
+        self.vocabulary = Vocabulary() if vocabulary is None else vocabulary
+        self.counts = counter_factory()
+        self.history = array('I')
+
+    def update(self, words: Iterable[str]) -> None:
+        """Counts the n-grams ending at the given words.
+
+        Args:
+            words: The words following the previously counted ones.
+        """
+        ids = self.history + self.vocabulary.intern(words)
+        first_words = max(len(ids) - self.size + 1, 0)
+
+        keys = ids[:first_words]
+        for offset in range(1, self.size):
+            keys = [key << ID_BITS | word_id for key, word_id in zip(keys, ids[offset:])]
+
+        self.counts.update(keys)
+        self.history = ids[first_words:]
+
+    def reset(self) -> None:
+        """Forgets the last words, so that no n-gram spans the next update."""
+        self.history = array('I')
+
+    def most_common(self, number: int | None = None) -> list[tuple[tuple[str, ...], int]]:
+        """Returns the most frequent n-grams.
+
+        Args:
+            number: Optional number of most frequent n-grams to return.
+
+        Returns:
+            The (n-gram, count) pairs sorted by decreasing count.
+        """
+        decode = self.vocabulary.decode
+        return [(tuple(map(decode, unpack_key(key, self.size))), count)
+                for key, count in self.counts.most_common(number)]
+
+
+class CooccurrenceCounter:
+    """Counts how often two words appear within a sliding window.
+
+    Pairs are unordered and stored as a single integer packing the smaller
+    and the larger word ID. Only the IDs of the last `window` words are kept
+    between updates.
+    """
+
+    def __init__(self, window: int, vocabulary: Vocabulary | None = None,
+                 counter_factory: Callable[[], Counter] = Counter):
+        """Initializes a CooccurrenceCounter object.
+
+        Args:
+            window: The maximum distance between two co-occurring words.
+            vocabulary: Optional vocabulary shared with other counters.
+            counter_factory: Creates the object counting the packed pairs.
+
+        Raises:
+            ValueError: If the window is not a positive integer.
+        """
+        if window <= 0:
+            raise ValueError('co-occurrence window must be a positive integer')
+
+        self.window = window
+        self.vocabulary = Vocabulary() if vocabulary is None else vocabulary
+        self.counts = counter_factory()
+        self.history = array('I')
+
+    def update(self, words: Iterable[str]) -> None:
+        """Counts the pairs formed by the given words and the preceding ones.
+
+        Args:
+            words: The words following the previously counted ones.
+        """
+        history_size = len(self.history)
+        ids = self.history + self.vocabulary.intern(words)
+
+        for distance in range(1, self.window + 1):
+            # Pairs already counted in a previous update are skipped
+            start = max(history_size - distance, 0)
+            self.counts.update(
+                first << ID_BITS | second if first <= second else second << ID_BITS | first
+                for first, second in zip(ids[start:], ids[start + distance:]))
+
+        self.history = ids[-self.window:]
+
+    def reset(self) -> None:
+        """Forgets the last words, so that no pair spans the next update."""
+        self.history = array('I')
+
+    def most_common(self, number: int | None = None) -> list[tuple[tuple[str, str], int]]:
+        """Returns the most frequent pairs.
+
+        Args:
+            number: Optional number of most frequent pairs to return.
+
+        Returns:
+            The (pair, count) pairs sorted by decreasing count.
+        """
+        decode = self.vocabulary.decode
+        return [(tuple(map(decode, unpack_key(key, 2))), count)
+                for key, count in self.counts.most_common(number)]
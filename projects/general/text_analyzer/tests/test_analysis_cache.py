@@ -0,0 +1,39 @@
+import os
+
+from projects.general.text_analyzer.analysis_cache import AnalysisCache
+
+
+def test_put_and_get(tmp_path):
+    cache = AnalysisCache(tmp_path / "cache")
+    file_path = tmp_path / "sample.txt"
+    cache.put(file_path, {"size": 4})
+
+    assert cache.get(file_path) == {"size": 4, "path": str(file_path.resolve())}
+    assert cache.get(tmp_path / "other.txt") is None
+
+
+def test_get_corrupted_entry(tmp_path):
+    cache = AnalysisCache(tmp_path)
+    file_path = tmp_path / "sample.txt"
+    cache.get_entry_path(file_path).write_text("{")
+
+    assert cache.get(file_path) is None
+
+
+def test_prune_evicts_least_recently_used(tmp_path):
+    cache = AnalysisCache(tmp_path / "cache")
+    paths = [tmp_path / f"{index}.txt" for index in range(3)]
+
+    for age, file_path in enumerate(paths):
+        cache.put(file_path, {"size": 0})
+        entry_time = 1_000_000 + age
+        os.utime(cache.get_entry_path(file_path), (entry_time, entry_time))
+
+    # Room for two entries only
+    cache.max_size = 2 * cache.get_entry_path(paths[0]).stat().st_size
+    cache.get(paths[0])
+    cache.prune()
+
+    assert cache.get(paths[0]) is not None
+    assert cache.get(paths[1]) is None
+    assert cache.get(paths[2]) is not None
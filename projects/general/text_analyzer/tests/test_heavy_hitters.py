@@ -0,0 +1,57 @@
+import io
+from collections import Counter
+from functools import partial
+
+import pytest
+
+from projects.general.text_analyzer.heavy_hitters import SpaceSaving
+from projects.general.text_analyzer.text_statistics import analyze_stream
+
+
+def test_space_saving_exact_below_capacity():
+    counter = SpaceSaving(10)
+    counter.update("a b a c a b".split())
+
+    assert counter.most_common() == [("a", 3), ("b", 2), ("c", 1)]
+    assert counter.error("a") == 0
+    assert counter.total == 6
+
+
+def test_space_saving_error_bounds():
+    words = ["common"] * 50 + [f"rare{index}" for index in range(100)] + ["frequent"] * 30
+    counter = SpaceSaving(5)
+    counter.update(words)
+    true_counts = Counter(words)
+
+    assert len(counter) == 5
+    assert {word for word, _ in counter.most_common(2)} == {"common", "frequent"}
+    for word, count in counter.most_common():
+        assert count - counter.error(word) <= true_counts[word] <= count
+
+
+def test_space_saving_merge():
+    first, second = SpaceSaving(3), SpaceSaving(3)
+    first.update("a a a b c".split())
+    second.update("a d d e".split())
+    first.update(second)
+
+    assert first.total == 9
+    assert first.most_common(1) == [("a", 4)]
+    assert len(first) == 3
+
+
+def test_space_saving_invalid_capacity():
+    with pytest.raises(ValueError):
+        SpaceSaving(0)
+
+
+def test_analyze_stream_with_space_saving():
+    text = "to be or not to be, that is the question: to be"
+    statistics = analyze_stream(
+        io.StringIO(text), chunk_size=4, counter_factory=partial(SpaceSaving, 6)
+    )
+
+    assert statistics.words == 12
+    assert statistics.most_common(2) == {"to": 3, "be": 3}
+    assert statistics.frequency.error("to") == 0
+    assert len(statistics.frequency) == 6
@@ -0,0 +1,98 @@
+import io
+import random
+from collections import Counter
+from functools import partial
+
+import pytest
+
+from projects.general.text_analyzer.heavy_hitters import SpaceSaving
+from projects.general.text_analyzer.ngrams import (
+    CooccurrenceCounter,
+    NGramCounter,
+    Vocabulary,
+    unpack_key,
+)
+from projects.general.text_analyzer.text_statistics import analyze_stream
+
+
+def feed_in_batches(counter, words, seed=0):
+    generator = random.Random(seed)
+    index = 0
+    while index < len(words):
+        size = generator.randint(0, 5)
+        counter.update(words[index:index + size])
+        index += size
+
+
+def test_vocabulary_interns_words_in_order():
+    vocabulary = Vocabulary()
+
+    assert list(vocabulary.intern("b a b c".split())) == [0, 1, 0, 2]
+    assert list(vocabulary.intern(["c", "d"])) == [2, 3]
+    assert len(vocabulary) == 4
+    assert [vocabulary.decode(word_id) for word_id in range(4)] == ["b", "a", "c", "d"]
+
+
+def test_unpack_key():
+    assert unpack_key(1 << 64 | 2 << 32 | 3, 3) == [1, 2, 3]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 5])
+def test_ngram_counter_matches_tuples_across_batches(size):
+    words = random.Random(size).choices("a b c d e".split(), k=300)
+    counter = NGramCounter(size)
+    feed_in_batches(counter, words)
+
+    expected = Counter(tuple(words[index:index + size])
+                       for index in range(len(words) - size + 1))
+    assert dict(counter.most_common()) == dict(expected)
+
+
+def test_ngram_counter_reset():
+    counter = NGramCounter(2)
+    counter.update(["a", "b"])
+    counter.reset()
+    counter.update(["c"])
+
+    assert counter.most_common() == [(("a", "b"), 1)]
+
+
+@pytest.mark.parametrize("window", [1, 2, 4])
+def test_cooccurrence_counter_matches_pairs_across_batches(window):
+    words = random.Random(window).choices("a b c d e".split(), k=300)
+    counter = CooccurrenceCounter(window)
+    feed_in_batches(counter, words)
+
+    expected = Counter(tuple(sorted((words[index], words[index + distance])))
+                       for distance in range(1, window + 1)
+                       for index in range(len(words) - distance))
+    counted = Counter({tuple(sorted(pair)): count for pair, count in counter.most_common()})
+    assert counted == expected
+
+
+def test_counters_reject_non_positive_sizes():
+    with pytest.raises(ValueError):
+        NGramCounter(0)
+    with pytest.raises(ValueError):
+        CooccurrenceCounter(0)
+
+
+def test_analyze_stream_feeds_ngram_listeners():
+    text = "The cat sat.\nThe cat ran, the cat sat!"
+    vocabulary = Vocabulary()
+    bigrams = NGramCounter(2, vocabulary)
+    pairs = CooccurrenceCounter(1, vocabulary)
+
+    statistics = analyze_stream(io.StringIO(text), chunk_size=3, listeners=[bigrams, pairs])
+
+    assert statistics.words == 9
+    assert bigrams.most_common(2) == [(("the", "cat"), 3), (("cat", "sat"), 2)]
+    assert dict(pairs.most_common())[("the", "cat")] == 3
+
+
+def test_ngram_counter_with_approximate_counts():
+    words = ["a", "b"] * 50 + [f"rare{index}" for index in range(40)]
+    counter = NGramCounter(2, counter_factory=partial(SpaceSaving, 8))
+    counter.update(words)
+
+    assert counter.most_common(1)[0][0] in {("a", "b"), ("b", "a")}
@@ -1,9 +1,29 @@
+import csv
+import io
+import json
+
+import pytest
+
+from projects.general.text_analyzer.analysis_cache import AnalysisCache
 from projects.general.text_analyzer.text_statistics import (
+    RECORD_FIELDS,
+    ReportWriter,
+    Tokenizer,
+    analyze_cached_file,
+    analyze_file,
+    analyze_file_parallel,
+    analyze_file_incrementally,
+    analyze_files,
+    analyze_mapped_file,
+    analyze_stream,
+    analyze_text,
     calculate_characters_count,
     calculate_lines_count,
     calculate_words_count,
     calculate_words_frequency,
     clean_text,
+    expand_paths,
+    find_shard_offsets,
 )
 
 
@@ -36,3 +56,284 @@ def test_calculate_words_frequency():
 def test_clean_text():
     text = "This is a sample text."
     assert clean_text(text) == "this is a sample text"
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 1024])
+def test_analyze_stream_chunk_boundaries(chunk_size):
+    text = "Lorem ipsum, dolor\r\nsit amet.\n\nLorem   IPSUM dolor"
+    statistics = analyze_stream(io.StringIO(text, newline=""), chunk_size)
+
+    assert statistics.words == calculate_words_count(text) == 8
+    assert statistics.lines == len(text.splitlines()) == 4
+    assert statistics.characters == len(text)
+    assert statistics.most_common(2) == {"lorem": 2, "ipsum": 2}
+
+
+def test_analyze_text_merge():
+    first = analyze_text("one two\nthree ")
+    first.merge(analyze_text("four\nfive two"))
+
+    assert first.words == 6
+    assert first.lines == 3
+    assert first.characters == 27
+    assert first.most_common(1) == {"two": 2}
+
+
+def test_analyze_file(tmp_path):
+    file_path = tmp_path / "sample.txt"
+    file_path.write_text("This is a sample text.\nThis is another line.")
+    statistics = analyze_file(str(file_path), chunk_size=4)
+
+    assert statistics.words == 9
+    assert statistics.lines == 2
+    assert statistics.most_common(2) == {"this": 2, "is": 2}
+
+
+def test_analyze_file_not_found(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        analyze_file(str(tmp_path / "missing.txt"))
+
+
+def test_find_shard_offsets(tmp_path):
+    file_path = tmp_path / "shards.txt"
+    file_path.write_bytes(b"aaaa bbbb\r\ncccc dddd")
+    offsets = find_shard_offsets(file_path, 4)
+
+    assert offsets == [0, 11, 16, 20]
+
+
+@pytest.mark.parametrize("number", [None, 1, 3])
+def test_analyze_file_parallel(tmp_path, number):
+    file_path = tmp_path / "parallel.txt"
+    file_path.write_text("b a c\nc b a\r\nd a b\n" * 50 + "e f")
+    serial = analyze_file(str(file_path))
+    parallel = analyze_file_parallel(str(file_path), 3, number)
+
+    assert parallel.words == serial.words
+    assert parallel.lines == serial.lines
+    assert parallel.characters == serial.characters
+    assert list(parallel.most_common(number).items()) == list(
+        serial.most_common(number).items()
+    )
+
+
+@pytest.mark.parametrize("chunk_size", [1, 3, 1024])
+def test_analyze_mapped_file(tmp_path, chunk_size):
+    file_path = tmp_path / "mapped.txt"
+    file_path.write_bytes("Été, ÉTÉ!\r\ncafé\u2028Café\xa0noir\n".encode())
+    serial = analyze_file(str(file_path))
+    mapped = analyze_mapped_file(str(file_path), chunk_size)
+
+    assert mapped.words == serial.words == 5
+    assert mapped.lines == serial.lines == 3
+    assert mapped.characters == serial.characters
+    assert mapped.most_common() == serial.most_common()
+
+
+def test_analyze_mapped_file_empty(tmp_path):
+    file_path = tmp_path / "empty.txt"
+    file_path.touch()
+    statistics = analyze_mapped_file(str(file_path))
+
+    assert statistics.words == statistics.lines == statistics.characters == 0
+
+
+def test_expand_paths(tmp_path):
+    (tmp_path / "nested").mkdir()
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "b.log").write_text("b")
+    (tmp_path / "nested" / "c.txt").write_text("c")
+    filenames = expand_paths(
+        [str(tmp_path / "*.txt"), str(tmp_path), str(tmp_path / "missing.txt")]
+    )
+
+    assert filenames == [
+        str(tmp_path / "a.txt"),
+        str(tmp_path / "b.log"),
+        str(tmp_path / "nested" / "c.txt"),
+        str(tmp_path / "missing.txt"),
+    ]
+
+
+def test_expand_paths_skips_binary_and_hidden_files(tmp_path):
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / ".git").mkdir()
+    (tmp_path / "a.txt").write_text("a")
+    (tmp_path / "image.png").write_bytes(b"\x89PNG\r\n\x1a\n\0\0\0\rIHDR")
+    (tmp_path / "__pycache__" / "a.pyc").write_bytes(b"\xa7\r\r\n\0\0\0\0")
+    (tmp_path / ".git" / "HEAD").write_text("ref: refs/heads/main")
+    (tmp_path / ".hidden.txt").write_text("hidden")
+
+    assert expand_paths([str(tmp_path)]) == [str(tmp_path / "a.txt")]
+
+
+def test_expand_paths_no_match(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        expand_paths([str(tmp_path / "*.txt")])
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_analyze_files(tmp_path, jobs):
+    (tmp_path / "a.txt").write_text("one two two")
+    (tmp_path / "b.txt").write_text("three")
+    filenames = [str(tmp_path / name) for name in ("a.txt", "b.txt", "c.txt")]
+    results = dict(analyze_files(filenames, jobs))
+
+    assert results[filenames[0]].most_common() == {"two": 2, "one": 1}
+    assert results[filenames[1]].words == 1
+    assert isinstance(results[filenames[2]], FileNotFoundError)
+
+
+def test_analyze_file_incrementally(tmp_path):
+    file_path = tmp_path / "log.txt"
+    file_path.write_text("first line\nsecond li")
+    _, entry = analyze_file_incrementally(str(file_path))
+
+    statistics, unchanged = analyze_file_incrementally(str(file_path), entry)
+    assert unchanged is None
+    assert statistics.words == 4
+
+    with open(file_path, "a") as file:
+        file.write("ne\nthird line\n")
+    statistics, entry = analyze_file_incrementally(str(file_path), entry)
+
+    assert entry["size"] == file_path.stat().st_size
+    assert statistics.most_common() == analyze_file(str(file_path)).most_common()
+    assert statistics.lines == 3
+
+
+def test_analyze_file_incrementally_split_crlf(tmp_path):
+    file_path = tmp_path / "log.txt"
+    file_path.write_bytes(b"first line\r")
+    statistics, entry = analyze_file_incrementally(str(file_path))
+    assert statistics.lines == 1
+
+    statistics, unchanged = analyze_file_incrementally(str(file_path), entry)
+    assert unchanged is None
+    assert statistics.lines == 1
+
+    with open(file_path, "ab") as file:
+        file.write(b"\nsecond line\r\n")
+    statistics, _ = analyze_file_incrementally(str(file_path), entry)
+
+    assert statistics.lines == 2
+    assert statistics.characters == analyze_file(str(file_path)).characters
+
+
+def test_analyze_cached_file_with_different_stemmers(tmp_path):
+    cache = AnalysisCache(tmp_path / "cache")
+    file_path = tmp_path / "words.txt"
+    file_path.write_text("cats dogs")
+    strip_s = Tokenizer(stemmer=lambda word: word.removesuffix("s"))
+    strip_first = Tokenizer(stemmer=lambda word: word[1:])
+
+    first = analyze_cached_file(str(file_path), cache, strip_s)
+    second = analyze_cached_file(str(file_path), cache, strip_first)
+
+    assert first.most_common() == {"cat": 1, "dog": 1}
+    assert second.most_common() == {"ats": 1, "ogs": 1}
+    assert cache.get(file_path) is None
+
+
+def test_analyze_file_incrementally_modified(tmp_path):
+    file_path = tmp_path / "log.txt"
+    file_path.write_text("one two")
+    _, entry = analyze_file_incrementally(str(file_path))
+    file_path.write_text("three four five")
+    statistics, _ = analyze_file_incrementally(str(file_path), entry)
+
+    assert statistics.most_common() == {"three": 1, "four": 1, "five": 1}
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 1024])
+def test_tokenizer_tokenize(chunk_size):
+    tokenizer = Tokenizer()
+    tokens = tokenizer.tokenize("This is a sample text.\nIt's   a TEST!", chunk_size)
+
+    assert not isinstance(tokens, list)
+    assert list(tokens) == ["this", "is", "a", "sample", "text", "its", "a", "test"]
+
+
+def test_tokenizer_stages():
+    tokenizer = Tokenizer(
+        unicode_punctuation=True,
+        stop_words=("The", "a"),
+        stemmer=lambda word: word.removesuffix("s"),
+        word_stages=(lambda word: None if word.isdigit() else word,),
+    )
+
+    assert tokenizer.split_words("The cats «sleep» on a mat — 42 times") == [
+        "cat",
+        "sleep",
+        "on",
+        "mat",
+        "time",
+    ]
+    # Stop words only go through the text stages
+    assert tokenizer.stop_words == {"the", "a"}
+    assert tokenizer.key is None
+
+
+def test_calculate_words_frequency_with_tokenizer():
+    tokenizer = Tokenizer(lowercase=False, stop_words=("is",))
+    text = "This is a sample text. this is it."
+
+    assert calculate_words_count(text, tokenizer) == 6
+    assert calculate_words_frequency(text, 2, tokenizer) == {"This": 1, "a": 1}
+
+
+def test_analyze_file_reads_stdin(monkeypatch):
+    monkeypatch.setattr("sys.stdin", io.StringIO("one two\ntwo"))
+
+    statistics = analyze_file("-")
+
+    assert (statistics.words, statistics.lines) == (3, 2)
+    assert expand_paths(["-"]) == ["-"]
+
+
+def test_report_writer_json():
+    stream = io.StringIO()
+    writer = ReportWriter("json", stream)
+    writer.write(analyze_text("b a b"), 1, "first.txt")
+    writer.write(analyze_text("c"), None, ngrams={"2-gram": [(("a", "b"), 1)]})
+    writer.close()
+
+    first, corpus = json.loads(stream.getvalue())
+    assert first == {"file": "first.txt", "words": 3, "lines": 1, "characters": 5,
+                     "frequency": [{"word": "b", "count": 2}]}
+    assert corpus["file"] is None
+    assert corpus["ngrams"] == {"2-gram": [{"words": ["a", "b"], "count": 1}]}
+
+
+def test_report_writer_empty_json():
+    stream = io.StringIO()
+    ReportWriter("json", stream).close()
+
+    assert json.loads(stream.getvalue()) == []
+
+
+@pytest.mark.parametrize("output_format", ["csv", "ndjson"])
+def test_report_writer_records(output_format):
+    stream = io.StringIO()
+    writer = ReportWriter(output_format, stream)
+    writer.write(analyze_text("b a b"), 1, "first.txt")
+    writer.close()
+
+    if output_format == "csv":
+        records = list(csv.DictReader(io.StringIO(stream.getvalue())))
+        assert tuple(records[0]) == RECORD_FIELDS
+    else:
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+
+    assert [(record["type"], record["key"], str(record["count"])) for record in records] == [
+        ("total", "words", "3"),
+        ("total", "lines", "1"),
+        ("total", "characters", "5"),
+        ("word", "b", "2"),
+    ]
+    assert "\x1b" not in stream.getvalue()
+
+
+def test_report_writer_rejects_unknown_format():
+    with pytest.raises(ValueError):
+        ReportWriter("xml")
@@ -1,6 +1,100 @@
+import os
 import sys
 
-from text_statistics import display_statistics, read_file, parse_arguments
+from collections import Counter
+from functools import partial
+from typing import Callable
+
+from analysis_cache import AnalysisCache
+from heavy_hitters import SpaceSaving
+from ngrams import CooccurrenceCounter, NGramCounter, Vocabulary
+from text_statistics import (
+    ReportWriter,
+    TextStatistics,
+    Tokenizer,
+    analyze_cached_file,
+    analyze_file,
+    analyze_files,
+    analyze_path,
+    expand_paths,
+    parse_arguments,
+)
+
+
+def display_batch_statistics(writer: ReportWriter, filenames: list[str],
+                             number: int | None, jobs: int, use_mmap: bool,
+                             counter_factory: Callable[[], Counter],
+                             cache: AnalysisCache | None, tokenizer: Tokenizer) -> int:
+    """Displays the statistics of each file as it finishes, then the corpus totals.
+
+    Args:
+        writer: Writes the report of each file.
+        filenames: The names of the files to analyze.
+        number: Optional number of most frequent words to display.
+        jobs: The number of worker processes.
+        use_mmap: Whether to analyze the memory-mapped bytes of the files.
+        counter_factory: Creates the object counting word frequencies.
+        cache: Optional cache of previous analyses.
+        tokenizer: Splits the text into normalized words.
+
+    Returns:
+        int: Exit code (0 for success, 1 if any file failed).
+    """
+    corpus = TextStatistics(frequency=counter_factory())
+    failures = 0
+
+    for filename, result in analyze_files(filenames, jobs, use_mmap, counter_factory,
+                                          cache, tokenizer):
+        if isinstance(result, Exception):
+            print(f'Error: {filename}: {result}', file=sys.stderr)
+            failures += 1
+            continue
+
+        writer.write(result, number, filename, title=filename)
+        corpus.merge(result, contiguous=False)
+
+    writer.write(corpus, number, title=f'Corpus ({len(filenames) - failures} files)')
+    return 1 if failures else 0
+
+
+def display_ngram_statistics(writer: ReportWriter, filenames: list[str],
+                             number: int | None, counter_factory: Callable[[], Counter],
+                             tokenizer: Tokenizer,
+                             ngrams: dict[str, NGramCounter | CooccurrenceCounter]) -> int:
+    """Displays the statistics of the files along with their n-gram counts.
+
+    The files are read one after the other by the text reader, so that the
+    n-gram counters see the words in order. No n-gram spans two files.
+
+    Args:
+        writer: Writes the report of each file.
+        filenames: The names of the files to analyze.
+        number: Optional number of most frequent words and n-grams to display.
+        counter_factory: Creates the object counting word frequencies.
+        tokenizer: Splits the text into normalized words.
+        ngrams: The n-gram counters, by kind.
+
+    Returns:
+        int: Exit code (0 for success).
+    """
+    corpus = TextStatistics(frequency=counter_factory())
+
+    for filename in filenames:
+        statistics = analyze_file(filename, counter_factory=counter_factory,
+                                  tokenizer=tokenizer, listeners=ngrams.values())
+        for counter in ngrams.values():
+            counter.reset()
+
+        if len(filenames) > 1:
+            writer.write(statistics, number, filename, title=filename)
+        corpus.merge(statistics, contiguous=False)
+
+    counts = {kind: counter.most_common(number) for kind, counter in ngrams.items()}
+    if len(filenames) > 1:
+        writer.write(corpus, number, title=f'Corpus ({len(filenames)} files)', ngrams=counts)
+    else:
+        writer.write(corpus, number, filenames[0], ngrams=counts)
+    return 0
 
 
 def main() -> int:
@@ -11,20 +105,92 @@ def main() -> int:
     """
     try:
         args = parse_arguments()
-        filename, words = args.filename, args.words
+        words, jobs, use_mmap, capacity = args.words, args.jobs, args.mmap, args.approximate
 
         if words is not None and words <= 0:
-            print('Error: --words must be a positive integer.')
+            print('Error: --words must be a positive integer.', file=sys.stderr)
+            return 1
+
+        if jobs <= 0:
+            print('Error: --jobs must be a positive integer.', file=sys.stderr)
+            return 1
+
+        counter_factory = Counter
+        if capacity is not None:
+            if capacity <= 0:
+                print('Error: --approximate must be a positive integer.', file=sys.stderr)
+                return 1
+            if use_mmap:
+                print('Error: --approximate cannot be combined with --mmap.', file=sys.stderr)
+                return 1
+            counter_factory = partial(SpaceSaving, capacity)
+
+        # N-gram counters share one vocabulary and see the words in text order
+        vocabulary = Vocabulary()
+        ngrams = {}
+        if args.ngrams is not None:
+            if args.ngrams <= 0:
+                print('Error: --ngrams must be a positive integer.', file=sys.stderr)
+                return 1
+            ngrams[f'{args.ngrams}-gram'] = NGramCounter(
+                args.ngrams, vocabulary, counter_factory)
+        if args.cooccur is not None:
+            if args.cooccur <= 0:
+                print('Error: --cooccur must be a positive integer.', file=sys.stderr)
+                return 1
+            ngrams['co-occurrence'] = CooccurrenceCounter(
+                args.cooccur, vocabulary, counter_factory)
+        if ngrams and (use_mmap or jobs > 1):
+            print('Error: --ngrams and --cooccur cannot be combined with --mmap or --jobs.',
+                  file=sys.stderr)
             return 1
 
-        original_text = read_file(filename)
-        display_statistics(original_text, words)
-        return 0
+        tokenizer = Tokenizer(unicode_punctuation=args.unicode_punctuation,
+                              stop_words=args.ignore)
+        filenames = expand_paths(args.filenames)
+
+        if capacity is not None and jobs > 1 and len(filenames) == 1:
+            print('Error: --approximate cannot split a single file with --jobs.',
+                  file=sys.stderr)
+            return 1
+
+        # Cached entries hold exact frequencies computed by the text reader
+        cache = None
+        if not (args.no_cache or use_mmap or capacity is not None or ngrams
+                or (jobs > 1 and len(filenames) == 1)):
+            cache = AnalysisCache()
+
+        writer = ReportWriter(args.format)
+
+        if ngrams:
+            exit_code = display_ngram_statistics(writer, filenames, words, counter_factory,
+                                                 tokenizer, ngrams)
+        elif len(filenames) > 1:
+            exit_code = display_batch_statistics(writer, filenames, words, jobs, use_mmap,
+                                                 counter_factory, cache, tokenizer)
+        else:
+            if cache is not None:
+                statistics = analyze_cached_file(filenames[0], cache, tokenizer)
+            else:
+                statistics = analyze_path(filenames[0], jobs, words, use_mmap,
+                                          counter_factory, tokenizer)
+            writer.write(statistics, words, filenames[0])
+            exit_code = 0
+
+        writer.close()
+
+        if cache is not None:
+            cache.prune()
+        return exit_code
+    except BrokenPipeError:
+        # The reader of the output went away, e.g. `| head`: stop quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
     except FileNotFoundError as e:
-        print(f'Error: {e}')
+        print(f'Error: {e}', file=sys.stderr)
         return 1
     except Exception as e:
-        print(f'Error: An unexpected error occurred: {e}')
+        print(f'Error: An unexpected error occurred: {e}', file=sys.stderr)
         return 1
 
 
@@ -1,23 +1,1133 @@
 import argparse
+import csv
+import heapq
+import io
+import json
+import re
+import sys
 
+from codecs import getincrementaldecoder, lookup
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import cache, partial
+from glob import glob
+from hashlib import blake2b
+from itertools import islice, repeat
+from locale import getpreferredencoding
+from mmap import ACCESS_READ, mmap
 from pathlib import Path
-from string import punctuation
-from re import sub
+from stat import S_ISREG
+from string import ascii_lowercase, ascii_uppercase, punctuation
+from typing import Callable, Iterable, Iterator, TextIO
+from unicodedata import category
+from zlib import crc32
 
+# ================================================================
+#                            CONSTANTS
+# ================================================================
+
+# Number of characters read at a time by the streaming analyzer
+CHUNK_SIZE = 1024 * 1024
+
+# File name standing for the standard input
+STDIN_FILENAME = '-'
+
+# Formats accepted by --format, the first one being the default
+OUTPUT_FORMATS = ('table', 'json', 'csv', 'ndjson')
+
+# Columns of the csv and ndjson records
+RECORD_FIELDS = ('file', 'type', 'key', 'count', 'error')
+
+PUNCTUATION_TABLE = str.maketrans('', '', punctuation)
+
+WHITESPACE_PATTERN = re.compile(r'\s')
+
+# Bytes a shard boundary may follow when splitting a file for parallel analysis
+WHITESPACE_BYTES = b' \t\n\v\f\r'
+
+# Line boundaries recognized by str.splitlines()
+LINE_BREAKS = ('\n', '\r', '\v', '\f', '\x1c', '\x1d', '\x1e', '\x85',
+               '\u2028', '\u2029')
+
+# Number of leading bytes checked for NUL bytes to skip binary files found in
+# directories, as git and grep do
+TEXT_PROBE_SIZE = 8192
+
+# Byte-level counterparts used to analyze memory-mapped UTF-8 files
+LOWERCASE_BYTES_TABLE = bytes.maketrans(ascii_uppercase.encode(),
+                                        ascii_lowercase.encode())
+PUNCTUATION_BYTES = punctuation.encode()
+CONTINUATION_BYTES = bytes(range(0x80, 0xC0))
+LINE_BREAK_BYTES = tuple(line_break.encode() for line_break in LINE_BREAKS)
+
+# ================================================================
+#                            TOKENIZER
+# ================================================================
+
+
+@cache
+def get_unicode_punctuation_table() -> dict[int, None]:
+    """Builds a translation table removing ASCII and Unicode punctuation.
+
+    Returns:
+        The table mapping every punctuation code point to None.
+    """
+    table = dict(PUNCTUATION_TABLE)
+    table.update((code_point, None) for code_point in range(sys.maxunicode + 1)
+                 if category(chr(code_point)).startswith('P'))
+    return table
+
+
+class Tokenizer:
+    """Splits text into normalized words through a pipeline of stages.
+
+    Text stages (lowercasing and punctuation stripping) run over whole chunks
+    of text with tables compiled once, when the tokenizer is created. Word
+    stages (stop-word removal, stemming and custom hooks) then run over the
+    resulting words, in that order.
+    """
+
+    def __init__(self, lowercase: bool = True, unicode_punctuation: bool = False,
+                 stop_words: Iterable[str] = (),
+                 stemmer: Callable[[str], str] | None = None,
+                 word_stages: Iterable[Callable[[str], str | None]] = ()):
+        """Initializes a Tokenizer object.
+
+        Args:
+            lowercase: Whether to lowercase the text.
+            unicode_punctuation: Whether to strip Unicode punctuation too,
+                instead of ASCII punctuation only.
+            stop_words: The words to discard.
+            stemmer: Optional function reducing each word to its stem.
+            word_stages: Functions applied to each word after stemming. A word
+                is discarded when a stage returns an empty string or None.
+        """
+        self.lowercase = lowercase
+        self.unicode_punctuation = unicode_punctuation
+
+        if unicode_punctuation:
+            self.punctuation_table = get_unicode_punctuation_table()
+        else:
+            self.punctuation_table = PUNCTUATION_TABLE
+
+        # Stop words go through the text stages to match normalized words
+        self.stop_words = frozenset(self.normalize(' '.join(stop_words)))
+        self.word_stages = ([stemmer] if stemmer else []) + list(word_stages)
+
+    @property
+    def key(self) -> str | None:
+        """Identifies the configuration of the tokenizer.
+
+        Returns:
+            A string describing the text stages and stop words, or None if
+            the tokenizer has word stages, which cannot be described.
+        """
+        if self.word_stages:
+            return None
+        return repr((self.lowercase, self.unicode_punctuation, sorted(self.stop_words)))
+
+    def normalize(self, text: str) -> list[str]:
+        """Applies the text stages to a text of complete words and splits it.
+
+        Args:
+            text: The text to split.
+
+        Returns:
+            The words of the text, before the word stages.
+        """
+        if self.lowercase:
+            text = text.lower()
+        return text.translate(self.punctuation_table).split()
+
+    def split_words(self, text: str) -> list[str]:
+        """Normalizes a text made only of complete words and splits it.
+
+        Args:
+            text: The text to split.
+
+        Returns:
+            The normalized words of the text.
+        """
+        words = self.normalize(text)
+
+        if self.stop_words:
+            words = [word for word in words if word not in self.stop_words]
+        for stage in self.word_stages:
+            words = [word for word in map(stage, words) if word]
+
+        return words
+
+    def tokenize(self, text: str, chunk_size: int = CHUNK_SIZE) -> Iterator[str]:
+        """Lazily yields the normalized words of a text.
+
+        The text is normalized one chunk at a time, each chunk extended up to
+        the next whitespace so that no word is cut.
+
+        Args:
+            text: The text to split.
+            chunk_size: The approximate number of characters normalized at a time.
+
+        Yields:
+            The normalized words of the text.
+        """
+        start = 0
+
+        while start < len(text):
+            match = WHITESPACE_PATTERN.search(text, start + chunk_size)
+            end = match.end() if match else len(text)
+
+            yield from self.split_words(text[start:end])
+            start = end
+
+
+DEFAULT_TOKENIZER = Tokenizer()
+
+# ================================================================
+#                        STREAMING ANALYZER
+# ================================================================
+
+
+class TextStatistics:
+    """Stores the statistics computed for a text."""
+
+    def __init__(self, words: int = 0, lines: int = 0, characters: int = 0,
+                 frequency: Counter | None = None, open_line: bool = False):
+        """Initializes a TextStatistics object.
+
+        Args:
+            words: The number of words.
+            lines: The number of lines.
+            characters: The number of characters.
+            frequency: The frequency of each word.
+            open_line: Whether the last line lacks a trailing line break.
+        """
+        self.words = words
+        self.lines = lines
+        self.characters = characters
+        self.frequency = Counter() if frequency is None else frequency
+        self.open_line = open_line
+
+    def most_common(self, number: int | None = None) -> dict:
+        """Returns the most frequent words.
+
+        Args:
+            number: Optional number of most frequent words to return.
+
+        Returns:
+            dict: A dictionary where keys are words and values are their frequencies.
+        """
+        return dict(self.frequency.most_common(number))
+
+    def merge(self, other: 'TextStatistics', contiguous: bool = True) -> None:
+        """Merges the statistics of the text that directly follows this one.
+
+        The boundary between both texts must fall on whitespace, otherwise a
+        word cut in two would be counted twice.
+
+        Args:
+            other: The statistics of the following text.
+            contiguous: Whether the other text continues this one, or is a
+                separate document whose lines are simply added.
+        """
+        if contiguous and self.open_line and other.characters:
+            # The first line of the other text continues our last line
+            self.lines -= 1
+
+        self.words += other.words
+        self.lines += other.lines
+        self.characters += other.characters
+        self.frequency.update(other.frequency)
+
+        if other.characters:
+            self.open_line = other.open_line
+
+
+class StreamingAnalyzer:
+    """Computes text statistics in a single pass over consecutive chunks.
+
+    Only the chunk being processed and the word cut at its end are kept in
+    memory, so arbitrarily large texts can be analyzed.
+    """
+
+    def __init__(self, counter_factory: Callable[[], Counter] = Counter,
+                 tokenizer: Tokenizer = DEFAULT_TOKENIZER, listeners: Iterable = ()):
+        """Initializes a StreamingAnalyzer object.
+
+        Args:
+            counter_factory: Creates the object counting word frequencies,
+                which must provide Counter's update() and most_common().
+            tokenizer: Splits the text into normalized words.
+            listeners: Objects whose update() method receives every batch of
+                words, in text order, such as n-gram counters.
+        """
+        self.statistics = TextStatistics(frequency=counter_factory())
+        self.tokenizer = tokenizer
+        self.listeners = tuple(listeners)
+        self.line_breaks = 0
+        self.pending_word = ''
+        self.last_character = ''
+
+    def feed(self, chunk: str) -> None:
+        """Processes the next chunk of text.
+
+        Args:
+            chunk: The text following the previously fed chunks.
+        """
+        if not chunk:
+            return
+
+        self.statistics.characters += len(chunk)
+
+        # '\r\n' is a single line break, even when split between two chunks
+        self.line_breaks += sum(map(chunk.count, LINE_BREAKS))
+        self.line_breaks -= chunk.count('\r\n')
+        if self.last_character == '\r' and chunk[0] == '\n':
+            self.line_breaks -= 1
+        self.last_character = chunk[-1]
+
+        # Hold back the last word until we know whether the next chunk continues it
+        text = self.pending_word + chunk
+        if text[-1].isspace():
+            self.pending_word = ''
+        else:
+            self.pending_word = text.rsplit(None, 1)[-1]
+            text = text[:len(text) - len(self.pending_word)]
+
+        self.count_words(text)
+
+    def count_words(self, text: str) -> None:
+        """Counts the words of a text made only of complete words.
+
+        Args:
+            text: The text to count.
+        """
+        words = self.tokenizer.split_words(text)
+
+        self.statistics.words += len(words)
+        self.statistics.frequency.update(words)
+
+        for listener in self.listeners:
+            listener.update(words)
+
+    def finish(self) -> TextStatistics:
+        """Flushes the pending word and returns the final statistics.
+
+        Returns:
+            TextStatistics: The statistics of all the fed text.
+        """
+        self.count_words(self.pending_word)
+        self.pending_word = ''
+
+        statistics = self.statistics
+        statistics.open_line = bool(statistics.characters) and \
+            self.last_character not in LINE_BREAKS
+        statistics.lines = self.line_breaks + statistics.open_line
+
+        return statistics
+
+    def to_dict(self) -> dict:
+        """Returns the state of the analysis, from which it can be resumed.
+
+        Only supported while frequencies are counted by a Counter.
+
+        Returns:
+            dict: The JSON-serializable state of the analyzer.
+        """
+        return {
+            'words': self.statistics.words,
+            'characters': self.statistics.characters,
+            'frequency': dict(self.statistics.frequency),
+            'line_breaks': self.line_breaks,
+            'pending_word': self.pending_word,
+            'last_character': self.last_character,
+        }
+
+    @classmethod
+    def from_dict(cls, state: dict,
+                  tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> 'StreamingAnalyzer':
+        """Restores an analyzer from the state returned by to_dict().
+
+        Args:
+            state: The state of the analyzer.
+            tokenizer: Splits the text into normalized words.
+
+        Returns:
+            StreamingAnalyzer: The restored analyzer.
+        """
+        analyzer = cls(tokenizer=tokenizer)
+        analyzer.statistics = TextStatistics(
+            words=state['words'],
+            characters=state['characters'],
+            frequency=Counter(state['frequency']),
+        )
+        analyzer.line_breaks = state['line_breaks']
+        analyzer.pending_word = state['pending_word']
+        analyzer.last_character = state['last_character']
+
+        return analyzer
+
+
+def analyze_text(text: str, tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> TextStatistics:
+    """Computes all the statistics of a text at once.
+
+    Args:
+        text: The text to analyze.
+        tokenizer: Splits the text into normalized words.
+
+    Returns:
+        TextStatistics: The statistics of the text.
+    """
+    analyzer = StreamingAnalyzer(tokenizer=tokenizer)
+
+    for start in range(0, len(text), CHUNK_SIZE):
+        analyzer.feed(text[start:start + CHUNK_SIZE])
+
+    return analyzer.finish()
+
+
+def analyze_stream(stream: TextIO, chunk_size: int = CHUNK_SIZE,
+                   counter_factory: Callable[[], Counter] = Counter,
+                   tokenizer: Tokenizer = DEFAULT_TOKENIZER,
+                   listeners: Iterable = ()) -> TextStatistics:
+    """Computes all the statistics of a text stream reading fixed-size chunks.
+
+    Args:
+        stream: The text stream to analyze.
+        chunk_size: The number of characters to read at a time.
+        counter_factory: Creates the object counting word frequencies.
+        tokenizer: Splits the text into normalized words.
+        listeners: Objects receiving every batch of words, in text order.
+
+    Returns:
+        TextStatistics: The statistics of the stream content.
+    """
+    analyzer = StreamingAnalyzer(counter_factory, tokenizer, listeners)
+
+    for chunk in iter(partial(stream.read, chunk_size), ''):
+        analyzer.feed(chunk)
+
+    return analyzer.finish()
+
+
+def analyze_file(filename: str, chunk_size: int = CHUNK_SIZE,
+                 counter_factory: Callable[[], Counter] = Counter,
+                 tokenizer: Tokenizer = DEFAULT_TOKENIZER,
+                 listeners: Iterable = ()) -> TextStatistics:
+    """Computes all the statistics of a file without loading it whole.
+
+    Args:
+        filename: The name of the file to analyze, or '-' for the standard
+            input.
+        chunk_size: The number of characters to read at a time.
+        counter_factory: Creates the object counting word frequencies.
+        tokenizer: Splits the text into normalized words.
+        listeners: Objects receiving every batch of words, in text order.
+
+    Returns:
+        TextStatistics: The statistics of the file content.
+
+    Raises:
+        FileNotFoundError: If the file is not found.
+    """
+    if filename == STDIN_FILENAME:
+        return analyze_stream(sys.stdin, chunk_size, counter_factory, tokenizer, listeners)
+
+    try:
+        with open(get_file_path(filename), 'r') as file:
+            return analyze_stream(file, chunk_size, counter_factory, tokenizer, listeners)
+    except FileNotFoundError:
+        raise FileNotFoundError(f'"{filename}" file not found')
+
+# ================================================================
+#                         MAPPED ANALYZER
+# ================================================================
+
+
+class MappedAnalyzer:
+    """Computes text statistics directly over the bytes of a UTF-8 file.
+
+    ASCII lowercasing, punctuation removal and whitespace splitting are done
+    on bytes, which is safe in UTF-8 because ASCII bytes never occur inside
+    multi-byte characters. Only the distinct tokens are decoded at the end,
+    where the tokenizer completes their normalization.
+    """
+
+    def __init__(self, tokenizer: Tokenizer = DEFAULT_TOKENIZER):
+        """Initializes a MappedAnalyzer object.
+
+        Args:
+            tokenizer: Splits the decoded tokens into normalized words.
+        """
+        self.tokenizer = tokenizer
+        self.lowercase_table = LOWERCASE_BYTES_TABLE if tokenizer.lowercase else None
+        self.tokens = Counter()
+        self.characters = 0
+        self.line_breaks = 0
+        self.pending_bytes = b''
+        self.last_bytes = b''
+
+    def feed(self, block: bytes) -> None:
+        """Processes the next block of bytes.
+
+        Args:
+            block: The bytes following the previously fed blocks.
+        """
+        data = self.pending_bytes + block
+
+        # Hold back everything after the last whitespace, which may be a cut
+        # token or a cut multi-byte character
+        cut = max(data.rfind(byte) for byte in WHITESPACE_BYTES) + 1
+        self.pending_bytes = data[cut:]
+
+        self.count_bytes(data[:cut])
+
+    def count_bytes(self, data: bytes) -> None:
+        """Counts the statistics of bytes that end on a character boundary.
+
+        Args:
+            data: The bytes to count.
+        """
+        if not data:
+            return
+
+        # '\r\n' is read as a single '\n' character
+        crlf_count = data.count(b'\r\n')
+        if self.last_bytes.endswith(b'\r') and data.startswith(b'\n'):
+            crlf_count += 1
+
+        self.characters += len(data.translate(None, CONTINUATION_BYTES))
+        self.characters -= crlf_count
+        self.line_breaks += sum(map(data.count, LINE_BREAK_BYTES)) - crlf_count
+        self.last_bytes = (self.last_bytes + data[-3:])[-3:]
+
+        self.tokens.update(
+            data.translate(self.lowercase_table, PUNCTUATION_BYTES).split())
+
+    def finish(self) -> TextStatistics:
+        """Flushes the pending bytes and returns the final statistics.
+
+        Returns:
+            TextStatistics: The statistics of all the fed bytes.
+
+        Raises:
+            UnicodeDecodeError: If the bytes are not valid UTF-8.
+        """
+        self.count_bytes(self.pending_bytes)
+        self.pending_bytes = b''
+
+        statistics = TextStatistics(characters=self.characters)
+
+        for token, count in self.tokens.items():
+            # Non-ASCII letters and whitespace are only handled once decoded
+            for word in self.tokenizer.split_words(token.decode('utf-8')):
+                statistics.frequency[word] += count
+                statistics.words += count
+
+        statistics.open_line = bool(self.characters) and \
+            not self.last_bytes.endswith(LINE_BREAK_BYTES)
+        statistics.lines = self.line_breaks + statistics.open_line
+
+        return statistics
+
+
+def can_map_file(file_path: Path) -> bool:
+    """Checks whether a file can be analyzed over its memory-mapped bytes.
+
+    Args:
+        file_path: The path of the file.
+
+    Returns:
+        True for non-empty regular files read as UTF-8, False otherwise.
+    """
+    try:
+        file_stat = file_path.stat()
+    except OSError:
+        return False
+
+    return (S_ISREG(file_stat.st_mode) and file_stat.st_size > 0
+            and lookup(getpreferredencoding(False)).name == 'utf-8')
+
+
+def analyze_mapped_range(mapped: mmap, start: int, end: int,
+                         chunk_size: int = CHUNK_SIZE,
+                         tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> TextStatistics:
+    """Computes the statistics of a byte range of a memory-mapped file.
+
+    Args:
+        mapped: The memory-mapped file.
+        start: The offset of the first byte to analyze.
+        end: The offset following the last byte to analyze.
+        chunk_size: The number of bytes processed at a time.
+        tokenizer: Splits the text into normalized words.
+
+    Returns:
+        TextStatistics: The statistics of the byte range.
+    """
+    analyzer = MappedAnalyzer(tokenizer)
+
+    for position in range(start, end, chunk_size):
+        analyzer.feed(mapped[position:min(position + chunk_size, end)])
+
+    return analyzer.finish()
+
+
+def analyze_mapped_file(filename: str, chunk_size: int = CHUNK_SIZE,
+                        tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> TextStatistics:
+    """Computes all the statistics of a file over its memory-mapped bytes.
+
+    Falls back to analyze_file() for files that cannot be mapped, such as
+    pipes, devices or files in an encoding other than UTF-8.
+
+    Args:
+        filename: The name of the file to analyze.
+        chunk_size: The number of bytes processed at a time.
+        tokenizer: Splits the text into normalized words.
+
+    Returns:
+        TextStatistics: The statistics of the file content.
+
+    Raises:
+        FileNotFoundError: If the file is not found.
+    """
+    file_path = get_file_path(filename)
+
+    if not can_map_file(file_path):
+        return analyze_file(filename, chunk_size, tokenizer=tokenizer)
+
+    with open(file_path, 'rb') as file:
+        with mmap(file.fileno(), 0, access=ACCESS_READ) as mapped:
+            return analyze_mapped_range(mapped, 0, len(mapped), chunk_size, tokenizer)
+
+# ================================================================
+#                        PARALLEL ANALYZER
+# ================================================================
+
+
+def find_shard_offsets(file_path: Path, jobs: int) -> list[int]:
+    """Splits a file into byte ranges whose boundaries follow whitespace.
+
+    Args:
+        file_path: The path of the file to split.
+        jobs: The desired number of shards.
+
+    Returns:
+        The sorted offsets delimiting the shards, from 0 to the file size.
+    """
+    size = file_path.stat().st_size
+    offsets = [0]
+
+    with open(file_path, 'rb') as file:
+        for index in range(1, jobs):
+            position = max(size * index // jobs, offsets[-1])
+            file.seek(position)
+
+            # Move forward to the byte right after the next whitespace
+            while block := file.read(CHUNK_SIZE):
+                found = [block.find(byte) for byte in WHITESPACE_BYTES]
+                found = [offset for offset in found if offset != -1]
+                if found:
+                    position += min(found) + 1
+                    break
+                position += len(block)
+
+            # Never separate the two bytes of a '\r\n' line break
+            if position > 0:
+                file.seek(position - 1)
+                if file.read(2) == b'\r\n':
+                    position += 1
+
+            if position >= size:
+                break
+            if position > offsets[-1]:
+                offsets.append(position)
+
+    offsets.append(size)
+    return offsets
+
+
+def analyze_shard(file_path: Path, start: int, end: int, index: int, buckets: int,
+                  use_mmap: bool = False,
+                  tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> tuple[TextStatistics, list[dict]]:
+    """Analyzes a byte range of a file in a worker process.
+
+    The word frequencies are partitioned by word hash so that every word is
+    later reduced by a single worker. Each word keeps its first position in
+    the shard to break ties exactly like Counter.most_common() does.
+
+    Args:
+        file_path: The path of the file to analyze.
+        start: The offset of the first byte of the shard.
+        end: The offset following the last byte of the shard.
+        index: The position of the shard in the file.
+        buckets: The number of hash partitions.
+        use_mmap: Whether to analyze the memory-mapped bytes of the file.
+        tokenizer: Splits the text into normalized words.
+
+    Returns:
+        The statistics of the shard without frequencies, and the partitions
+        mapping each word to its count and first position.
+    """
+    with open(file_path, 'rb') as file:
+        if use_mmap:
+            with mmap(file.fileno(), 0, access=ACCESS_READ) as mapped:
+                statistics = analyze_mapped_range(mapped, start, end,
+                                                  tokenizer=tokenizer)
+        else:
+            statistics = read_shard(file, start, end, tokenizer)
+
+    partitions = [{} for _ in range(buckets)]
+
+    for position, (word, count) in enumerate(statistics.frequency.items()):
+        bucket = crc32(word.encode('utf-8', 'surrogatepass')) % buckets
+        partitions[bucket][word] = (count, (index, position))
 
-def calculate_words_count(text: str) -> int:
+    statistics.frequency = Counter()
+    return statistics, partitions
+
+
+def read_shard(file: io.BufferedReader, start: int, end: int,
+               tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> TextStatistics:
+    """Decodes and analyzes a byte range of a file opened in binary mode.
+
+    Args:
+        file: The file to read.
+        start: The offset of the first byte to analyze.
+        end: The offset following the last byte to analyze.
+        tokenizer: Splits the text into normalized words.
+
+    Returns:
+        TextStatistics: The statistics of the byte range.
+    """
+    decoder = io.IncrementalNewlineDecoder(
+        getincrementaldecoder(getpreferredencoding(False))(), translate=True)
+    analyzer = StreamingAnalyzer(tokenizer=tokenizer)
+
+    file.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        block = file.read(min(CHUNK_SIZE, remaining))
+        if not block:
+            break
+        remaining -= len(block)
+        analyzer.feed(decoder.decode(block))
+    analyzer.feed(decoder.decode(b'', final=True))
+
+    return analyzer.finish()
+
+
+def reduce_partitions(partitions: list[dict], number: int | None) -> list[tuple]:
+    """Merges the same hash partition of every shard into a top-N heap.
+
+    Args:
+        partitions: The partition produced by each shard, in file order.
+        number: Optional number of most frequent words to keep.
+
+    Returns:
+        The (sort key, word, count) entries of the most frequent words, sorted.
+    """
+    counts = {}
+    first_positions = {}
+
+    for partition in partitions:
+        for word, (count, position) in partition.items():
+            counts[word] = counts.get(word, 0) + count
+            first_positions.setdefault(word, position)
+
+    entries = (((-count, first_positions[word]), word, count)
+               for word, count in counts.items())
+
+    if number is None:
+        return sorted(entries)
+    return heapq.nsmallest(number, entries)
+
+
+def analyze_file_parallel(filename: str, jobs: int, number: int | None = None,
+                          use_mmap: bool = False,
+                          tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> TextStatistics:
+    """Computes the statistics of a file splitting the work among processes.
+
+    The result is identical to analyze_file(), except that only the `number`
+    most frequent words are kept in the frequency table.
+
+    Args:
+        filename: The name of the file to analyze.
+        jobs: The number of worker processes.
+        number: Optional number of most frequent words to keep.
+        use_mmap: Whether to analyze the memory-mapped bytes of the file,
+            when it can be mapped.
+        tokenizer: Splits the text into normalized words.
+
+    Returns:
+        TextStatistics: The statistics of the file content.
+
+    Raises:
+        FileNotFoundError: If the file is not found.
+    """
+    file_path = get_file_path(filename)
+    use_mmap = use_mmap and can_map_file(file_path)
+
+    try:
+        offsets = find_shard_offsets(file_path, jobs)
+    except FileNotFoundError:
+        raise FileNotFoundError(f'"{filename}" file not found')
+
+    shards = len(offsets) - 1
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        results = list(executor.map(analyze_shard, repeat(file_path),
+                                    offsets[:-1], offsets[1:], range(shards),
+                                    repeat(jobs), repeat(use_mmap), repeat(tokenizer)))
+
+        statistics = TextStatistics()
+        for shard_statistics, _ in results:
+            statistics.merge(shard_statistics)
+
+        bucket_partitions = [[partitions[bucket] for _, partitions in results]
+                             for bucket in range(jobs)]
+        heaps = executor.map(reduce_partitions, bucket_partitions, repeat(number))
+
+        top_words = islice(heapq.merge(*heaps), number)
+        statistics.frequency = Counter(
+            {word: count for _, word, count in top_words})
+
+    return statistics
+
+# ================================================================
+#                       INCREMENTAL ANALYZER
+# ================================================================
+
+
+def create_newline_decoder(state: list | None = None) -> io.IncrementalNewlineDecoder:
+    """Creates the decoder of the incremental analysis.
+
+    Args:
+        state: Optional state returned by get_decoder_state(), from which
+            decoding continues, e.g. with the '\r' held back at the end of
+            the previously analyzed bytes.
+
+    Returns:
+        The decoder of the file bytes into text with '\n' line breaks.
+    """
+    decoder = io.IncrementalNewlineDecoder(
+        getincrementaldecoder(getpreferredencoding(False))(), translate=True)
+    if state is not None:
+        buffer, flag = state
+        decoder.setstate((bytes.fromhex(buffer), flag))
+    return decoder
+
+
+def get_decoder_state(decoder: io.IncrementalNewlineDecoder) -> list:
+    """Returns the JSON-serializable state of a decoder."""
+    buffer, flag = decoder.getstate()
+    return [buffer.hex(), flag]
+
+
+def analyze_file_incrementally(filename: str, entry: dict | None = None,
+                               chunk_size: int = CHUNK_SIZE,
+                               tokenizer: Tokenizer = DEFAULT_TOKENIZER
+                               ) -> tuple[TextStatistics, dict | None]:
+    """Computes the statistics of a file reusing a previous analysis.
+
+    The entry records the size, modification time and content hash of the
+    analyzed file, along with the analyzer and decoder states before the end
+    of the file is flushed. An unmodified file is not read at all, and a file
+    that was only appended to is analyzed from the last analyzed byte.
+
+    Args:
+        filename: The name of the file to analyze.
+        entry: Optional entry returned by a previous analysis of the file.
+            It is ignored if it was produced by a different tokenizer, or if
+            the tokenizer has no key.
+        chunk_size: The number of bytes read at a time.
+        tokenizer: Splits the text into normalized words.
+
+    Returns:
+        The statistics of the file content, and the entry to store, or None
+        if the given entry is still up to date.
+
+    Raises:
+        FileNotFoundError: If the file is not found.
+    """
+    file_path = get_file_path(filename)
+
+    try:
+        file_stat = file_path.stat()
+    except FileNotFoundError:
+        raise FileNotFoundError(f'"{filename}" file not found')
+
+    size, mtime_ns = file_stat.st_size, file_stat.st_mtime_ns
+
+    # Entries without a decoder state already flushed the end of the file
+    # Tokenizers without a key cannot tell whether they produced the entry
+    if entry and (tokenizer.key is None or entry.get('tokenizer') != tokenizer.key
+                  or 'decoder' not in entry):
+        entry = None
+
+    if entry and entry['size'] == size and entry['mtime_ns'] == mtime_ns:
+        analyzer = StreamingAnalyzer.from_dict(entry['state'], tokenizer)
+        decoder = create_newline_decoder(entry['decoder'])
+        analyzer.feed(decoder.decode(b'', final=True))
+        return analyzer.finish(), None
+
+    digest = blake2b()
+    analyzer = StreamingAnalyzer(tokenizer=tokenizer)
+    decoder = create_newline_decoder()
+
+    with open(file_path, 'rb') as file:
+        if entry and entry['size'] <= size:
+            # Resume only if the previously analyzed bytes are unchanged
+            remaining = entry['size']
+            while remaining > 0 and (block := file.read(min(chunk_size, remaining))):
+                digest.update(block)
+                remaining -= len(block)
+
+            if digest.hexdigest() == entry['digest']:
+                analyzer = StreamingAnalyzer.from_dict(entry['state'], tokenizer)
+                # A '\r' ending the analyzed bytes may start a '\r\n'
+                decoder = create_newline_decoder(entry['decoder'])
+            else:
+                digest = blake2b()
+                file.seek(0)
+
+        remaining = size - file.tell()
+
+        while remaining > 0 and (block := file.read(min(chunk_size, remaining))):
+            digest.update(block)
+            remaining -= len(block)
+            analyzer.feed(decoder.decode(block))
+
+    entry = {
+        'size': size,
+        'mtime_ns': mtime_ns,
+        'digest': digest.hexdigest(),
+        'tokenizer': tokenizer.key,
+        'state': analyzer.to_dict(),
+        'decoder': get_decoder_state(decoder),
+    }
+    analyzer.feed(decoder.decode(b'', final=True))
+    return analyzer.finish(), entry
+
+
+def analyze_cached_file(filename: str, cache,
+                        tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> TextStatistics:
+    """Computes the statistics of a file through an analysis cache.
+
+    Args:
+        filename: The name of the file to analyze.
+        cache: The cache providing get() and put() for file entries.
+        tokenizer: Splits the text into normalized words. The cache is not
+            used if it has no key, e.g. with a stemmer.
+
+    Returns:
+        TextStatistics: The statistics of the file content.
+
+    Raises:
+        FileNotFoundError: If the file is not found.
+    """
+    if filename == STDIN_FILENAME or tokenizer.key is None:
+        # The standard input has no identity to cache it under, and entries
+        # of tokenizers without a key could be reused by another one
+        return analyze_file(filename, tokenizer=tokenizer)
+
+    file_path = get_file_path(filename)
+    statistics, entry = analyze_file_incrementally(filename, cache.get(file_path),
+                                                   tokenizer=tokenizer)
+
+    if entry is not None:
+        cache.put(file_path, entry)
+    return statistics
+
+# ================================================================
+#                          BATCH ANALYZER
+# ================================================================
+
+
+def analyze_path(filename: str, jobs: int = 1, number: int | None = None,
+                 use_mmap: bool = False,
+                 counter_factory: Callable[[], Counter] = Counter,
+                 tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> TextStatistics:
+    """Computes the statistics of a file with the requested analyzer.
+
+    Args:
+        filename: The name of the file to analyze, or '-' for the standard
+            input.
+        jobs: The number of processes used to analyze the file.
+        number: Optional number of most frequent words to keep when the
+            file is analyzed by several processes.
+        use_mmap: Whether to analyze the memory-mapped bytes of the file.
+        counter_factory: Creates the object counting word frequencies. Only
+            supported by the single-process text reader.
+        tokenizer: Splits the text into normalized words.
+
+    Returns:
+        TextStatistics: The statistics of the file content.
+
+    Raises:
+        FileNotFoundError: If the file is not found.
+    """
+    if filename == STDIN_FILENAME:
+        # The standard input can neither be split nor mapped
+        return analyze_file(filename, counter_factory=counter_factory, tokenizer=tokenizer)
+    if jobs > 1:
+        return analyze_file_parallel(filename, jobs, number, use_mmap, tokenizer)
+    if use_mmap:
+        return analyze_mapped_file(filename, tokenizer=tokenizer)
+    return analyze_file(filename, counter_factory=counter_factory, tokenizer=tokenizer)
+
+
+def expand_paths(patterns: list[str]) -> list[str]:
+    """Expands glob patterns and directories into the files they contain.
+
+    Plain file names are kept as given, so that missing files are reported
+    when they are analyzed. Directories only contribute their text files,
+    outside of hidden and __pycache__ directories.
+
+    Args:
+        patterns: The files, directories or glob patterns to expand.
+
+    Returns:
+        The names of the files to analyze, without duplicates.
+
+    Raises:
+        FileNotFoundError: If a glob pattern or directory matches no file.
+    """
+    filenames = []
+
+    for pattern in patterns:
+        path = get_file_path(pattern)
+
+        if pattern == STDIN_FILENAME:
+            matches = [pattern]
+        elif any(character in pattern for character in '*?['):
+            matches = [match for match in sorted(glob(pattern, recursive=True))
+                       if Path(match).is_file()]
+        elif path.is_dir():
+            matches = [str(match) for match in sorted(path.rglob('*'))
+                       if is_text_file(match, path)]
+        else:
+            matches = [pattern]
+
+        if not matches:
+            raise FileNotFoundError(f'no files found for "{pattern}"')
+        filenames.extend(matches)
+
+    return list(dict.fromkeys(filenames))
+
+
+def is_text_file(path: Path, directory: Path) -> bool:
+    """Checks whether a file found in a directory should be analyzed.
+
+    Args:
+        path: The path of the file.
+        directory: The expanded directory containing the file.
+
+    Returns:
+        False for hidden files, files of hidden or __pycache__ directories,
+        and files with a NUL byte among their first bytes, True otherwise.
+    """
+    if any(part.startswith('.') or part == '__pycache__'
+           for part in path.relative_to(directory).parts):
+        return False
+    if not path.is_file():
+        return False
+
+    try:
+        with open(path, 'rb') as file:
+            return b'\0' not in file.read(TEXT_PROBE_SIZE)
+    except OSError:
+        # Reported when analyzed
+        return True
+
+
+def analyze_files(filenames: list[str], jobs: int = 1, use_mmap: bool = False,
+                  counter_factory: Callable[[], Counter] = Counter, cache=None,
+                  tokenizer: Tokenizer = DEFAULT_TOKENIZER
+                  ) -> Iterator[tuple[str, TextStatistics | Exception]]:
+    """Analyzes several files, yielding each result as soon as it is ready.
+
+    Args:
+        filenames: The names of the files to analyze, '-' standing for the
+            standard input.
+        jobs: The number of worker processes, each analyzing a whole file.
+        use_mmap: Whether to analyze the memory-mapped bytes of the files.
+        counter_factory: Creates the object counting word frequencies.
+        cache: Optional cache of previous analyses, used instead of the
+            other analysis options. It is not used if the tokenizer has no
+            key.
+        tokenizer: Splits the text into normalized words.
+
+    Yields:
+        The name of each file with its statistics, or with the error raised
+        while reading it.
+    """
+    if tokenizer.key is None:
+        cache = None
+
+    if jobs == 1:
+        for filename in filenames:
+            try:
+                if cache is not None:
+                    yield filename, analyze_cached_file(filename, cache, tokenizer)
+                else:
+                    yield filename, analyze_path(filename, 1, None, use_mmap,
+                                                 counter_factory, tokenizer)
+            except (OSError, ValueError) as e:
+                yield filename, e
+        return
+
+    # Workers cannot read the standard input, which is analyzed here meanwhile
+    file_names = [filename for filename in filenames if filename != STDIN_FILENAME]
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        if cache is not None:
+            # Entries are read and written here, workers only analyze
+            futures = {
+                executor.submit(analyze_file_incrementally, filename,
+                                cache.get(get_file_path(filename)), CHUNK_SIZE,
+                                tokenizer): filename
+                for filename in file_names
+            }
+        else:
+            futures = {
+                executor.submit(analyze_path, filename, 1, None, use_mmap,
+                                counter_factory, tokenizer): filename
+                for filename in file_names
+            }
+
+        if len(file_names) < len(filenames):
+            yield STDIN_FILENAME, analyze_file(STDIN_FILENAME, counter_factory=counter_factory,
+                                               tokenizer=tokenizer)
+
+        for future in as_completed(futures):
+            filename = futures[future]
+            try:
+                result = future.result()
+            except (OSError, ValueError) as e:
+                yield filename, e
+                continue
+
+            if cache is not None:
+                result, entry = result
+                if entry is not None:
+                    cache.put(get_file_path(filename), entry)
+            yield filename, result
+
+# ================================================================
+#                           STATISTICS
+# ================================================================
+
+
+def calculate_words_count(text: str, tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> int:
     """Calculates the number of words in the given text.
 
     Args:
         text: The text to analyze.
+        tokenizer: Splits the text into normalized words.
 
     Returns:
         The number of words in the text.
     """
-    cleaned_text = clean_text(text)
-
-    return len(cleaned_text.split())
+    return analyze_text(text, tokenizer).words
 
 
 def calculate_lines_count(text: str) -> int:
@@ -29,7 +1139,7 @@ def calculate_lines_count(text: str) -> int:
     Returns:
         The number of lines in the text.
     """
-    return len(text.splitlines())
+    return analyze_text(text).lines
 
 
 def calculate_characters_count(text: str) -> int:
@@ -41,56 +1151,231 @@ def calculate_characters_count(text: str) -> int:
     Returns:
         The total number of characters in the text.
     """
-    return len(text)
+    return analyze_text(text).characters
 
 
-def calculate_words_frequency(text: str, number: int | None = None) -> dict:
+def calculate_words_frequency(text: str, number: int | None = None,
+                              tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> dict:
     """Calculates the frequency of each word in the given text.
 
     Args:
         text: The text to analyze.
         number: Optional number of most frequent words to return.
+        tokenizer: Splits the text into normalized words.
 
     Returns:
         dict: A dictionary where keys are words and values are their frequencies.
     """
-    cleaned_text = clean_text(text)
-    words = cleaned_text.split()
-
-    return dict(Counter(words).most_common(number))
+    return analyze_text(text, tokenizer).most_common(number)
 
 
-def display_statistics(text: str, number: int | None) -> None:
+def display_statistics(statistics: TextStatistics, number: int | None,
+                       title: str | None = None) -> None:
     """Displays text statistics in a formatted table.
 
     Args:
-        text: The text to analyze.
+        statistics: The statistics of the analyzed text.
         number: Optional number of most frequent words to display.
+        title: Optional title displayed above the table.
     """
     from terminal_colors import TerminalColors, colored_print
 
+    if title is not None:
+        colored_print(f'\n{title}', TerminalColors.FG_GREEN, bold=True)
+
     colored_print(f'\n{"Number of":^20}{"Count":^20}',
                   TerminalColors.FG_CYAN, bold=True)
     colored_print('-' * 40, TerminalColors.FG_CYAN)
 
-    print(f'{"words":<20}{calculate_words_count(text):^20}')
-    print(f'{"lines":<20}{calculate_lines_count(text):^20}')
-    print(f'{"characters":<20}{calculate_characters_count(text):^20}')
+    print(f'{"words":<20}{statistics.words:^20}')
+    print(f'{"lines":<20}{statistics.lines:^20}')
+    print(f'{"characters":<20}{statistics.characters:^20}')
 
     colored_print(f'\n{"Words Frequency":^42}',
                   TerminalColors.FG_YELLOW, bold=True)
     colored_print('-' * 40, TerminalColors.FG_YELLOW)
 
-    words_frequency = calculate_words_frequency(text, number)
+    words_frequency = statistics.most_common(number)
+    # Approximate counters report how much each count may be overestimated
+    error = getattr(statistics.frequency, 'error', None)
 
     for word, frequency in words_frequency.items():
-        print(f'{word:<20}   {frequency:^20}')
+        if error is None:
+            print(f'{word:<20}   {frequency:^20}')
+        else:
+            print(f'{word:<20}   {frequency:^10}{f"± {error(word)}":<10}')
+
+
+def display_ngrams(title: str, ngrams: list[tuple[tuple[str, ...], int]]) -> None:
+    """Displays n-gram or co-occurrence counts in a formatted table.
+
+    Args:
+        title: The title of the table.
+        ngrams: The (words, count) pairs to display.
+    """
+    from terminal_colors import TerminalColors, colored_print
+
+    colored_print(f'\n{title:^42}', TerminalColors.FG_YELLOW, bold=True)
+    colored_print('-' * 40, TerminalColors.FG_YELLOW)
+
+    for words, count in ngrams:
+        print(f'{" ".join(words):<30}{count:^10}')
+
+# ================================================================
+#                             REPORTS
+# ================================================================
+
+
+class ReportWriter:
+    """Writes the statistics of each analyzed file as soon as it is ready.
+
+    Besides the colored table, the statistics can be written as a JSON array
+    holding one object per report, or as csv or ndjson records with the
+    RECORD_FIELDS columns. Machine-readable formats never use terminal colors
+    and every report is flushed once written, so that the output can be
+    consumed by a pipeline while the next files are analyzed.
+    """
+
+    def __init__(self, output_format: str = 'table', stream: TextIO | None = None):
+        """Initializes a ReportWriter object.
+
+        Args:
+            output_format: One of OUTPUT_FORMATS.
+            stream: The stream machine-readable formats are written to, the
+                standard output by default. Tables are always printed.
+
+        Raises:
+            ValueError: If the output format is not supported.
+        """
+        if output_format not in OUTPUT_FORMATS:
+            raise ValueError(f'unsupported output format "{output_format}"')
+
+        self.output_format = output_format
+        self.stream = sys.stdout if stream is None else stream
+        self.reports = 0
+
+        if output_format == 'csv':
+            self.csv_writer = csv.writer(self.stream, lineterminator='\n')
+            self.csv_writer.writerow(RECORD_FIELDS)
+
+    def write(self, statistics: TextStatistics, number: int | None,
+              filename: str | None = None, title: str | None = None,
+              ngrams: dict[str, list[tuple[tuple[str, ...], int]]] | None = None) -> None:
+        """Writes the report of an analysis.
+
+        Args:
+            statistics: The statistics of the analyzed text.
+            number: Optional number of most frequent words to write.
+            filename: The name of the analyzed file, or None for corpus totals.
+            title: Optional title displayed above the table.
+            ngrams: Optional n-gram counts to write, by kind (such as
+                '2-gram' or 'co-occurrence').
+        """
+        ngrams = ngrams or {}
+
+        if self.output_format == 'table':
+            display_statistics(statistics, number, title)
+            for kind, entries in ngrams.items():
+                display_ngrams(f'{kind[0].upper()}{kind[1:]}s Frequency', entries)
+        elif self.output_format == 'json':
+            self.stream.write('[\n' if not self.reports else ',\n')
+            json.dump(self.get_report(statistics, number, filename, ngrams), self.stream)
+        else:
+            for record in self.get_records(statistics, number, filename, ngrams):
+                if self.output_format == 'csv':
+                    self.csv_writer.writerow(record)
+                else:
+                    self.stream.write(json.dumps(dict(zip(RECORD_FIELDS, record))) + '\n')
+
+        self.reports += 1
+        self.stream.flush()
+
+    def close(self) -> None:
+        """Terminates the output once every report is written."""
+        if self.output_format == 'json':
+            self.stream.write('[\n]\n' if not self.reports else '\n]\n')
+            self.stream.flush()
+
+    @staticmethod
+    def get_report(statistics: TextStatistics, number: int | None, filename: str | None,
+                   ngrams: dict[str, list[tuple[tuple[str, ...], int]]]) -> dict:
+        """Builds the JSON object of a report.
+
+        Args:
+            statistics: The statistics of the analyzed text.
+            number: Optional number of most frequent words to include.
+            filename: The name of the analyzed file, or None for corpus totals.
+            ngrams: The n-gram counts to include, by kind.
+
+        Returns:
+            dict: The JSON-serializable report.
+        """
+        error = getattr(statistics.frequency, 'error', None)
+        frequency = [{'word': word, 'count': count}
+                     if error is None else {'word': word, 'count': count, 'error': error(word)}
+                     for word, count in statistics.frequency.most_common(number)]
+
+        report = {
+            'file': filename,
+            'words': statistics.words,
+            'lines': statistics.lines,
+            'characters': statistics.characters,
+            'frequency': frequency,
+        }
+        if ngrams:
+            report['ngrams'] = {kind: [{'words': list(words), 'count': count}
+                                       for words, count in entries]
+                                for kind, entries in ngrams.items()}
+        return report
+
+    @staticmethod
+    def get_records(statistics: TextStatistics, number: int | None, filename: str | None,
+                    ngrams: dict[str, list[tuple[tuple[str, ...], int]]]) -> Iterator[tuple]:
+        """Yields the csv and ndjson records of a report, one at a time.
+
+        Args:
+            statistics: The statistics of the analyzed text.
+            number: Optional number of most frequent words to include.
+            filename: The name of the analyzed file, or None for corpus totals.
+            ngrams: The n-gram counts to include, by kind.
+
+        Yields:
+            The values of each record, in RECORD_FIELDS order.
+        """
+        yield filename, 'total', 'words', statistics.words, None
+        yield filename, 'total', 'lines', statistics.lines, None
+        yield filename, 'total', 'characters', statistics.characters, None
+
+        error = getattr(statistics.frequency, 'error', None)
+        for word, count in statistics.frequency.most_common(number):
+            yield filename, 'word', word, count, None if error is None else error(word)
+
+        for kind, entries in ngrams.items():
+            for words, count in entries:
+                yield filename, kind, ' '.join(words), count, None
 
 # ================================================================
 #                              UTILS
 # ================================================================
 
 
+def get_file_path(filename: str) -> Path:
+    """Constructs the path of a file, looking next to this module when it is
+    not found from the current working directory.
+
+    Args:
+        filename: The name of the file.
+
+    Returns:
+        The path of the file.
+    """
+    path = Path(filename)
+
+    if path.exists():
+        return path
+    return Path(__file__).parent / path
+
+
 def read_file(filename: str) -> str:
     """Reads the content of a file and returns it as a string.
 
@@ -103,11 +1388,8 @@ def read_file(filename: str) -> str:
     Raises:
         FileNotFoundError: If the file is not found.
     """
-    current_directory = Path(__file__).parent
-    file_path = current_directory / filename
-
     try:
-        with open(file_path, 'r') as file:
+        with open(get_file_path(filename), 'r') as file:
             lines = file.read()
     except FileNotFoundError:
         raise FileNotFoundError(f'"{filename}" file not found')
@@ -126,9 +1408,9 @@ def clean_text(text: str) -> str:
     """
     text = text.strip().lower()
     # Remove punctuation
-    text = text.translate(str.maketrans('', '', punctuation))
+    text = text.translate(PUNCTUATION_TABLE)
     # Replace newlines and indentation with spaces
-    text = sub(r'\s+', ' ', text)
+    text = re.sub(r'\s+', ' ', text)
     return text
 
 
@@ -140,12 +1422,57 @@ def parse_arguments() -> argparse.Namespace:
     """
     parser = argparse.ArgumentParser(description='Text File Analysis Tool')
 
-    parser.add_argument('filename',
+    parser.add_argument('filenames',
                         type=str,
-                        help='filename in the current working directory')
+                        nargs='+',
+                        metavar='filename',
+                        help="files, directories or glob patterns to analyze, '-' for stdin")
 
     parser.add_argument('--words',
                         type=int,
                         help='number of most frequent words')
 
+    parser.add_argument('--ignore',
+                        nargs='+',
+                        default=(),
+                        metavar='WORD',
+                        help='words to leave out of the statistics')
+
+    parser.add_argument('--unicode-punctuation',
+                        action='store_true',
+                        help='strip Unicode punctuation, not only ASCII punctuation')
+
+    parser.add_argument('--approximate',
+                        type=int,
+                        metavar='CAPACITY',
+                        help='count frequencies approximately, tracking at most CAPACITY words')
+
+    parser.add_argument('--ngrams',
+                        type=int,
+                        metavar='N',
+                        help='also count the sequences of N consecutive words')
+
+    parser.add_argument('--cooccur',
+                        type=int,
+                        metavar='WINDOW',
+                        help='also count the pairs of words at most WINDOW words apart')
+
+    parser.add_argument('--jobs',
+                        type=int,
+                        default=1,
+                        help='number of processes used to analyze the files')
+
+    parser.add_argument('--format',
+                        choices=OUTPUT_FORMATS,
+                        default=OUTPUT_FORMATS[0],
+                        help='output format; json, csv and ndjson are written without colors')
+
+    parser.add_argument('--no-cache',
+                        action='store_true',
+                        help='analyze every file again instead of reusing previous results')
+
+    parser.add_argument('--mmap',
+                        action='store_true',
+                        help='analyze the memory-mapped bytes of the file')
+
     return parser.parse_args()
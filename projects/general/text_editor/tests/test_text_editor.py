@@ -5,6 +5,7 @@ import pytest
 
 from projects.general.text_editor.text_editor import (
     Colors,
+    StatisticsIndex,
     TextEditor,
     get_file_path,
     parse_arguments,
@@ -210,3 +211,57 @@ def test_save_file(capsys, tmp_path):
     assert editor.is_saved is True
     assert "Done!" in captured.out
     assert file_path.read_text() == "Content to save"
+
+
+def test_statistics_follow_write_and_append(tmp_path):
+    """Tests that the statistics are updated by the write and append commands."""
+    file_path = tmp_path / "stats_test.txt"
+    file_path.write_text("old content")
+    editor = TextEditor(file_path)
+    editor.open_file()
+    editor.process_write_command("write The code")
+    editor.process_append_command("append the End")
+
+    assert editor.statistics.words == 4
+    assert editor.statistics.lines == 2
+    assert editor.statistics.characters == len(editor.file_content)
+    assert editor.statistics.most_common(1) == {"the": 2}
+
+
+def test_display_statistics(capsys, tmp_path):
+    """Tests the display_statistics method."""
+    file_path = tmp_path / "stats_display.txt"
+    editor = TextEditor(file_path)
+    editor.process_write_command("write Wasted Love")
+    editor.display_statistics()
+    captured = capsys.readouterr()
+
+    assert "words: 2  lines: 1  characters: 11" in captured.out
+    assert "wasted" in captured.out
+
+
+def test_statistics_index_append():
+    """Tests that appended text continues the last word and line break."""
+    pieces = ["Hello wor", "ld!\r", "\nsecond line", " and more", "\n", "", "last"]
+    index = StatisticsIndex()
+
+    for piece in pieces[:2]:
+        index.append(piece)
+    assert (index.words, index.lines, index.characters) == (2, 1, 13)
+    assert index.most_common() == {"hello": 1, "world": 1}
+
+    for piece in pieces[2:]:
+        index.append(piece)
+    assert (index.words, index.lines, index.characters) == (7, 3, 39)
+    assert index.most_common(2) == {"hello": 1, "world": 1}
+
+
+def test_statistics_index_replace():
+    """Tests that replacing the text discards the previous statistics."""
+    index = StatisticsIndex("old words here")
+    index.replace("new\ntext")
+    index.append(" again")
+
+    assert (index.words, index.lines, index.characters) == (3, 2, 14)
+    assert index.most_common(1) == {"new": 1}
+    assert "old" not in index.frequency
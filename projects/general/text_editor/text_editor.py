@@ -1,6 +1,24 @@
 import argparse
 import pathlib
 
+from collections import Counter
+from string import punctuation
+
+# ================================================================
+#                            CONSTANTS
+# ================================================================
+
+# Number of most frequent words displayed by the stats command
+STATS_WORDS = 10
+
+# Words are lowercased and stripped of ASCII punctuation, as the Text Analyzer
+# does by default
+PUNCTUATION_TABLE = str.maketrans('', '', punctuation)
+
+# Line boundaries recognized by str.splitlines()
+LINE_BREAKS = ('\n', '\r', '\v', '\f', '\x1c', '\x1d', '\x1e', '\x85',
+               '\u2028', '\u2029')
+
 # ================================================================
 #                             COLORS
 # ================================================================
@@ -36,6 +54,76 @@ def parse_arguments() -> argparse.Namespace:
 
     return parser.parse_args()
 
+# ================================================================
+#                           STATISTICS
+# ================================================================
+
+
+def split_words(text: str) -> list[str]:
+    """Normalizes a text made only of complete words and splits it."""
+    return text.lower().translate(PUNCTUATION_TABLE).split()
+
+
+class StatisticsIndex:
+    """Keeps the statistics of an edited text up to date.
+
+    Only appended text, and the last word it may continue, is analyzed.
+    Replacing the text analyzes the new text alone instead of subtracting
+    the old one.
+    """
+
+    def __init__(self, text: str = ''):
+        """Initializes a StatisticsIndex object."""
+        self.replace(text)
+
+    def replace(self, text: str) -> None:
+        """Replaces the whole indexed text."""
+        self.frequency = Counter()
+        self.characters = 0
+        self.line_breaks = 0
+        self.last_character = ''
+        # The last word, which the next append may continue
+        self.pending_word = ''
+        self.append(text)
+
+    def append(self, text: str) -> None:
+        """Indexes text added at the end of the indexed text."""
+        if not text:
+            return
+
+        self.characters += len(text)
+
+        # '\r\n' is a single line break, even when split between two appends
+        self.line_breaks += sum(map(text.count, LINE_BREAKS)) - text.count('\r\n')
+        if self.last_character == '\r' and text[0] == '\n':
+            self.line_breaks -= 1
+        self.last_character = text[-1]
+
+        text = self.pending_word + text
+        if text[-1].isspace():
+            self.pending_word = ''
+        else:
+            self.pending_word = text.rsplit(None, 1)[-1]
+            text = text[:len(text) - len(self.pending_word)]
+        self.frequency.update(split_words(text))
+
+    @property
+    def words(self) -> int:
+        """The number of words."""
+        return self.frequency.total() + len(split_words(self.pending_word))
+
+    @property
+    def lines(self) -> int:
+        """The number of lines."""
+        return self.line_breaks + (bool(self.characters)
+                                   and self.last_character not in LINE_BREAKS)
+
+    def most_common(self, number: int | None = None) -> dict:
+        """Returns the most frequent words, with their frequencies."""
+        # Count the last word only for this call, as the next append may continue it
+        frequency = self.frequency + Counter(split_words(self.pending_word))
+        return dict(frequency.most_common(number))
+
 # ================================================================
 #                              UTILS
 # ================================================================
@@ -59,6 +147,7 @@ class TextEditor:
         self.filename = filename
         self.is_saved = True
         self.file_content = ''
+        self.statistics = StatisticsIndex()
 
     def check_existing_file(self) -> bool:
         """Checks if the file exists."""
@@ -84,6 +173,7 @@ class TextEditor:
                 exit()
 
         self.file_content = self.read_file()
+        self.statistics.replace(self.file_content)
 
     def read_file(self) -> str:
         """Reads the contents of the file."""
@@ -101,14 +191,28 @@ class TextEditor:
                 '*Changes not saved\n', Colors.YELLOW))
         print(Colors.style_text(self.file_content, Colors.CYAN))
 
+    def display_statistics(self) -> None:
+        """Displays the statistics of the file content."""
+        statistics = self.statistics
+
+        print(Colors.style_text(
+            f'words: {statistics.words}  lines: {statistics.lines}  '
+            f'characters: {statistics.characters}', Colors.CYAN))
+
+        for word, frequency in statistics.most_common(STATS_WORDS).items():
+            print(f'{word:<20}{frequency:>6}')
+
     def process_write_command(self, command: str) -> None:
         """Processes the write command."""
         self.file_content = command[6:]
+        self.statistics.replace(self.file_content)
         self.is_saved = False
 
     def process_append_command(self, command: str) -> None:
         """Processes the append command."""
-        self.file_content += f'\n{command[7:]}'
+        appended = f'\n{command[7:]}'
+        self.file_content += appended
+        self.statistics.append(appended)
         self.is_saved = False
 
     def save_file(self) -> None:
@@ -130,6 +234,8 @@ class TextEditor:
 
             if command == 'read':
                 self.display_file_content()
+            elif command == 'stats':
+                self.display_statistics()
             elif command.startswith('write '):
                 self.process_write_command(command)
                 print(Colors.style_text('Done!', Colors.GREEN))
@@ -143,7 +249,7 @@ class TextEditor:
                 return
             else:
                 print(Colors.style_text(
-                    'Invalid command. Available commands (read, write <text>, append <text>, save, exit)', Colors.RED))
+                    'Invalid command. Available commands (read, stats, write <text>, append <text>, save, exit)', Colors.RED))
 
 
 # ================================================================